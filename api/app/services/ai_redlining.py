@@ -1,19 +1,974 @@
-import os
+import bisect
+import copy
+import hashlib
+import itertools
 import json
 import logging
+import os
+import re
+import threading
+import time
 import uuid
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
 from docx import Document as DocxDocument
-from docx.shared import Inches, RGBColor
-from docx.enum.text import WD_COLOR_INDEX
+from docx.oxml.ns import nsdecls, nsmap
+from docx.oxml.parser import element_class_lookup, parse_xml
 from docx.oxml.shared import OxmlElement, qn
-from docx.oxml.ns import nsdecls
-from docx.oxml import parse_xml
-from datetime import datetime
+from docx.shared import Inches, RGBColor
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+from lxml import etree
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
 
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying - the same request may well succeed a moment later
+_TRANSIENT_API_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+_API_MAX_ATTEMPTS = 4
+# Model responses are reused for identical requests (same model and prompts) for an hour
+_RESPONSE_CACHE_SIZE = 1024
+_RESPONSE_CACHE_TTL = 3600
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+# Models that accept response_format={"type": "json_object"} (the base gpt-4 model rejects it)
+_JSON_MODE_MODEL_PREFIXES = ('gpt-4o', 'gpt-4-turbo', 'gpt-4-1106', 'gpt-4-0125', 'gpt-3.5-turbo-1106', 'gpt-3.5-turbo-0125')
+# Context window (prompt + completion tokens) by model name prefix, longest prefix first;
+# anything unlisted is assumed to have the base gpt-4 window
+_MODEL_CONTEXT_TOKENS = (
+    ('gpt-4o', 128000), ('gpt-4-turbo', 128000), ('gpt-4-1106', 128000), ('gpt-4-0125', 128000),
+    ('gpt-4-32k', 32768), ('gpt-3.5-turbo', 16385), ('gpt-4', 8192)
+)
+_DEFAULT_CONTEXT_TOKENS = 8192
+# The "documents" object of a multiplexed response, and each "<id>": key inside it
+_MULTIPLEX_DOCUMENTS_RE = re.compile(r'"documents"\s*:\s*\{')
+_MULTIPLEX_ENTRY_RE = re.compile(r'\s*,?\s*"([^"]+)"\s*:\s*')
+
+# Patterns used when post-processing the model's modifications
+_BY_RE = re.compile(r'By:[\t\s]+_+')
+_TITLE_RE = re.compile(r'Title:[\t\s]+_+')
+_DATE_LABEL_RE = re.compile(r'Date:[\t\s]+_+')
+_HEADER_DATE_RE = re.compile(r'([A-Z][a-z]+ _{2,}, \d{4})')
+_TERM_YEARS_RE = re.compile(r'(\d+)\s*(?:\(\d+\))?\s*years?', re.IGNORECASE)
+# Spelled-out forms legal documents use for short terms
+_WORD_TO_NUM = {
+    1: 'one', 2: 'two', 3: 'three', 4: 'four', 5: 'five',
+    6: 'six', 7: 'seven', 8: 'eight', 9: 'nine', 10: 'ten'
+}
+_WS_RE = re.compile(r'\s+')
+# Whitespace-aware matching only varies the whitespace (and what sits inside empty
+# parentheses), so the pieces between these always appear verbatim in a match
+_WS_OR_PARENS_RE = re.compile(r'[\s()]+')
+# Mock analysis: term phrases the duration rule rewrites, in priority order, and whether
+# each is replaced with the "N (N) years" form (True) or plain "N years" (False)
+_TERM_YEAR_PATTERNS = (
+    ('five (5) years', True), ('5 years', False),
+    ('three (3) years', True), ('3 years', False),
+    ('four (4) years', True), ('4 years', False),
+    ('ten (10) years', True), ('10 years', False),
+    ('seven (7) years', True), ('7 years', False),
+    ('three years', True), ('five years', True), ('seven years', True), ('ten years', True)
+)
+# ...found in one case-insensitive scan (the lookahead reports overlapping
+# occurrences, just like separate substring tests)
+_TERM_YEAR_PHRASES = tuple(phrase for phrase, _ in _TERM_YEAR_PATTERNS)
+_TERM_YEAR_RE = re.compile(f"(?=({'|'.join(map(re.escape, _TERM_YEAR_PHRASES))}))", re.IGNORECASE)
+# Mock analysis: where the Representatives definition and the return/destroy clause live
+_REPRESENTATIVES_RES = tuple(re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+    r'("Representatives"|Representatives).*?\)',
+    r'collectively, "Representatives"',
+    r'collectively, \'Representatives\'',
+))
+_RETURN_SECTION_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    'return.*promptly',
+    'destroy.*return',
+    'return.*all.*material',
+    'return.*evaluation.*material',
+))
+_REPRESENTATIVES_WORD_RE = re.compile(r'[Rr]epresentatives')
+_UNDERSCORES_RE = re.compile(r'(_+)')
+# A signature line in NUL-joined paragraph texts: a paragraph starting (after any
+# whitespace) with "Signed:", or with "By:" and holding an underscore. ASCII-only case
+# folding matches the str.lower() comparison it replaces
+_SIGNATURE_LINE_RE = re.compile(r'(?:^|\0)\s*(?ai:signed:|by:[^\0]*_)')
+# Mock analysis needles - static across documents, so built once at import rather
+# than per call. Company placeholders in priority order for the parties section and
+# for the signature block
+_PARTY_COMPANY_PATTERNS = (
+    "Company (name to be provided upon execution)",
+    "For: Company (name to be provided upon execution)",
+    "For: Company",
+    "Company"
+)
+_SIGNATURE_COMPANY_PATTERNS = (
+    "For: Company (name to be provided upon execution)",
+    "For: Company",
+    "Company (name to be provided upon execution)",
+    "Company"
+)
+# Firm rule: party placeholder -> replacement template for the firm name, first match wins
+_PARTY_NAME_PATTERNS = (
+    ('Company (name to be provided upon execution)', '{}'),
+    ('Recipient', '{} (Recipient)'),
+    ('Receiving Party', '{} (Recipient)')
+)
+# Governing law: (current, replacement), first match wins
+_LAW_PATTERNS = (
+    ('State of Delaware', 'State of New York'),
+    ('Delaware', 'New York'),
+    ('Delaware courts', 'New York courts')
+)
+# Title: placeholder variants the mock analysis replaces, most specific first (bare
+# "Title:" also covers "Title: \t" and "Title:\t")
+_TITLE_PLACEHOLDERS = (
+    "Title: \t_______________________________",
+    "Title:\t_______________________________",
+    "Title:_______________________________",
+    "Title:"
+)
+# Placeholders DocumentProcessor's replacement diagnostics look for, matched in one
+# pass over each lowercased paragraph (none is a prefix of another, so the lookahead
+# sees every occurrence)
+_COMMON_PATTERNS = ("For:", "Company", "Dear", "NAME", "Title:", "By:")
+_COMMON_PATTERNS_RE = re.compile(f"(?=({'|'.join(re.escape(pattern.lower()) for pattern in _COMMON_PATTERNS)}))")
+# Wordings DocumentProcessor._replace_text falls back on that don't depend on the text
+# being replaced: the "For: Company" line with its usual spacing and case slips, and
+# common term and company phrasings
+_FOR_COMPANY_VARIATIONS = (
+    "For: Company",  # Common pattern
+    "For:Company",   # No space after colon
+    "For Company",   # No colon
+    "for: company",  # All lowercase
+    "FOR: COMPANY",  # All uppercase
+    # Handle multiple whitespace variations
+    "For:  Company",  # Double space
+    "For:   Company", # Triple space
+    "For:    Company", # Quadruple space
+    "For:\tCompany",  # Tab after colon
+    "For: \tCompany", # Space and tab
+    "For:\t Company", # Tab and space
+    "For: \t Company", # Space, tab, space
+)
+_TERM_FALLBACK_VARIATIONS = (
+    "five (5) years",  # Common legal format
+    "five years",
+    "5 year",
+    "five year",
+)
+_COMPANY_FALLBACK_VARIATIONS = (
+    "Company",
+    "For: Company",
+    "Company (name to be provided upon execution)",
+    "For: Company (name to be provided upon execution)",
+)
+
+# Reading model output: a decoder that accepts literal tabs/newlines inside strings and
+# stops at the end of the first object (so prose around it doesn't matter); failing
+# that, bare newlines to escape, and complete modification objects to salvage from a
+# truncated response
+_LENIENT_JSON_DECODER = json.JSONDecoder(strict=False)
+_UNESCAPED_NEWLINE_RE = re.compile(r'(?<!\\)\n')
+_COMPLETE_MOD_RE = re.compile(r'\{\s*"type":\s*"[^"]+",\s*"section":\s*"[^"]+",\s*"current_text":\s*"(?:[^"\\]|\\.)*",\s*"new_text":\s*"(?:[^"\\]|\\.)*",\s*"reason":\s*"(?:[^"\\]|\\.)*",\s*"location_hint":\s*"(?:[^"\\]|\\.)*"\s*\}', re.DOTALL)
+
+# Date placeholders and the prefix kept in front of today's date when filled
+_FLEX_DATE_PATTERNS = [
+    # Month __, Year patterns (any number of underscores)
+    (r'[A-Za-z]+ _{2,}, \d{4}', ''),  # "October __, 2025" or "October ___, 2025"
+    # Date: _____ patterns
+    (r'Date:\s*_+', 'Date: '),
+    # Dated: _____ patterns
+    (r'Dated:\s*_+', 'Dated: '),
+    # [DATE] or [date] patterns
+    (r'\[DATE\]', ''),
+    (r'\[date\]', ''),
+    (r'\(DATE\)', ''),
+    (r'\(date\)', ''),
+    # [Insert date] or [Enter date] patterns
+    (r'\[Insert date\]', ''),
+    (r'\[Enter date\]', ''),
+    (r'\[insert date\]', ''),
+    # Month blank, Year - flexible blank matching
+    (r'[A-Za-z]+\s+_{2,}\s*,\s*\d{4}', ''),  # Handles spacing variations
+]
+# All of the above fused into one alternation so the document is scanned
+# once; the name of the matching group gives the pattern's index
+_FLEX_DATE_RE = re.compile(
+    '|'.join(f'(?P<p{i}>{pattern})' for i, (pattern, _) in enumerate(_FLEX_DATE_PATTERNS)),
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Validation phrase lists, each compiled into one alternation so a
+# modification is checked against the whole list in a single scan
+_MONTH_RE = re.compile('January|February|March|April|May|June|July|August|September|October|November|December')
+# Words that mean a "date" replacement is really touching body text
+_DATE_FORBIDDEN_RE = re.compile('|'.join(map(re.escape, [
+    'company', 'agreement', 'confidentiality', 'nda', 'business', 'dear', 'name',
+    'for:', 'by:', 'title:', 'effective', 'mutual'
+])))
+# Contexts where Company is the defined disclosing party and must never be replaced
+_INVALID_COMPANY_RE = re.compile('|'.join(map(re.escape, [
+    '(the "Company")',
+    '(the \'Company\')',
+    'the Company',
+    'concerning the Company',
+    'regarding the Company',
+    'about the Company',
+    'of the Company',
+    'business (the',
+    'machining business'
+])))
+# Example values from the rules the AI sometimes copies instead of the firm details
+_HARDCODED_NAMES = ('John Bagge', 'Jane Doe')
+_HARDCODED_COMPANIES = ('JMC Investment LLC', 'Welch Capital Partners')
+_HARDCODED_TITLES = ('Vice President', 'President', 'CEO')
+_HARDCODED_RE = re.compile('|'.join(map(re.escape, _HARDCODED_NAMES + _HARDCODED_COMPANIES + _HARDCODED_TITLES)))
+# Text in rule instructions that stands for a firm detail -> the firm_details key
+# that replaces it; the alternation tries longer text first ("JMC Investment LLC"
+# before "JMC", "Vice President" before "President")
+_RULE_VALUE_KEYS = {
+    '[FIRM_NAME]': 'firm_name', '[SIGNER_NAME]': 'signatory_name', '[TITLE]': 'title',
+    'JMC Investment LLC': 'firm_name', 'JMC Investment': 'firm_name', 'JMC': 'firm_name',
+    'Welch Capital Partners': 'firm_name',
+    'John Bagge': 'signatory_name', 'John': 'signatory_name', 'Jane Doe': 'signatory_name',
+    'Vice President': 'title', 'President': 'title', 'CEO': 'title', 'Managing Director': 'title'
+}
+_RULE_VALUE_RE = re.compile('|'.join(map(re.escape, sorted(_RULE_VALUE_KEYS, key=len, reverse=True))))
+# Signature block contexts where Company is a placeholder
+_VALID_COMPANY_CONTEXTS = ('For: Company', 'For:\tCompany', 'For: \tCompany', 'Company (name to be provided upon execution)')
+# Anything the model (or the post-processing auto-fixes) could fill in without a custom
+# rule: blanks, NAME/Company placeholders, bracket tokens, signature/date labels, the term
+_AI_TRIGGER_RE = re.compile(r'_{2,}|\bNAME\b|Company|\[[A-Z_]+\]|\b(?:By|Title|Dated?|For):|three (?:\(3\) )?years',
+                            re.IGNORECASE)
+# Completion budget: a modification object with its reason runs to roughly 200 tokens,
+# plus the summary/risk fields; never above what fits GPT-4's context with the prompt
+_MAX_COMPLETION_TOKENS = 3000
+_MIN_COMPLETION_TOKENS = 600
+_TOKENS_PER_MODIFICATION = 200
+
+# Frontend firm detail keys and the names the prompts and post-processing use
+_FIRM_KEY_MAP = {
+    'name': 'firm_name',
+    'signerName': 'signatory_name',
+    'signerTitle': 'title',
+    'address': 'address',
+    'city': 'city',
+    'state': 'state',
+    'zipCode': 'zip_code',
+    'email': 'email',
+    'phone': 'phone'
+}
+
+# Placeholder tokens filled in from the firm details
+KNOWN_TOKENS = ('[FIRM_NAME]', '[FIRM_ADDRESS]', '[SIGNER_NAME]', '[SIGNER_TITLE]')
+_KNOWN_TOKEN_RE = re.compile('|'.join(map(re.escape, KNOWN_TOKENS)))
+
+def _json_mode_options(model: str) -> Dict[str, Any]:
+    """Extra completion parameters asking the model for a strict JSON object, where supported"""
+    if model.startswith(_JSON_MODE_MODEL_PREFIXES):
+        return {'response_format': {'type': 'json_object'}}
+    return {}
+
+
+def _context_window(model: str) -> int:
+    """Return the context window of the model in tokens"""
+    for prefix, tokens in _MODEL_CONTEXT_TOKENS:
+        if model.startswith(prefix):
+            return tokens
+    return _DEFAULT_CONTEXT_TOKENS
+
+
+def _completion_budget(document_text: str, custom_rules: List[Dict[str, Any]]) -> int:
+    """Estimate max_tokens from the placeholders in the document and the number of rules"""
+    expected_modifications = len(custom_rules or ())
+    for _ in _AI_TRIGGER_RE.finditer(document_text):
+        expected_modifications += 1
+        if _MIN_COMPLETION_TOKENS + expected_modifications * _TOKENS_PER_MODIFICATION >= _MAX_COMPLETION_TOKENS:
+            return _MAX_COMPLETION_TOKENS
+    return min(_MAX_COMPLETION_TOKENS, _MIN_COMPLETION_TOKENS + expected_modifications * _TOKENS_PER_MODIFICATION)
+
+
+class _SubstringCache(dict):
+    """Memoized `needle in text` tests - each distinct needle scans the text once"""
+    
+    def __init__(self, text: str):
+        super().__init__()
+        self.text = text
+    
+    def __missing__(self, needle: str) -> bool:
+        found = self[needle] = needle in self.text
+        return found
+
+
+@lru_cache(maxsize=128)
+def _mock_rule_kind(rule_name: str) -> Optional[str]:
+    """Classify a lowercased rule name for the mock analysis (first matching kind wins)"""
+    if 'duration' in rule_name or 'term' in rule_name or 'confidentiality' in rule_name:
+        return 'term'
+    if 'liability' in rule_name or 'damage' in rule_name:
+        return 'liability'
+    if 'representatives' in rule_name or ('add' in rule_name and 'parties' in rule_name):
+        return 'representatives'
+    if 'retention' in rule_name or 'carve' in rule_name or 'retain' in rule_name:
+        return 'retention'
+    if 'firm' in rule_name or ('party' in rule_name and 'add' not in rule_name) or ('name' in rule_name and 'parties' not in rule_name):
+        return 'firm'
+    if 'governing' in rule_name or 'law' in rule_name:
+        return 'law'
+    if 'signature' in rule_name or 'block' in rule_name:
+        return 'signature'
+    return None
+
+
+def _first_present(found_in: _SubstringCache, patterns, common: str) -> Optional[str]:
+    """Return the first of the patterns (in priority order) found in the text, or None"""
+    # Every pattern contains `common`, so when that is missing the whole group
+    # is ruled out with a single scan
+    if not found_in[common]:
+        return None
+    return next((pattern for pattern in patterns if found_in[pattern]), None)
+
+
+def _company_replacement(pattern: str, firm_name: str) -> str:
+    """Replacement for a matched company placeholder - "For:" lines keep their own spacing"""
+    if pattern.startswith("For:"):
+        return pattern.replace("Company", firm_name)
+    return f"For: {firm_name}"
+
+
+def _mock_title_replacement(found_in: _SubstringCache, title: str, reason: str,
+                            location_hint: str) -> Optional[Dict[str, Any]]:
+    """Replace the first Title: placeholder variant found, unless the title is already in the document"""
+    # Every variant starts with "Title:", so one scan rules them all out
+    if not found_in['Title:']:
+        logger.debug("'Title:' not found in document, skipping title replacement")
+        return None
+    # Check if title already exists to avoid duplicates
+    if found_in[title]:
+        logger.debug("Title '%s' already in document, skipping replacement", title)
+        return None
+    
+    title_pattern = next(pattern for pattern in _TITLE_PLACEHOLDERS if found_in[pattern])
+    logger.debug("Added title replacement: '%s' -> 'Title: %s'", title_pattern, title)
+    return {
+        "type": "TEXT_REPLACE",
+        "section": "signatures",
+        "current_text": title_pattern,
+        "new_text": f"Title: {title}",
+        "reason": reason,
+        "location_hint": location_hint
+    }
+
+
+def _mock_term_rule(rule_instruction: str, document_text: str, found_in: _SubstringCache,
+                    signing_party: Tuple[str, str, str], mock_modifications: List[Dict[str, Any]]):
+    """Change the confidentiality term to the duration named in the rule"""
+    # Extract target duration from rule instruction
+    target_years = 2  # Default fallback
+    
+    # Try to extract number from instruction (e.g., "Change to 5 years" → 5)
+    year_match = _TERM_YEARS_RE.search(rule_instruction)
+    if year_match:
+        target_years = int(year_match.group(1))
+        logger.debug("📅 Extracted target duration: %d years from instruction", target_years)
+    else:
+        logger.warning("⚠️ Could not extract duration from instruction '%s', using default: %d years", rule_instruction, target_years)
+    
+    # Build dynamic target pattern
+    target_years_text = f"{target_years} ({target_years}) years" if target_years > 0 else f"{target_years} years"
+    target_years_simple = f"{target_years} years"
+    
+    # Look for various year patterns in the document (_TERM_YEAR_PATTERNS) and replace with target
+    # Note: We check for target patterns AFTER looking for patterns to replace,
+    # so we can still replace other year patterns even if target already exists
+    found_pattern = False
+    # One case-insensitive scan finds every year pattern present without
+    # building a lowercased copy of the document; the targets are lowered
+    # once per rule (the year patterns are already lowercase)
+    years_in_doc = {phrase.lower() for phrase in _TERM_YEAR_RE.findall(document_text)}
+    target_lowers = (target_years_text.lower(), target_years_simple.lower())
+    for current_pattern, spelled_out in _TERM_YEAR_PATTERNS:
+        if current_pattern in years_in_doc:
+            new_pattern = target_years_text if spelled_out else target_years_simple
+            # Double-check: don't replace if it's already the target
+            if current_pattern in target_lowers:
+                logger.debug("⚠️ Pattern '%s' already matches target '%s' - skipping this pattern", current_pattern, target_years_text)
+                found_pattern = True  # Mark as found but don't add modification
+                continue  # Skip this pattern but continue checking others
+    
+            mock_modifications.append({
+                "type": "TEXT_REPLACE",
+                "section": "term",
+                "current_text": current_pattern,
+                "new_text": new_pattern,
+                "reason": rule_instruction,
+                "location_hint": "Confidentiality term section"
+            })
+            logger.debug("Found year pattern: %s -> %s", current_pattern, new_pattern)
+            found_pattern = True
+            # Don't break - continue to find all patterns that need changing
+    
+    if not found_pattern:
+        # If no specific patterns found, add a generic year modification
+        logger.info("No specific year patterns found, adding generic modification")
+        mock_modifications.append({
+            "type": "TEXT_REPLACE",
+            "section": "term",
+            "current_text": "three years",
+            "new_text": target_years_text,
+            "reason": rule_instruction,
+            "location_hint": "Confidentiality term section"
+        })
+
+
+def _mock_liability_rule(rule_instruction: str, document_text: str, found_in: _SubstringCache,
+                         signing_party: Tuple[str, str, str], mock_modifications: List[Dict[str, Any]]):
+    """Add a liability cap clause"""
+    # Add liability cap clause
+    mock_modifications.append({
+        "type": "TEXT_INSERT",
+        "section": "liability",
+        "new_text": "In no event shall either party be liable for any indirect, incidental, special, consequential, or punitive damages arising out of or relating to this Agreement.",
+        "reason": rule_instruction,
+        "location_hint": "After Section 8, Remedies"
+    })
+
+
+def _mock_representatives_rule(rule_instruction: str, document_text: str, found_in: _SubstringCache,
+                               signing_party: Tuple[str, str, str], mock_modifications: List[Dict[str, Any]]):
+    """Expand the Representatives definition with investors and financing sources"""
+    # Handle "Add parties" rule - expand Representatives definition
+    # Look for Representatives definition in the document
+    for pattern in _REPRESENTATIVES_RES:
+        matched = False
+        for match in pattern.finditer(document_text):
+            matched = True
+            current_text = match.group(0)
+            # Check if investors/financing sources are already mentioned
+            # (lowercase the match once for both checks)
+            current_lower = current_text.lower()
+            if 'investors' not in current_lower and 'potential financing sources' not in current_lower:
+                # Find where to insert - typically before the closing parenthesis
+                if current_text.endswith(')'):
+                    # Insert before the closing paren
+                    new_text = current_text[:-1] + ', investors, and potential financing sources)'
+                else:
+                    # Append to the end
+                    new_text = current_text + ', investors, and potential financing sources'
+    
+                mock_modifications.append({
+                    "type": "TEXT_REPLACE",
+                    "section": "definitions",
+                    "current_text": current_text,
+                    "new_text": new_text,
+                    "reason": rule_instruction,
+                    "location_hint": "Representatives definition section"
+                })
+                logger.debug("Found Representatives definition: '%.50s...' -> '%.50s...'", current_text, new_text)
+                break
+        if matched and mock_modifications:  # If we added one, break outer loop
+            break
+
+
+def _mock_retention_rule(rule_instruction: str, document_text: str, found_in: _SubstringCache,
+                         signing_party: Tuple[str, str, str], mock_modifications: List[Dict[str, Any]]):
+    """Add an electronic-copy retention carve-out after the return/destroy clause"""
+    # Handle "Retention carve-out" rule - add clause allowing electronic copy retention
+    # Look for return/destroy sections where we can add the carve-out
+    retention_clause = 'Notwithstanding the foregoing, Recipient may retain an electronic copy of Confidential Information and notes if required under Recipient\'s document retention policy, provided that such retained materials remain subject to the confidentiality obligations set forth herein.'
+    
+    # Look for common return/destroy section patterns
+    found_return_section = False
+    for pattern in _RETURN_SECTION_RES:
+        # Find the paragraph containing this text
+        for match in pattern.finditer(document_text):
+            # Get surrounding context (the paragraph)
+            start = max(0, match.start() - 200)
+            end = min(len(document_text), match.end() + 200)
+            context_lower = document_text[start:end].lower()
+    
+            # Check if retention clause already exists
+            if 'retention policy' not in context_lower and 'electronic copy' not in context_lower:
+                # Find the end of the sentence/paragraph to insert after
+                paragraph_end = document_text.find('.', match.end())
+                if paragraph_end == -1:
+                    paragraph_end = match.end() + 100
+    
+                # Insert the retention clause
+                insertion_point = paragraph_end + 1
+                current_text = document_text[insertion_point:insertion_point+50].strip()
+    
+                mock_modifications.append({
+                    "type": "TEXT_INSERT",
+                    "section": "return_of_materials",
+                    "new_text": retention_clause,
+                    "reason": rule_instruction,
+                    "location_hint": "After return/destroy section"
+                })
+                logger.debug("Added retention carve-out clause after return section")
+                found_return_section = True
+                break
+        if found_return_section:
+            break
+    
+    if not found_return_section:
+        # If no return section found, add as a new clause
+        mock_modifications.append({
+            "type": "TEXT_INSERT",
+            "section": "miscellaneous",
+            "new_text": retention_clause,
+            "reason": rule_instruction,
+            "location_hint": "Before final clauses"
+        })
+        logger.debug("Added retention carve-out clause as new insertion")
+
+
+def _mock_firm_rule(rule_instruction: str, document_text: str, found_in: _SubstringCache,
+                    signing_party: Tuple[str, str, str], mock_modifications: List[Dict[str, Any]]):
+    """Fill in party names and firm placeholders from the firm details"""
+    # Firm details (or their sample defaults), resolved once by _mock_analysis
+    firm_name, signer_name, signer_title = signing_party
+    
+    # Look for party name patterns (_PARTY_NAME_PATTERNS) using firm details
+    for current_pattern, new_template in _PARTY_NAME_PATTERNS:
+        if found_in[current_pattern]:
+            new_pattern = new_template.format(firm_name)
+            mock_modifications.append({
+                "type": "TEXT_REPLACE",
+                "section": "parties",
+                "current_text": current_pattern,
+                "new_text": new_pattern,
+                "reason": rule_instruction,
+                "location_hint": "Parties section"
+            })
+            logger.debug("Found party pattern: %s -> %s", current_pattern, new_pattern)
+            break
+    
+    # Replace firm placeholders with actual firm details
+    if found_in['[FIRM_NAME]']:
+        mock_modifications.append({
+            "type": "TEXT_REPLACE",
+            "section": "parties",
+            "current_text": "[FIRM_NAME]",
+            "new_text": firm_name,
+            "reason": rule_instruction,
+            "location_hint": "Section 1, line 4"
+        })
+    if found_in['[SIGNER_NAME]']:
+        mock_modifications.append({
+            "type": "TEXT_REPLACE",
+            "section": "signatures",
+            "current_text": "[SIGNER_NAME]",
+            "new_text": signer_name,
+            "reason": rule_instruction,
+            "location_hint": "Section 11, line 55"
+        })
+    if found_in['[SIGNER_TITLE]']:
+        mock_modifications.append({
+            "type": "TEXT_REPLACE",
+            "section": "signatures",
+            "current_text": "[SIGNER_TITLE]",
+            "new_text": signer_title,
+            "reason": rule_instruction,
+            "location_hint": "Section 11, line 56"
+        })
+
+
+def _mock_governing_law_rule(rule_instruction: str, document_text: str, found_in: _SubstringCache,
+                             signing_party: Tuple[str, str, str], mock_modifications: List[Dict[str, Any]]):
+    """Switch the governing law from Delaware to New York"""
+    # Look for governing law patterns
+    for current_pattern, new_pattern in _LAW_PATTERNS:
+        if found_in[current_pattern]:
+            mock_modifications.append({
+                "type": "TEXT_REPLACE",
+                "section": "governing_law",
+                "current_text": current_pattern,
+                "new_text": new_pattern,
+                "reason": rule_instruction,
+                "location_hint": "Governing law section"
+            })
+            logger.debug("Found law pattern: %s -> %s", current_pattern, new_pattern)
+            break
+
+
+def _mock_signature_rule(rule_instruction: str, document_text: str, found_in: _SubstringCache,
+                         signing_party: Tuple[str, str, str], mock_modifications: List[Dict[str, Any]]):
+    """Fill in the signature block placeholders from the firm details"""
+    # Firm details (or their sample defaults), resolved once by _mock_analysis
+    firm_name, signer_name, signer_title = signing_party
+    
+    # Replace signature placeholders instead of inserting new content
+    signature_replacements = []
+    
+    # Look for specific signature patterns in the document
+    # Try multiple variations of the company placeholder
+    pattern = _first_present(found_in, _SIGNATURE_COMPANY_PATTERNS, "Company")
+    if pattern:
+        # Determine the replacement text based on the pattern using firm details
+        new_text = _company_replacement(pattern, firm_name)
+    
+        signature_replacements.append({
+            "type": "TEXT_REPLACE",
+            "section": "signatures",
+            "current_text": pattern,
+            "new_text": new_text,
+            "reason": rule_instruction,
+            "location_hint": "Signature block company name"
+        })
+        logger.debug("Found company pattern: '%s' -> '%s'", pattern, new_text)
+    
+    # Check if signer name already exists to avoid duplicates
+    if found_in['By:'] and not found_in[signer_name]:
+        signature_replacements.append({
+            "type": "TEXT_REPLACE",
+            "section": "signatures",
+            "current_text": "By:",
+            "new_text": f"By: {signer_name}",
+            "reason": rule_instruction,
+            "location_hint": "Signature block signer name"
+        })
+    
+    # Look for Title: with various formatting patterns
+    title_modification = _mock_title_replacement(
+        found_in, signer_title, rule_instruction, "Signature block title"
+    )
+    if title_modification:
+        signature_replacements.append(title_modification)
+    
+    if signature_replacements:
+        mock_modifications.extend(signature_replacements)
+        logger.debug("Added %d signature block replacements", len(signature_replacements))
+    else:
+        logger.debug("No signature placeholders found to replace")
+
+
+# Rule kind (see _mock_rule_kind) -> handler adding that rule's mock modifications
+_MOCK_RULE_HANDLERS = {
+    'term': _mock_term_rule,
+    'liability': _mock_liability_rule,
+    'representatives': _mock_representatives_rule,
+    'retention': _mock_retention_rule,
+    'firm': _mock_firm_rule,
+    'law': _mock_governing_law_rule,
+    'signature': _mock_signature_rule
+}
+# Rule kind -> text at least one of which must be in the document for its handler to
+# add anything (kinds missing here, like term and liability, always add something;
+# the Representatives patterns are case-insensitive so can't be pre-checked this way)
+_MOCK_RULE_TRIGGERS = {
+    'firm': tuple(pattern for pattern, _ in _PARTY_NAME_PATTERNS) + ('[FIRM_NAME]', '[SIGNER_NAME]', '[SIGNER_TITLE]'),
+    'law': ('Delaware',),
+    'signature': ('Company', 'By:', 'Title:')
+}
+
+
+def _response_cache_key(model: str, messages: List[Dict[str, str]]) -> str:
+    """Hash everything that determines the model's answer"""
+    payload = json.dumps([model, messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cached_response(key: str) -> Optional[str]:
+    """Return a cached model response that hasn't expired yet"""
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, text = entry
+        if time.monotonic() - stored_at > _RESPONSE_CACHE_TTL:
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+        return text
+
+
+def _is_complete_json_response(text: str) -> bool:
+    """True if a model response holds a JSON object that decodes as it stands"""
+    start = text.find('{')
+    if start == -1:
+        return False
+    try:
+        parsed, _ = _LENIENT_JSON_DECODER.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(parsed, dict)
+
+
+def _cache_response(key: str, text: str):
+    """Remember a model response, evicting the least recently used one when full"""
+    with _response_cache_lock:
+        _response_cache[key] = (time.monotonic(), text)
+        _response_cache.move_to_end(key)
+        if len(_response_cache) > _RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+@lru_cache(maxsize=32)
+def _target_patterns(target_years: int) -> tuple:
+    """Lowercased ways a document can already state the target term"""
+    patterns = [
+        f"{target_years} ({target_years}) years",
+        f"{target_years} years",
+        f"{target_years} ({target_years}) year",  # singular
+        f"{target_years} year"  # singular
+    ]
+    # Also check word forms if target is 1-10
+    if target_years in _WORD_TO_NUM:
+        word = _WORD_TO_NUM[target_years]
+        patterns.extend([
+            f"{word} ({target_years}) years",
+            f"{word} years"
+        ])
+    return tuple(pattern.lower() for pattern in patterns)
+
+# The run content Run.text turns into text, and the runs Paragraph.text reads (direct
+# and inside hyperlinks), as one compiled XPath per paragraph instead of one per run
+_RUN_TEXT_CONTENT = "*[self::w:t or self::w:tab or self::w:br or self::w:cr or self::w:noBreakHyphen or self::w:ptab]"
+_PARAGRAPH_TEXT_XPATH = etree.XPath(f"w:r/{_RUN_TEXT_CONTENT} | w:hyperlink/w:r/{_RUN_TEXT_CONTENT}",
+                                    namespaces={'w': nsmap['w']})
+# Just the w:t elements of those runs, the text a deletion can splice in place
+_PARAGRAPH_RUN_TEXT_XPATH = etree.XPath("w:r/w:t | w:hyperlink/w:r/w:t", namespaces={'w': nsmap['w']})
+
+def _paragraph_element_text(p) -> str:
+    """The text of a <w:p> element, same as Paragraph.text"""
+    return ''.join(map(str, _PARAGRAPH_TEXT_XPATH(p)))
+
+def _paragraph_texts(doc: DocxDocument) -> List[str]:
+    """The text of every body paragraph, same as [p.text for p in doc.paragraphs]"""
+    return list(map(_paragraph_element_text, doc.element.body.p_lst))
+
+def _stream_paragraph_texts(doc_path: str) -> Optional[List[str]]:
+    """Body paragraph texts streamed from the package's word/document.xml without loading
+    the document, or None when that can't be read (so the caller loads it and python-docx
+    reports any problem with the file)"""
+    body_tag = qn('w:body')
+    texts = []
+    try:
+        with zipfile.ZipFile(doc_path) as package, package.open('word/document.xml') as source:
+            # Same parser settings and element classes python-docx loads with, so each
+            # text matches Paragraph.text
+            events = etree.iterparse(source, events=('end',), tag=qn('w:p'),
+                                     remove_blank_text=True, resolve_entities=False)
+            events.set_element_class_lookup(element_class_lookup)
+            for _, p in events:
+                # Paragraphs inside tables are not part of doc.paragraphs
+                if p.getparent().tag != body_tag:
+                    continue
+                texts.append(_paragraph_element_text(p))
+                # Drop what has been read so only the current paragraph stays in memory
+                p.clear()
+                while p.getprevious() is not None:
+                    del p.getparent()[0]
+    except Exception:
+        return None
+    return texts
+
+# Word Track Changes markup for a deleted / inserted run. Each is parsed once into a
+# template; a tracked change is a deep copy of it with the id, date and text filled in,
+# which is cheaper than parsing the markup (or building it element by element) per run
+_TRACKED_DELETION_XML = (
+    f'<w:del {nsdecls("w")} w:id="0" w:author="AI Redlining System" w:date=""><w:r><w:rPr>{{formatting}}<w:strike/></w:rPr>'
+    '<w:delText xml:space="preserve"/></w:r></w:del>'
+)
+_TRACKED_INSERTION_XML = (
+    f'<w:ins {nsdecls("w")} w:id="0" w:author="AI Redlining System" w:date=""><w:r><w:rPr><w:u w:val="single"/>'
+    '<w:color w:val="FF0000"/></w:rPr><w:t xml:space="preserve"/></w:r></w:ins>'
+)
+# Deletions keep the source run's bold/italic - one template per combination
+_TRACKED_DELETION_TEMPLATES = {
+    (bold, italic): parse_xml(_TRACKED_DELETION_XML.format(formatting=('<w:b/>' if bold else '') + ('<w:i/>' if italic else '')))
+    for bold in (False, True) for italic in (False, True)
+}
+_TRACKED_INSERTION_TEMPLATE = parse_xml(_TRACKED_INSERTION_XML)
+# w:id of each tracked change - only has to be unique within a document, and Word
+# expects a decimal number
+_track_change_ids = itertools.count(1)
+
+@lru_cache(maxsize=1)
+def _track_change_date(second: int) -> str:
+    """w:date for tracked changes made during the given epoch second"""
+    # Changes are stamped to the second, so every change in the same second (most of a
+    # document's) reuses one formatted timestamp
+    return datetime.fromtimestamp(second).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def _stamp_tracked_change(template, text: str):
+    """Copy of a tracked change template with a fresh id, the current date and text"""
+    change = copy.deepcopy(template)
+    change.set(qn('w:id'), str(next(_track_change_ids)))  # Use unique ID for each change
+    change.set(qn('w:date'), _track_change_date(int(time.time())))
+    # The change's single w:r holds w:rPr then the w:t / w:delText
+    change[0][1].text = text or None
+    return change
+
+def _tracked_deletion(run: Run):
+    """w:del element holding run's text as deleted, keeping its bold/italic"""
+    # w:del must contain w:r (run) elements, with w:delText for the deleted text
+    template = _TRACKED_DELETION_TEMPLATES[bool(run.font.bold), bool(run.font.italic)]
+    return _stamp_tracked_change(template, run.text)
+
+def _tracked_insertion(run: Run):
+    """w:ins element holding run's text as inserted (red underline)"""
+    return _stamp_tracked_change(_TRACKED_INSERTION_TEMPLATE, run.text)
+
+def _find_body_paragraph(doc: DocxDocument, marker: str) -> Optional[Paragraph]:
+    """Return the first body paragraph whose text contains marker, or None"""
+    # Let XPath pick candidate <w:p> elements in C instead of building
+    # paragraph.text for every paragraph in Python. string(.) also sees text
+    # that paragraph.text skips (e.g. inside w:ins), so confirm each candidate
+    for p in doc.element.body.xpath(f"./w:p[contains(string(.), '{marker}')]"):
+        paragraph = Paragraph(p, doc._body)
+        if marker in paragraph.text:
+            return paragraph
+    return None
+
+
+def _first_paragraph_index(para_texts: List[str], needle: str) -> int:
+    """Index of the first paragraph text containing needle (which has no NUL), or len(para_texts)"""
+    # One search over all the texts, NUL-separated so a hit never spans two paragraphs
+    joined_texts = '\0'.join(para_texts)
+    hit = joined_texts.find(needle)
+    return len(para_texts) if hit == -1 else joined_texts.count('\0', 0, hit)
+
+
+def _runs_covering(paragraph: Paragraph, old_text: str) -> Optional[List[tuple]]:
+    """(run, run text, match start, match end) for the run - or the two adjacent runs -
+    holding the first old_text in the paragraph, offsets relative to each run's text;
+    None when it isn't there or spans more runs"""
+    runs = paragraph.runs
+    text = paragraph.text
+    # Hyperlinks and other non-run content make run offsets unreliable
+    if ''.join(run.text for run in runs) != text:
+        return None
+    start = text.find(old_text)
+    if start == -1:
+        return None
+    end = start + len(old_text)
+    covering = []
+    offset = 0
+    for run in runs:
+        run_text = run.text
+        run_end = offset + len(run_text)
+        if offset <= start and end <= run_end:
+            return [(run, run_text, start - offset, end - offset)]
+        if offset < end and start < run_end:
+            covering.append((run, run_text, max(start - offset, 0), min(end - offset, len(run_text))))
+        offset = run_end
+    # Text split over more runs (or by an empty run) is left to a full rebuild
+    return covering if len(covering) == 2 else None
+
+
+def _splice_tracked_replacement(paragraph: Paragraph, old_text: str, new_text: str,
+                                track_changes: bool = False) -> bool:
+    """Mark up the first old_text in place when it sits inside one run or across two,
+    leaving the paragraph's other runs (and their formatting) untouched; False otherwise.
+    With track_changes the old/new text become Word Track Changes rather than
+    strikethrough/underline formatting"""
+    covering = _runs_covering(paragraph, old_text)
+    if covering is None:
+        return False
+    
+    last_run = covering[-1][0]
+    for run, run_text, start, end in covering:
+        # Split the run into before / deleted (/ inserted) / after copies that keep its
+        # formatting - the new text goes after the last piece of the old
+        pieces = [(run_text[:start], None), (run_text[start:end], 'deleted')]
+        if run is last_run:
+            pieces.append((new_text, 'added'))
+        pieces.append((run_text[end:], None))
+        anchor = run._r
+        for piece_text, change in pieces:
+            if not piece_text and change is None:
+                continue
+            piece = Run(copy.deepcopy(run._r), paragraph)
+            piece.text = piece_text
+            element = piece._r
+            if track_changes:
+                if change == 'deleted':
+                    element = _tracked_deletion(piece)
+                elif change == 'added':
+                    element = _tracked_insertion(piece)
+            # The change markup replaces any markup the run already carried from an earlier change
+            elif change == 'deleted':
+                piece.font.strike = True
+                piece.font.underline = None
+                piece.font.color.rgb = RGBColor(0, 0, 0)  # Black strikethrough
+            elif change == 'added':
+                piece.font.strike = None
+                piece.font.underline = True
+                piece.font.color.rgb = RGBColor(255, 0, 0)  # Red underline for new text
+            anchor.addnext(element)
+            anchor = element
+        paragraph._p.remove(run._r)
+    return True
+
+
+# The same change text is searched for paragraph after paragraph, so the variants
+# and patterns below are built once per search text
+@lru_cache(maxsize=256)
+def _whitespace_variations(search_text: str) -> tuple:
+    """Common whitespace spellings of search_text"""
+    return (
+        search_text.replace(' ', '\t'),  # Replace spaces with tabs
+        search_text.replace(' ', '  '),  # Replace single space with double
+        _WS_RE.sub('\t', search_text),  # All whitespace to tabs
+    )
+
+
+@lru_cache(maxsize=256)
+def _paren_variations(search_text: str) -> tuple:
+    """Spellings of search_text with spaces inside its empty parentheses"""
+    return (
+        search_text.replace('()', '( )'),  # Space inside: "( )"
+        search_text.replace('()', '(  )'),  # Double space: "(  )"
+        search_text,  # Keep original
+    )
+
+
+@lru_cache(maxsize=256)
+def _flexible_whitespace_re(search_text: str, empty_parens: bool = False) -> re.Pattern:
+    """Compile search_text so any run of whitespace matches where it has a space"""
+    pattern = re.escape(search_text)
+    if empty_parens:
+        pattern = pattern.replace(r'\(\)', r'\(\s*\)')  # Allow spaces in empty parentheses
+    pattern = pattern.replace(r'\ ', r'\s+')  # Allow any whitespace where there was a space
+    return re.compile(pattern)
+
+def _first_paragraph_hits(para_texts: List[str], needles) -> Dict[str, int]:
+    """Index of the first paragraph containing each needle, found in one pass over all paragraphs"""
+    needles = sorted({needle for needle in needles if needle and '\0' not in needle}, key=len, reverse=True)
+    if not needles:
+        return {}
+    # The lookahead lets hits overlap, and with the longest needles tried first a
+    # needle shadowed at some position is always a prefix of the one that matched there
+    prefixes = {needle: [other for other in needles if other != needle and needle.startswith(other)]
+                for needle in needles}
+    starts = []
+    offset = 0
+    for text in para_texts:
+        starts.append(offset)
+        offset += len(text) + 1
+    hits = {}
+    pattern = re.compile(f"(?=({'|'.join(map(re.escape, needles))}))")
+    for match in pattern.finditer('\0'.join(para_texts)):
+        para_idx = bisect.bisect_right(starts, match.start()) - 1
+        for needle in [match.group(1)] + prefixes[match.group(1)]:
+            hits.setdefault(needle, para_idx)
+        if len(hits) == len(needles):
+            break
+    return hits
+
 class AIRedliningService:
     def __init__(self):
         try:
@@ -42,7 +997,8 @@ class AIRedliningService:
                 try:
                     # Initialize OpenAI with minimal parameters
                     logger.warning("Creating OpenAI client...")
-                    self.client = OpenAI(api_key=api_key)
+                    # Retries are handled in _create_completion so they aren't compounded here
+                    self.client = OpenAI(api_key=api_key, max_retries=0)
                     self.model = "gpt-4"  # Using GPT-4 for better instruction following and higher token limits
                     logger.warning("OpenAI client initialized successfully with real API")
                         
@@ -66,74 +1022,79 @@ class AIRedliningService:
             self.model = "mock-gpt-4"
             logger.warning("Falling back to mock mode due to error")
         
+        # Resolve the outputs directory once rather than per document; it is only
+        # created when a document is actually written
+        self._output_dir = Path('outputs').resolve()
+        
     def analyze_document(self, document_text: str, custom_rules: List[Dict[str, Any]], firm_details: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Analyze the document using OpenAI GPT-4 and return redlining instructions
         """
         # Normalize firm_details keys (frontend sends different key names)
-        if firm_details:
-            normalized = {}
-            # Map frontend keys to backend keys
-            key_mapping = {
-                'name': 'firm_name',
-                'signerName': 'signatory_name',
-                'signerTitle': 'title',
-                'address': 'address',
-                'city': 'city',
-                'state': 'state',
-                'zipCode': 'zip_code',
-                'email': 'email',
-                'phone': 'phone'
-            }
-            for frontend_key, backend_key in key_mapping.items():
-                if frontend_key in firm_details:
-                    normalized[backend_key] = firm_details[frontend_key]
-            firm_details = normalized
+        firm_details = self._normalize_firm_details(firm_details)
         
         # Debug: Log the firm details received by AI service
-        logger.warning(f"AI Service received firm_details: {firm_details}")
-        logger.warning(f"Firm details keys: {list(firm_details.keys()) if firm_details else 'None'}")
-        if firm_details:
-            for key, value in firm_details.items():
-                logger.warning(f"  {key}: '{value}'")
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug(f"AI Service received firm_details: {firm_details}")
+            logger.debug(f"Firm details keys: {list(firm_details.keys()) if firm_details else 'None'}")
+            if firm_details:
+                for key, value in firm_details.items():
+                    logger.debug(f"  {key}: '{value}'")
         try:
             # Check if we're in mock mode
-            logger.warning(f"AI Service - Client available: {self.client is not None}")
-            logger.warning(f"AI Service - Model: {self.model}")
+            logger.debug("AI Service - Client available: %s", self.client is not None)
+            logger.debug("AI Service - Model: %s", self.model)
             if not self.client:
                 logger.warning("Using mock analysis - OpenAI client not available")
                 return self._mock_analysis(document_text, custom_rules, firm_details)
-            else:
-                logger.warning("Using REAL OpenAI API - client is available")
-                logger.warning(f"Client type: {type(self.client)}")
-                logger.warning(f"Client attributes: {dir(self.client)}")
+            elif debug_enabled:
+                logger.debug("Using REAL OpenAI API - client is available")
+                logger.debug(f"Client type: {type(self.client)}")
+                logger.debug(f"Client attributes: {dir(self.client)}")
+            
+            # Without rules the model only fills placeholders - if the document has none
+            # there is nothing for it to do, so skip the round-trip
+            if not custom_rules and not _AI_TRIGGER_RE.search(document_text):
+                logger.info("No custom rules and no placeholders in document - skipping OpenAI API call")
+                return self._build_analysis_result('{"modifications": []}', document_text, custom_rules, firm_details)
             
             # Prepare the prompt for GPT-4
             logger.info("Using REAL OpenAI API for analysis")
             
             # Log all rules being sent to AI
-            logger.warning("="*80)
-            logger.warning("RULES BEING SENT TO AI:")
-            for idx, rule in enumerate(custom_rules, 1):
-                logger.warning(f"  Rule {idx}: {rule.get('name', 'Unnamed')}")
-                logger.warning(f"    Instruction: {rule.get('instruction', 'No instruction')}")
-            logger.warning("="*80)
+            if debug_enabled:
+                logger.debug("="*80)
+                logger.debug("RULES BEING SENT TO AI:")
+                for idx, rule in enumerate(custom_rules, 1):
+                    logger.debug(f"  Rule {idx}: {rule.get('name', 'Unnamed')}")
+                    logger.debug(f"    Instruction: {rule.get('instruction', 'No instruction')}")
+                logger.debug("="*80)
             
-            system_prompt = self._build_system_prompt(custom_rules, firm_details)
+            system_prompt = self._build_system_prompt(custom_rules)
             user_prompt = self._build_user_prompt(document_text, custom_rules, firm_details)
             
-            logger.warning("Making OpenAI API call...")
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+            
+            # Re-running the same document with the same rules and firm details
+            # reuses the earlier answer instead of paying for another API call
+            cache_key = _response_cache_key(self.model, messages)
+            ai_response = _cached_response(cache_key)
+            if ai_response is not None:
+                logger.info("Using cached OpenAI response for identical request")
+                return self._build_analysis_result(ai_response, document_text, custom_rules, firm_details)
+            
+            logger.debug("Making OpenAI API call...")
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.1,  # Low temperature for consistent legal work
-                    max_tokens=3000  # Reduced to fit within GPT-4's 8192 token limit (prompt ~5000 tokens + response 3000 = 8000 total)
-                )
-                logger.warning("OpenAI API call successful")
+                # Streamed, so tokens arrive while the model is still generating
+                # Short documents with few placeholders get a smaller budget, which
+                # keeps the model from padding out its answer
+                ai_response, finish_reason = self._create_completion(
+                    messages, stream=True, max_tokens=_completion_budget(document_text, custom_rules))
+                logger.debug("OpenAI API call successful")
             except Exception as api_error:
                 logger.error(f"OpenAI API call failed: {str(api_error)}")
                 logger.error(f"API error type: {type(api_error).__name__}")
@@ -143,491 +1104,603 @@ class AIRedliningService:
                 logger.warning("Falling back to mock analysis due to API error")
                 return self._mock_analysis(document_text, custom_rules, firm_details)
             
-            # Parse the AI response
-            ai_response = response.choices[0].message.content
-            logger.info(f"AI Response: {ai_response}")
-            logger.info(f"AI Response length: {len(ai_response)} characters")
-            modifications = self._parse_ai_response(ai_response)
-            logger.info(f"Parsed modifications: {len(modifications)}")
-            
-            # Validate that all rules resulted in modifications
-            if custom_rules and len(custom_rules) > len(modifications):
-                logger.warning("="*80)
-                logger.warning(f"⚠️  WARNING: Only {len(modifications)} modifications for {len(custom_rules)} rules!")
-                logger.warning("Expected at least one modification per rule.")
-                logger.warning("Rules sent:")
-                for idx, rule in enumerate(custom_rules, 1):
-                    logger.warning(f"  {idx}. {rule.get('name', 'Unnamed')}: {rule.get('instruction', '')[:100]}")
-                logger.warning("Modifications received:")
-                for idx, mod in enumerate(modifications, 1):
-                    logger.warning(f"  {idx}. {mod.get('type')} - {mod.get('reason', 'No reason')[:100]}")
-                logger.warning("="*80)
-            
-            # Post-process: Ensure firm details are used correctly
-            logger.warning(f"POST-PROCESSING: Checking {len(modifications)} modifications for hardcoded values")
-            logger.warning(f"POST-PROCESSING: Firm details provided: {firm_details}")
-            logger.warning(f"POST-PROCESSING: All modifications from AI:")
-            for i, mod in enumerate(modifications):
-                logger.warning(f"  Mod {i+1}: {mod.get('type')} - '{mod.get('current_text', 'N/A')[:50]}...' -> '{mod.get('new_text', 'N/A')[:50]}...'")
+            # Parse the AI response. Only a complete answer that decodes is remembered - a
+            # truncated or malformed one would otherwise be replayed for the whole cache
+            # TTL with no API call to recover
+            if ai_response and finish_reason != 'length' and _is_complete_json_response(ai_response):
+                _cache_response(cache_key, ai_response)
+            return self._build_analysis_result(ai_response, document_text, custom_rules, firm_details)
             
-            # VALIDATION: Remove any modifications that incorrectly replace "Company" or dates in wrong contexts
-            invalid_modifications = []
-            for i, mod in enumerate(modifications):
-                current_text = mod.get('current_text', '')
-                new_text_val = mod.get('new_text', '')
-                
-                # Check for date replacements in wrong locations (e.g., document title)
-                # Dates should ONLY be in dedicated date fields, nowhere else!
-                if any(month in new_text_val for month in ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']):
-                    # This is a date replacement - STRICT validation
-                    
-                    # ONLY ALLOW if current_text is:
-                    # 1. Just a date pattern (e.g., "September __, 2025" with nothing else)
-                    # 2. A date field label (e.g., "Date: ___")
-                    
-                    # Check 1: Is it JUST a date pattern with minimal text?
-                    current_lower = current_text.lower()
-                    forbidden_words = ['company', 'agreement', 'confidentiality', 'nda', 'business', 'dear', 'name', 'for:', 'by:', 'title:', 'effective', 'mutual']
-                    is_pure_date = (
-                        len(current_text.strip()) < 25 and  # Very short text
-                        current_text.count(',') == 1 and  # Has one comma (date format)
-                        not any(word in current_lower for word in forbidden_words)
-                    )
-                    
-                    # Check 2: Does it have an explicit date label?
-                    has_date_label = current_text.strip().startswith(('Date:', 'Dated:', 'DATE:', 'DATED:'))
-                    
-                    # REJECT if it doesn't meet either criteria
-                    if not is_pure_date and not has_date_label:
-                        logger.warning(f"⚠️  REJECTING DATE - Not in a date field!")
-                        logger.warning(f"    Text: '{current_text[:100]}'")
-                        logger.warning(f"    Length: {len(current_text)}, Pure date: {is_pure_date}, Has label: {has_date_label}")
-                        invalid_modifications.append(i)
-                        continue
-                
-                # Check if this modification is trying to replace "Company" in an invalid context
-                # SKIP validation for TEXT_INSERT - these are adding new clauses, not replacing Company
-                mod_type = mod.get('type', '')
-                if mod_type == 'TEXT_INSERT':
-                    # TEXT_INSERT modifications are adding new text, not replacing Company
-                    # Allow them (they might be retention carve-outs or other valid clauses)
-                    continue
-                
-                if 'Company' in current_text:
-                    # These are INVALID contexts where Company should NEVER be replaced
-                    invalid_contexts = [
-                        '(the "Company")',
-                        '(the \'Company\')',
-                        'the Company',
-                        'concerning the Company',
-                        'regarding the Company',
-                        'about the Company',
-                        'of the Company',
-                        'business (the',
-                        'machining business'
-                    ]
-                    is_invalid = any(invalid_ctx in current_text for invalid_ctx in invalid_contexts)
-                    # VALID contexts are signature blocks only
-                    valid_contexts = ['For: Company', 'For:\tCompany', 'For: \tCompany', 'Company (name to be provided upon execution)']
-                    is_valid = any(current_text.strip() == valid_ctx or current_text.strip().startswith(valid_ctx) for valid_ctx in valid_contexts)
-                    
-                    if is_invalid or (not is_valid and len(current_text) > 20):  # Longer text = likely body text, not signature
-                        logger.warning(f"⚠️  REJECTING INVALID 'Company' MODIFICATION: '{current_text[:100]}'")
-                        invalid_modifications.append(i)
+        except Exception as e:
+            logger.error(f"Error in AI analysis: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    def _normalize_firm_details(self, firm_details: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Map the frontend firm detail keys to the names the prompts and post-processing use"""
+        if not firm_details:
+            return firm_details
+        return {
+            backend_key: firm_details[frontend_key]
+            for frontend_key, backend_key in _FIRM_KEY_MAP.items()
+            if frontend_key in firm_details
+        }
+    
+    def _build_analysis_result(self, ai_response: str, document_text: str, custom_rules: List[Dict[str, Any]],
+                               firm_details: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Parse a raw model response, validate and post-process it into an analysis result"""
+        today_formatted = datetime.now().strftime("%B %d, %Y")  # "November 04, 2025" (current date)
+        logger.debug("AI Response: %s", ai_response)
+        logger.info(f"AI Response length: {len(ai_response)} characters")
+        modifications = self._parse_ai_response(ai_response)
+        logger.info(f"Parsed modifications: {len(modifications)}")
+        
+        # Validate that all rules resulted in modifications
+        if custom_rules and len(custom_rules) > len(modifications):
+            logger.warning("="*80)
+            logger.warning(f"⚠️  WARNING: Only {len(modifications)} modifications for {len(custom_rules)} rules!")
+            logger.warning("Expected at least one modification per rule.")
+            logger.warning("Rules sent:")
+            for idx, rule in enumerate(custom_rules, 1):
+                logger.warning(f"  {idx}. {rule.get('name', 'Unnamed')}: {rule.get('instruction', '')[:100]}")
+            logger.warning("Modifications received:")
+            for idx, mod in enumerate(modifications, 1):
+                logger.warning(f"  {idx}. {mod.get('type')} - {mod.get('reason', 'No reason')[:100]}")
+            logger.warning("="*80)
+        
+        # Post-process: Ensure firm details are used correctly
+        # (per-modification diagnostics are debug-only and skipped entirely unless enabled)
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug(f"POST-PROCESSING: Checking {len(modifications)} modifications for hardcoded values")
+            logger.debug(f"POST-PROCESSING: Firm details provided: {firm_details}")
+        
+        # Look up everything the fixes below need from the firm details and the
+        # document once, before the single pass over the modifications
+        by_match = title_match = date_match = None
+        hardcoded_map = {}
+        if firm_details:
+            signer_name = firm_details.get('signatory_name') or firm_details.get('signerName')
+            company_name = firm_details.get('firm_name') or firm_details.get('name')
+            title = firm_details.get('title') or firm_details.get('signerTitle')
+            # Fix any modifications that use hardcoded values instead of firm details
+            for hardcoded_values, actual_value in ((_HARDCODED_NAMES, signer_name),
+                                                   (_HARDCODED_COMPANIES, company_name),
+                                                   (_HARDCODED_TITLES, title)):
+                if actual_value:
+                    hardcoded_map.update(dict.fromkeys(hardcoded_values, actual_value))
+            
+            def fill_hardcoded(match):
+                return hardcoded_map.get(match.group(0), match.group(0))
+            
+            by_match = _BY_RE.search(document_text)
+            title_match = _TITLE_RE.search(document_text)
+            date_match = _DATE_LABEL_RE.search(document_text)
+        by_full_text = by_match.group(0) if by_match else None
+        title_full_text = title_match.group(0) if title_match else None
+        firm_name = firm_details.get('firm_name') if firm_details else None
+        
+        # One pass over the AI's modifications: drop the invalid ones, fix up the
+        # rest, and note which fields they already cover for the auto-fixes below
+        logger.debug("POST-PROCESSING: All modifications from AI:")
+        valid_modifications = []
+        has_dear_modification = has_by_modification = has_title_modification = False
+        has_for_modification = has_term_modification = False
+        for i, mod in enumerate(modifications):
+            if debug_enabled:
+                logger.debug(f"  Mod {i+1}: {mod.get('type')} - '{mod.get('current_text', 'N/A')[:50]}...' -> '{mod.get('new_text', 'N/A')[:50]}...'")
             
-            # Remove invalid modifications
-            if invalid_modifications:
-                logger.warning(f"Removing {len(invalid_modifications)} invalid Company replacements")
-                for idx in reversed(invalid_modifications):
-                    removed_mod = modifications.pop(idx)
-                    logger.warning(f"Removed: {removed_mod}")
+            # VALIDATION: Remove any modifications that incorrectly replace "Company" or dates in wrong contexts
+            if not self._is_valid_modification(mod):
+                logger.debug("Removed: %s", mod)
+                continue
+            valid_modifications.append(mod)
             
             if firm_details:
-                # Fix any modifications that use hardcoded values instead of firm details
-                hardcoded_names = ['John Bagge', 'Jane Doe']
-                hardcoded_companies = ['JMC Investment LLC', 'Welch Capital Partners']
-                hardcoded_titles = ['Vice President', 'President', 'CEO']
-                
-                for i, mod in enumerate(modifications):
-                    logger.warning(f"POST-PROCESSING Mod {i+1}: {mod}")
+                if debug_enabled:
+                    logger.debug(f"POST-PROCESSING Mod {len(valid_modifications)}: {mod}")
+                
+                # FIX: Expand signature fields to include underscores if AI didn't include them
+                current = mod.get('current_text', '').strip()
+                
+                # Check if this is a By:/Title:/Date: modification without underscores
+                if mod.get('type') == 'TEXT_REPLACE':
+                    # By: field expansion
+                    if current == 'By:' or (current.startswith('By:') and len(current) < 10):
+                        if by_match:
+                            by_full_text = by_match.group(0)
+                            logger.debug("  🔧 EXPANDING 'By:' → '%s' (added underscores)", by_full_text)
+                            mod['current_text'] = by_full_text
                     
-                    # FIX: Expand signature fields to include underscores if AI didn't include them
-                    current = mod.get('current_text', '').strip()
+                    # Title: field expansion
+                    elif current == 'Title:' or (current.startswith('Title:') and len(current) < 15 and '_' not in current):
+                        if title_match:
+                            title_full_text = title_match.group(0)
+                            logger.debug("  🔧 EXPANDING 'Title:' → '%s' (added underscores)", title_full_text)
+                            mod['current_text'] = title_full_text
                     
-                    # Check if this is a By:/Title:/Date: modification without underscores
-                    if mod.get('type') == 'TEXT_REPLACE':
-                        import re
-                        
-                        # By: field expansion
-                        if current == 'By:' or (current.startswith('By:') and len(current) < 10):
-                            by_pattern = r'By:[\t\s]+_+'
-                            by_matches = list(re.finditer(by_pattern, document_text))
-                            if by_matches:
-                                by_full_text = by_matches[0].group(0)
-                                logger.warning(f"  🔧 EXPANDING 'By:' → '{by_full_text}' (added underscores)")
-                                mod['current_text'] = by_full_text
-                        
-                        # Title: field expansion
-                        elif current == 'Title:' or (current.startswith('Title:') and len(current) < 15 and '_' not in current):
-                            title_pattern = r'Title:[\t\s]+_+'
-                            title_matches = list(re.finditer(title_pattern, document_text))
-                            if title_matches:
-                                title_full_text = title_matches[0].group(0)
-                                logger.warning(f"  🔧 EXPANDING 'Title:' → '{title_full_text}' (added underscores)")
-                                mod['current_text'] = title_full_text
-                        
-                        # Date: field expansion (if needed)
-                        elif current == 'Date:' or (current.startswith('Date:') and len(current) < 15 and '_' not in current):
-                            date_pattern = r'Date:[\t\s]+_+'
-                            date_matches = list(re.finditer(date_pattern, document_text))
-                            if date_matches:
-                                date_full_text = date_matches[0].group(0)
-                                logger.warning(f"  🔧 EXPANDING 'Date:' → '{date_full_text}' (added underscores)")
-                                mod['current_text'] = date_full_text
-                    
-                    # Replace hardcoded names with actual signer name
-                    signer_name = firm_details.get('signatory_name') or firm_details.get('signerName')
-                    if signer_name:
-                        for hardcoded in hardcoded_names:
-                            if 'new_text' in mod and hardcoded in mod['new_text']:
-                                logger.warning(f"Fixing hardcoded name in modification: '{mod['new_text']}'")
-                                mod['new_text'] = mod['new_text'].replace(hardcoded, signer_name)
-                                logger.warning(f"Fixed to: '{mod['new_text']}'")
-                    
-                    # Replace hardcoded companies with actual firm name  
-                    company_name = firm_details.get('firm_name') or firm_details.get('name')
-                    if company_name:
-                        for hardcoded in hardcoded_companies:
-                            if 'new_text' in mod and hardcoded in mod['new_text']:
-                                logger.warning(f"Fixing hardcoded company in modification: '{mod['new_text']}'")
-                                mod['new_text'] = mod['new_text'].replace(hardcoded, company_name)
-                                logger.warning(f"Fixed to: '{mod['new_text']}'")
-                    
-                    # Replace hardcoded titles with actual title
-                    title = firm_details.get('title') or firm_details.get('signerTitle')
-                    if title:
-                        for hardcoded in hardcoded_titles:
-                            if 'new_text' in mod and hardcoded in mod['new_text']:
-                                logger.warning(f"Fixing hardcoded title in modification: '{mod['new_text']}'")
-                                mod['new_text'] = mod['new_text'].replace(hardcoded, title)
-                                logger.warning(f"Fixed to: '{mod['new_text']}'")
-                
-                # Ensure "Dear NAME:" is replaced if it exists
-                if firm_details.get('signatory_name') and 'Dear NAME:' in document_text:
-                    has_dear_modification = any(
-                        mod.get('current_text', '').strip() == 'Dear NAME:' 
-                        for mod in modifications
-                    )
-                    if not has_dear_modification:
-                        logger.warning(f"AI didn't generate 'Dear NAME:' modification - adding it manually")
-                        modifications.insert(0, {
+                    # Date: field expansion (if needed)
+                    elif current == 'Date:' or (current.startswith('Date:') and len(current) < 15 and '_' not in current):
+                        if date_match:
+                            date_full_text = date_match.group(0)
+                            logger.debug("  🔧 EXPANDING 'Date:' → '%s' (added underscores)", date_full_text)
+                            mod['current_text'] = date_full_text
+                
+                # Replace hardcoded names, companies and titles with the firm's values
+                # in one substitution (longest alternatives first, so "Vice President"
+                # wins over "President"). Most texts contain none of them, so a single
+                # search decides whether the substitution is needed at all
+                new_text_val = mod.get('new_text')
+                if hardcoded_map and new_text_val and _HARDCODED_RE.search(new_text_val):
+                    fixed_text = _HARDCODED_RE.sub(fill_hardcoded, new_text_val)
+                    if fixed_text != new_text_val:
+                        logger.debug("Fixing hardcoded values in modification: '%s'", new_text_val)
+                        mod['new_text'] = fixed_text
+                        logger.debug("Fixed to: '%s'", fixed_text)
+            
+            current_text = mod.get('current_text', '')
+            current_lower = current_text.lower()
+            if current_text.strip() == 'Dear NAME:':
+                has_dear_modification = True
+            if by_full_text and (by_full_text in current_text or ('By:' in current_text and '_' in current_text)):
+                has_by_modification = True
+            if title_full_text and (title_full_text in current_text or ('Title:' in current_text and '_' in current_text)):
+                has_title_modification = True
+            if firm_name and 'For:' in current_text and 'Company' in current_text and firm_name in mod.get('new_text', ''):
+                has_for_modification = True
+            if 'three years' in current_lower or 'three (3) years' in current_lower:
+                has_term_modification = True
+        
+        if len(valid_modifications) < len(modifications):
+            logger.warning(f"Removed {len(modifications) - len(valid_modifications)} invalid Company replacements")
+        modifications = valid_modifications
+        
+        if firm_details:
+            # Ensure "Dear NAME:" is replaced if it exists
+            if firm_details.get('signatory_name') and 'Dear NAME:' in document_text:
+                if not has_dear_modification:
+                    logger.warning(f"AI didn't generate 'Dear NAME:' modification - adding it manually")
+                    modifications.insert(0, {
+                        "type": "TEXT_REPLACE",
+                        "section": "recipient",
+                        "current_text": "Dear NAME:",
+                        "new_text": f"Dear {firm_details['signatory_name']}:",
+                        "reason": "Replace recipient name placeholder with signer name",
+                        "location_hint": "Salutation"
+                    })
+            
+            # Ensure "By:" field is filled - find FULL text with underscores
+            if firm_details.get('signatory_name'):
+                # "By:" followed by tabs/spaces and underscores, with ALL the underscores (don't rstrip!)
+                if by_full_text:
+                    if not has_by_modification:
+                        logger.warning(f"Auto-fix: Replacing full By line including underscores")
+                        logger.debug("  Current: '%s'", by_full_text)
+                        logger.debug("  New: 'By: %s'", firm_details['signatory_name'])
+                        modifications.append({
                             "type": "TEXT_REPLACE",
-                            "section": "recipient",
-                            "current_text": "Dear NAME:",
-                            "new_text": f"Dear {firm_details['signatory_name']}:",
-                            "reason": "Replace recipient name placeholder with signer name",
-                            "location_hint": "Salutation"
+                            "section": "signature_block",
+                            "current_text": by_full_text,
+                            "new_text": f"By: {firm_details['signatory_name']}",
+                            "reason": "Fill in signature block with signer name",
+                            "location_hint": "Signature block"
                         })
-                
-                # Ensure "By:" field is filled - find FULL text with underscores
-                if firm_details.get('signatory_name'):
-                    import re
-                    # Match "By:" followed by tabs/spaces and underscores
-                    by_pattern = r'By:[\t\s]+_+'
-                    by_matches = list(re.finditer(by_pattern, document_text))
-                    if by_matches:
-                        # Get the FULL matched text including ALL underscores (don't rstrip!)
-                        by_full_text = by_matches[0].group(0)
-                        has_by_modification = any(
-                            by_full_text in mod.get('current_text', '') or
-                            ('By:' in mod.get('current_text', '') and '_' in mod.get('current_text', ''))
-                            for mod in modifications
-                        )
-                        if not has_by_modification:
-                            logger.warning(f"Auto-fix: Replacing full By line including underscores")
-                            logger.warning(f"  Current: '{by_full_text}'")
-                            logger.warning(f"  New: 'By: {firm_details['signatory_name']}'")
-                            modifications.append({
-                                "type": "TEXT_REPLACE",
-                                "section": "signature_block",
-                                "current_text": by_full_text,
-                                "new_text": f"By: {firm_details['signatory_name']}",
-                                "reason": "Fill in signature block with signer name",
-                                "location_hint": "Signature block"
-                            })
-                
-                # Ensure "Title:" field is filled - find FULL text with underscores
-                if firm_details.get('title'):
-                    import re
-                    # Match "Title:" followed by tabs/spaces and underscores
-                    title_pattern = r'Title:[\t\s]+_+'
-                    title_matches = list(re.finditer(title_pattern, document_text))
-                    if title_matches:
-                        # Get the FULL matched text including ALL underscores (don't rstrip!)
-                        title_full_text = title_matches[0].group(0)
-                        has_title_modification = any(
-                            title_full_text in mod.get('current_text', '') or
-                            ('Title:' in mod.get('current_text', '') and '_' in mod.get('current_text', ''))
-                            for mod in modifications
-                        )
-                        if not has_title_modification:
-                            logger.warning(f"Auto-fix: Replacing full Title line including underscores")
-                            logger.warning(f"  Current: '{title_full_text}'")
-                            logger.warning(f"  New: 'Title: {firm_details['title']}'")
-                            modifications.append({
-                                "type": "TEXT_REPLACE",
-                                "section": "signature_block",
-                                "current_text": title_full_text,
-                                "new_text": f"Title: {firm_details['title']}",
-                                "reason": "Fill in signature block with title",
-                                "location_hint": "Signature block"
-                            })
-                
-                # Ensure "For: Company" field is filled if it exists
-                if firm_details.get('firm_name') and ('For: Company' in document_text or 'For:\tCompany' in document_text or 'For: \tCompany' in document_text):
-                    has_for_modification = any(
-                        'For:' in mod.get('current_text', '') and 'Company' in mod.get('current_text', '') and firm_details['firm_name'] in mod.get('new_text', '')
-                        for mod in modifications
-                    )
-                    if not has_for_modification:
-                        logger.warning(f"AI didn't generate 'For: Company' modification - adding it manually")
+            
+            # Ensure "Title:" field is filled - find FULL text with underscores
+            if firm_details.get('title'):
+                # "Title:" followed by tabs/spaces and underscores, with ALL the underscores (don't rstrip!)
+                if title_full_text:
+                    if not has_title_modification:
+                        logger.warning(f"Auto-fix: Replacing full Title line including underscores")
+                        logger.debug("  Current: '%s'", title_full_text)
+                        logger.debug("  New: 'Title: %s'", firm_details['title'])
                         modifications.append({
                             "type": "TEXT_REPLACE",
                             "section": "signature_block",
-                            "current_text": "For: Company",
-                            "new_text": f"For: {firm_details['firm_name']}",
-                            "reason": "Fill in signature block with firm name",
+                            "current_text": title_full_text,
+                            "new_text": f"Title: {firm_details['title']}",
+                            "reason": "Fill in signature block with title",
                             "location_hint": "Signature block"
                         })
             
-            # Extract target duration from custom rules
-            import re
-            target_years = 2  # Default fallback
-            term_rule_instruction = ""
-            
-            for rule in custom_rules:
-                rule_name = rule.get('name', '').lower()
-                if 'duration' in rule_name or 'term' in rule_name or 'confidentiality' in rule_name:
-                    term_rule_instruction = rule.get('instruction', '')
-                    year_match = re.search(r'(\d+)\s*(?:\(\d+\))?\s*years?', term_rule_instruction, re.IGNORECASE)
-                    if year_match:
-                        target_years = int(year_match.group(1))
-                        logger.info(f"📅 Extracted target duration from custom rule: {target_years} years")
-                        break
-            
-            target_years_text = f"{target_years} ({target_years}) years"
-            target_years_simple = f"{target_years} years"
-            
-            # Check if document already has the target duration - if so, skip all modifications
-            target_patterns_in_doc = [
-                target_years_text.lower(),
-                target_years_simple.lower(),
-                f"{target_years} ({target_years}) year".lower(),  # singular
-                f"{target_years} year".lower()  # singular
+            # Ensure "For: Company" field is filled if it exists
+            if firm_details.get('firm_name') and ('For: Company' in document_text or 'For:\tCompany' in document_text or 'For: \tCompany' in document_text):
+                if not has_for_modification:
+                    logger.warning(f"AI didn't generate 'For: Company' modification - adding it manually")
+                    modifications.append({
+                        "type": "TEXT_REPLACE",
+                        "section": "signature_block",
+                        "current_text": "For: Company",
+                        "new_text": f"For: {firm_details['firm_name']}",
+                        "reason": "Fill in signature block with firm name",
+                        "location_hint": "Signature block"
+                    })
+        
+        # Extract target duration from custom rules
+        target_years = 2  # Default fallback
+        term_rule_instruction = ""
+        
+        for rule in custom_rules:
+            rule_name = rule.get('name', '').lower()
+            if 'duration' in rule_name or 'term' in rule_name or 'confidentiality' in rule_name:
+                term_rule_instruction = rule.get('instruction', '')
+                year_match = _TERM_YEARS_RE.search(term_rule_instruction)
+                if year_match:
+                    target_years = int(year_match.group(1))
+                    logger.info(f"📅 Extracted target duration from custom rule: {target_years} years")
+                    break
+        
+        target_years_text = f"{target_years} ({target_years}) years"
+        target_years_simple = f"{target_years} years"
+        
+        # Check if document already has the target duration - if so, skip all modifications
+        # (lowercase the document once for all the checks below)
+        doc_lower = document_text.lower()
+        doc_already_has_target = any(
+            pattern in doc_lower 
+            for pattern in _target_patterns(target_years)
+        )
+        
+        if doc_already_has_target:
+            logger.info(f"✅ Document already contains target duration '{target_years_text}' - skipping all term modifications")
+            # Remove any existing term modifications that would change to the target (already correct)
+            target_text_lower = target_years_text.lower()
+            target_simple_lower = target_years_simple.lower()
+            modifications = [
+                mod for mod in modifications 
+                if not (mod.get('section') == 'term' and 
+                       (target_text_lower in mod.get('new_text', '').lower() or
+                        target_simple_lower in mod.get('new_text', '').lower()))
             ]
-            
-            # Also check word forms if target is 1-10
-            word_to_num = {
-                1: 'one', 2: 'two', 3: 'three', 4: 'four', 5: 'five',
-                6: 'six', 7: 'seven', 8: 'eight', 9: 'nine', 10: 'ten'
-            }
-            if target_years in word_to_num:
-                word = word_to_num[target_years]
-                target_patterns_in_doc.extend([
-                    f"{word} ({target_years}) years".lower(),
-                    f"{word} years".lower()
-                ])
-            
-            # Check if any target pattern already exists in document
-            doc_already_has_target = any(
-                pattern in document_text.lower() 
-                for pattern in target_patterns_in_doc
-            )
-            
-            if doc_already_has_target:
-                logger.info(f"✅ Document already contains target duration '{target_years_text}' - skipping all term modifications")
-                # Remove any existing term modifications that would change to the target (already correct)
-                modifications = [
-                    mod for mod in modifications 
-                    if not (mod.get('section') == 'term' and 
-                           (target_years_text.lower() in mod.get('new_text', '').lower() or
-                            target_years_simple.lower() in mod.get('new_text', '').lower()))
-                ]
-            else:
-                # Ensure "three years" is changed to target duration if it exists
-                if 'three years' in document_text.lower():
-                    has_term_modification = any(
-                        'three years' in mod.get('current_text', '').lower() or 
-                        'three (3) years' in mod.get('current_text', '').lower()
-                        for mod in modifications
-                    )
-                    if not has_term_modification:
-                        logger.warning(f"AI didn't generate 'three years' modification - adding it manually with target: {target_years} years")
-                        # Try to find the exact text in the document
-                        if 'three years' in document_text:
-                            modifications.append({
-                                "type": "TEXT_REPLACE",
-                                "section": "term",
-                                "current_text": "three years",
-                                "new_text": target_years_text,
-                                "reason": term_rule_instruction or f"Change confidentiality term to {target_years} years",
-                                "location_hint": "Section 13 - Term"
-                            })
-                        elif 'three (3) years' in document_text:
-                            modifications.append({
-                                "type": "TEXT_REPLACE",
-                                "section": "term",
-                                "current_text": "three (3) years",
-                                "new_text": target_years_text,
-                                "reason": term_rule_instruction or f"Change confidentiality term to {target_years} years",
-                                "location_hint": "Section 13 - Term"
-                            })
-            
-            # Auto-fix date placeholders with today's date - be more specific to avoid over-redlining
-            import re
-            from datetime import datetime
-            
-            # Common date patterns - be more specific to avoid over-redlining
-            # More flexible date pattern recognition - matches various date placeholder formats
-            today = datetime.now()
-            today_formatted = today.strftime("%B %d, %Y")  # "November 04, 2025" (current date)
-            
-            # Auto-fix header date specifically (check for any month pattern)
-            header_date_pattern = r'([A-Z][a-z]+ _{2,}, \d{4})'
-            header_date_matches = re.findall(header_date_pattern, document_text)
-            if header_date_matches:
-                for header_date_text in header_date_matches:
-                    has_header_date_modification = any(
-                        header_date_text in mod.get('current_text', '')
-                        for mod in modifications
-                    )
-                    if not has_header_date_modification:
-                        logger.warning(f"AI didn't generate header date modification for '{header_date_text}' - adding with today's date")
-                        modifications.insert(0, {
+        else:
+            # Ensure "three years" is changed to target duration if it exists
+            if 'three years' in doc_lower:
+                if not has_term_modification:
+                    logger.warning(f"AI didn't generate 'three years' modification - adding it manually with target: {target_years} years")
+                    # Try to find the exact text in the document
+                    if 'three years' in document_text:
+                        modifications.append({
                             "type": "TEXT_REPLACE",
-                            "section": "header",
-                            "current_text": header_date_text,
-                            "new_text": today_formatted,
-                            "reason": "Fill in header date with today's date",
-                            "location_hint": "Document header"
+                            "section": "term",
+                            "current_text": "three years",
+                            "new_text": target_years_text,
+                            "reason": term_rule_instruction or f"Change confidentiality term to {target_years} years",
+                            "location_hint": "Section 13 - Term"
                         })
-            
-            # Flexible date patterns - using regex to match variations
-            flexible_date_patterns = [
-                # Month __, Year patterns (any number of underscores)
-                (r'[A-Za-z]+ _{2,}, \d{4}', today_formatted),  # "October __, 2025" or "October ___, 2025"
-                # Date: _____ patterns
-                (r'Date:\s*_+', f"Date: {today_formatted}"),
-                # Dated: _____ patterns
-                (r'Dated:\s*_+', f"Dated: {today_formatted}"),
-                # [DATE] or [date] patterns
-                (r'\[DATE\]', today_formatted),
-                (r'\[date\]', today_formatted),
-                (r'\(DATE\)', today_formatted),
-                (r'\(date\)', today_formatted),
-                # [Insert date] or [Enter date] patterns
-                (r'\[Insert date\]', today_formatted),
-                (r'\[Enter date\]', today_formatted),
-                (r'\[insert date\]', today_formatted),
-                # Month blank, Year - flexible blank matching
-                (r'[A-Za-z]+\s+_{2,}\s*,\s*\d{4}', today_formatted),  # Handles spacing variations
-            ]
-            
-            # Search for date patterns in document
-            for pattern, replacement_text in flexible_date_patterns:
-                matches = re.finditer(pattern, document_text, re.IGNORECASE | re.MULTILINE)
-                for match_obj in matches:
-                    match_text = match_obj.group(0)
-                    # Check if AI already handled this date pattern
-                    has_date_modification = any(
-                        match_text.lower() in mod.get('current_text', '').lower() or
-                        re.sub(r'\s+', ' ', match_text).lower() in re.sub(r'\s+', ' ', mod.get('current_text', '')).lower()
-                        for mod in modifications
-                    )
-                    if not has_date_modification:
-                        logger.warning(f"AI didn't generate date modification for pattern '{match_text}' - adding auto-fix: '{match_text}' -> '{replacement_text}'")
+                    elif 'three (3) years' in document_text:
                         modifications.append({
                             "type": "TEXT_REPLACE",
-                            "section": "date",
-                            "current_text": match_text,
-                            "new_text": replacement_text,
-                            "reason": "Insert today's date using flexible pattern recognition",
-                            "location_hint": "Date field"
+                            "section": "term",
+                            "current_text": "three (3) years",
+                            "new_text": target_years_text,
+                            "reason": term_rule_instruction or f"Change confidentiality term to {target_years} years",
+                            "location_hint": "Section 13 - Term"
                         })
+        
+        # Auto-fix date placeholders with today's date - be more specific to avoid over-redlining
+        # More flexible date pattern recognition - matches various date placeholder formats
+        # Auto-fix header date specifically (check for any month pattern)
+        # The current_text of every modification so far, joined into one string so
+        # "is this date inside any of them" is a single substring search. The NUL
+        # separator can't occur in a date match, so a hit never spans two texts.
+        # Kept in step as the auto-fixes below add modifications
+        current_texts = [mod.get('current_text', '') for mod in modifications]
+        covered_text = '\0'.join(current_texts)
+        header_date_matches = _HEADER_DATE_RE.findall(document_text)
+        if header_date_matches:
+            for header_date_text in header_date_matches:
+                has_header_date_modification = header_date_text in covered_text
+                if not has_header_date_modification:
+                    logger.warning(f"AI didn't generate header date modification for '{header_date_text}' - adding with today's date")
+                    modifications.insert(0, {
+                        "type": "TEXT_REPLACE",
+                        "section": "header",
+                        "current_text": header_date_text,
+                        "new_text": today_formatted,
+                        "reason": "Fill in header date with today's date",
+                        "location_hint": "Document header"
+                    })
+                    current_texts.append(header_date_text)
+                    covered_text += '\0' + header_date_text
+        
+        # Search for date patterns in document
+        # One pass with the fused pattern, then handle the matches pattern by
+        # pattern (document order within each) - the order the auto-fixes were
+        # added in when every pattern ran its own scan
+        date_matches = sorted(
+            (int(match_obj.lastgroup[1:]), match_obj.start(), match_obj.group(0))
+            for match_obj in _FLEX_DATE_RE.finditer(document_text)
+        )
+        # Lowercased and whitespace-collapsed forms, normalized once rather than per match
+        covered_lower = '\0'.join(text.lower() for text in current_texts)
+        covered_collapsed = '\0'.join(_WS_RE.sub(' ', text).lower() for text in current_texts)
+        for pattern_idx, _, match_text in date_matches:
+            replacement_text = _FLEX_DATE_PATTERNS[pattern_idx][1] + today_formatted
+            # Check if AI already handled this date pattern
+            match_lower = match_text.lower()
+            match_collapsed = _WS_RE.sub(' ', match_text).lower()
+            has_date_modification = match_lower in covered_lower or match_collapsed in covered_collapsed
+            if not has_date_modification:
+                logger.warning(f"AI didn't generate date modification for pattern '{match_text}' - adding auto-fix: '{match_text}' -> '{replacement_text}'")
+                modifications.append({
+                    "type": "TEXT_REPLACE",
+                    "section": "date",
+                    "current_text": match_text,
+                    "new_text": replacement_text,
+                    "reason": "Insert today's date using flexible pattern recognition",
+                    "location_hint": "Date field"
+                })
+                covered_lower += '\0' + match_lower
+                covered_collapsed += '\0' + match_collapsed
+        
+        return {
+            'success': True,
+            'redlining_instructions': {
+                'modifications': modifications,
+                'summary': f"AI analysis generated {len(modifications)} modifications",
+                'risk_assessment': "AI-generated risk assessment"
+            },
+            'ai_analysis': ai_response
+        }
+    
+    def _is_valid_modification(self, mod: Dict[str, Any]) -> bool:
+        """Reject date and "Company" replacements the AI made in the wrong context"""
+        current_text = mod.get('current_text', '')
+        new_text_val = mod.get('new_text', '')
+        stripped_text = current_text.strip()
+        
+        # Check for date replacements in wrong locations (e.g., document title)
+        # Dates should ONLY be in dedicated date fields, nowhere else!
+        if _MONTH_RE.search(new_text_val):
+            # This is a date replacement - STRICT validation
+            
+            # ONLY ALLOW if current_text is:
+            # 1. Just a date pattern (e.g., "September __, 2025" with nothing else)
+            # 2. A date field label (e.g., "Date: ___")
+            
+            # Check 1: Is it JUST a date pattern with minimal text?
+            # (cheapest test first - the comma count and word scan only run on short text)
+            is_pure_date = (
+                len(stripped_text) < 25 and  # Very short text
+                stripped_text.count(',') == 1 and  # Has one comma (date format)
+                not _DATE_FORBIDDEN_RE.search(stripped_text.lower())
+            )
             
-            return {
-                'success': True,
-                'redlining_instructions': {
-                    'modifications': modifications,
-                    'summary': f"AI analysis generated {len(modifications)} modifications",
-                    'risk_assessment': "AI-generated risk assessment"
-                },
-                'ai_analysis': ai_response
-            }
+            # Check 2: Does it have an explicit date label?
+            has_date_label = stripped_text.startswith(('Date:', 'Dated:', 'DATE:', 'DATED:'))
             
-        except Exception as e:
-            logger.error(f"Error in AI analysis: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            # REJECT if it doesn't meet either criteria
+            if not is_pure_date and not has_date_label:
+                logger.warning(f"⚠️  REJECTING DATE - Not in a date field!")
+                logger.debug("    Text: '%s'", current_text[:100])
+                logger.debug("    Length: %d, Pure date: %s, Has label: %s", len(current_text), is_pure_date, has_date_label)
+                return False
+        
+        # Check if this modification is trying to replace "Company" in an invalid context
+        # SKIP validation for TEXT_INSERT - these are adding new clauses, not replacing Company
+        mod_type = mod.get('type', '')
+        if mod_type == 'TEXT_INSERT':
+            # TEXT_INSERT modifications are adding new text, not replacing Company
+            # Allow them (they might be retention carve-outs or other valid clauses)
+            return True
+        
+        if 'Company' in current_text:
+            # These are INVALID contexts where Company should NEVER be replaced
+            is_invalid = _INVALID_COMPANY_RE.search(current_text) is not None
+            # VALID contexts are signature blocks only (startswith also covers an exact match)
+            is_valid = stripped_text.startswith(_VALID_COMPANY_CONTEXTS)
+            
+            if is_invalid or (not is_valid and len(current_text) > 20):  # Longer text = likely body text, not signature
+                logger.warning(f"⚠️  REJECTING INVALID 'Company' MODIFICATION: '{current_text[:100]}'")
+                return False
+        
+        return True
+    
+    def analyze_documents_batch(self, documents: List[str], custom_rules: List[Dict[str, Any]],
+                                firm_details: Dict[str, Any] = None, max_concurrent: int = 4) -> List[Dict[str, Any]]:
+        """Analyze several documents concurrently, returning results in the same order"""
+        # The API call is network-bound, so threads overlap the waiting; the
+        # pool size caps how many requests are in flight against the rate limit
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrent, len(documents)))) as pool:
+            return list(pool.map(lambda text: self.analyze_document(text, custom_rules, firm_details), documents))
+    
+    def analyze_documents_multiplex(self, documents: List[str], custom_rules: List[Dict[str, Any]],
+                                    firm_details: Dict[str, Any] = None, max_prompt_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Analyze several small documents per API request, returning results in the same order.
+        Requests are sized to the model's context window unless max_prompt_tokens caps the prompt"""
+        # Packing documents into one request trades a longer prompt for fewer
+        # requests - worthwhile when the account runs out of RPM before TPM
+        if not self.client:
+            return self.analyze_documents_batch(documents, custom_rules, firm_details)
+        
+        normalized = self._normalize_firm_details(firm_details)
+        system_prompt = self._build_system_prompt(custom_rules)
+        system_prompt += """
+
+MULTIPLE DOCUMENTS: The user message contains several documents, each starting with "## DOC <id>" and ending with "---".
+Apply the rules to each document independently and return ONE JSON object of the form:
+{"documents": {"<id>": {"modifications": [...]}, ...}}
+Include every document id, with an empty modifications list if a document needs no changes."""
+        
+        # Group documents so each request - the prompt plus every document's completion
+        # budget - fits the model's context window. Tokens are estimated at ~4 characters
+        # each, which is close enough for English
+        context_tokens = _context_window(self.model)
+        if max_prompt_tokens is None:
+            max_prompt_tokens = context_tokens
+        previews = [self._document_preview(text) for text in documents]
+        completion_budgets = [_completion_budget(text, custom_rules) for text in documents]
+        fixed_tokens = (len(system_prompt) + len(self._build_user_prompt('', custom_rules, normalized, document_preview=''))) // 4
+        groups = []
+        group_prompt_tokens = group_completion_tokens = 0
+        for idx, preview in enumerate(previews):
+            preview_tokens = len(preview) // 4
+            prompt_tokens = fixed_tokens + group_prompt_tokens + preview_tokens
+            if (groups and prompt_tokens <= max_prompt_tokens
+                    and prompt_tokens + group_completion_tokens + completion_budgets[idx] <= context_tokens):
+                groups[-1].append(idx)
+                group_prompt_tokens += preview_tokens
+                group_completion_tokens += completion_budgets[idx]
+            else:
+                groups.append([idx])
+                group_prompt_tokens = preview_tokens
+                group_completion_tokens = completion_budgets[idx]
+        
+        results = [None] * len(documents)
+        for group in groups:
+            if len(group) == 1:
+                # Nothing to share a request with - the single-document path is cheaper
+                results[group[0]] = self.analyze_document(documents[group[0]], custom_rules, firm_details)
+                continue
+            combined = '\n'.join(f"## DOC {idx}\n{previews[idx]}\n---" for idx in group)
+            try:
+                user_prompt = self._build_user_prompt('\n'.join(documents[idx] for idx in group), custom_rules, normalized,
+                                                      document_preview=combined)
+                # Room for every document's answer; the grouping keeps this within the context
+                response = self._create_completion([
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ], max_tokens=sum(completion_budgets[idx] for idx in group))
+                choice = response.choices[0]
+                if choice.finish_reason == 'length':
+                    logger.warning(f"Multiplexed response for {len(group)} documents was cut off - keeping its complete entries")
+                per_document = self._parse_multiplex_response(choice.message.content)
+            except Exception as e:
+                logger.warning(f"Multiplexed analysis failed ({str(e)}), analyzing {len(group)} documents one by one")
+                per_document = {}
+            
+            for idx in group:
+                entry = per_document.get(str(idx))
+                if entry is None:
+                    # Missing from the combined answer - ask about this document alone
+                    results[idx] = self.analyze_document(documents[idx], custom_rules, firm_details)
+                    continue
+                if isinstance(entry, list):
+                    entry = {'modifications': entry}
+                try:
+                    results[idx] = self._build_analysis_result(json.dumps(entry), documents[idx], custom_rules, normalized)
+                except Exception as e:
+                    logger.error(f"Error in AI analysis: {str(e)}")
+                    results[idx] = {'success': False, 'error': str(e)}
+        return results
+    
+    def _parse_multiplex_response(self, ai_response: str) -> Dict[str, Any]:
+        """Extract the per-document entries from a multiplexed response. From a response that
+        doesn't decode (e.g. one cut off at max_tokens) every complete entry is still kept"""
+        start = ai_response.find('{')
+        end = ai_response.rfind('}') + 1
+        if start == -1 or end <= start:
+            logger.warning("Could not find JSON in multiplexed AI response")
+            return {}
+        try:
+            # strict=False lets literal tabs/newlines inside strings through
+            parsed = json.loads(ai_response[start:end], strict=False)
+        except ValueError:
+            return self._parse_partial_multiplex_response(ai_response)
+        documents = parsed.get('documents', {}) if isinstance(parsed, dict) else {}
+        return {str(key): value for key, value in documents.items()}
+    
+    def _parse_partial_multiplex_response(self, ai_response: str) -> Dict[str, Any]:
+        """Decode the "documents" entries of a multiplexed response one by one, up to the first broken one"""
+        match = _MULTIPLEX_DOCUMENTS_RE.search(ai_response)
+        if not match:
+            logger.warning("Could not find document entries in multiplexed AI response")
+            return {}
+        entries = {}
+        pos = match.end()
+        while True:
+            entry = _MULTIPLEX_ENTRY_RE.match(ai_response, pos)
+            if not entry:
+                break
+            try:
+                entries[entry.group(1)], pos = _LENIENT_JSON_DECODER.raw_decode(ai_response, entry.end())
+            except json.JSONDecodeError:
+                break
+        logger.warning(f"Multiplexed AI response was incomplete - kept {len(entries)} complete document entries")
+        return entries
+    
+    def _create_completion(self, messages: List[Dict[str, str]], stream: bool = False,
+                           max_tokens: int = _MAX_COMPLETION_TOKENS):
+        """Call the chat completions API, retrying transient failures with exponential backoff.
+        A streamed call returns (response text, finish reason)"""
+        for attempt in range(_API_MAX_ATTEMPTS):
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.1,  # Low temperature for consistent legal work
+                    max_tokens=max_tokens,  # At most 3000 to fit within GPT-4's 8192 token limit (prompt ~5000 tokens + response 3000 = 8000 total)
+                    stream=stream,
+                    **_json_mode_options(self.model)
+                )
+                if stream:
+                    # Read the whole stream inside the retry loop so a dropped
+                    # connection mid-response is retried like any other
+                    return self._collect_stream(response)
+                return response
+            except _TRANSIENT_API_ERRORS as api_error:
+                if attempt == _API_MAX_ATTEMPTS - 1:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"OpenAI API call failed ({type(api_error).__name__}), retrying in {delay}s")
+                time.sleep(delay)
+    
+    def _collect_stream(self, stream) -> Tuple[str, Optional[str]]:
+        """Join the content deltas of a streamed completion into the response text, returned
+        with the completion's finish reason"""
+        parts = []
+        finish_reason = None
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta.content:
+                parts.append(choice.delta.content)
+            finish_reason = choice.finish_reason or finish_reason
+        if finish_reason == 'length':
+            logger.warning("OpenAI response hit max_tokens - it is probably truncated")
+        return ''.join(parts), finish_reason
     
     def _mock_analysis(self, document_text: str, custom_rules: List[Dict[str, Any]], firm_details: Dict[str, Any] = None) -> Dict[str, Any]:
         """Provide mock analysis for development/testing"""
         logger.info("Running mock AI analysis")
-        logger.info(f"Document text length: {len(document_text)} characters")
-        logger.info(f"Number of custom rules: {len(custom_rules)}")
+        logger.info("Document text length: %d characters", len(document_text))
+        logger.info("Number of custom rules: %d", len(custom_rules))
         
         # Create realistic mock redlining instructions based on custom rules
         mock_modifications = []
         
-        # Apply firm details first if provided
-        if firm_details:
-            logger.warning(f"Applying firm details: {firm_details}")
-            logger.warning(f"Firm details keys: {list(firm_details.keys())}")
-            if 'title' in firm_details:
-                logger.warning(f"Title from firm details: '{firm_details['title']}'")
-            else:
-                logger.warning("No 'title' key in firm details")
-        else:
-            logger.warning("No firm details provided to mock analysis")
+        # Every check below is a literal substring test against the document, and
+        # several branches share patterns - remember each answer so a pattern scans
+        # the text once
+        found_in = _SubstringCache(document_text)
         
-        # Check if title field exists in document
-        if 'Title:' in document_text:
-            logger.warning("Found 'Title:' in document text")
-            if 'Title: \t_______________________________' in document_text:
-                logger.warning("Found 'Title: \t_______________________________' pattern in document")
+        # Diagnostics only - the title itself is logged where it is applied below
+        if logger.isEnabledFor(logging.DEBUG):
+            if firm_details:
+                logger.debug("Applying firm details: %s", firm_details)
             else:
-                logger.warning("'Title: \t_______________________________' pattern not found in document")
-        else:
-            logger.warning("'Title:' not found in document text")
+                logger.debug("No firm details provided to mock analysis")
+            logger.debug("'Title:' in document text: %s", found_in['Title:'])
         
         # Look for company name patterns in the document
-        company_patterns = [
-            "Company (name to be provided upon execution)",
-            "For: Company (name to be provided upon execution)",
-            "For: Company",
-            "Company"
-        ]
-        
         if firm_details and 'firm_name' in firm_details:
-            for pattern in company_patterns:
-                if pattern in document_text:
-                    if pattern.startswith("For:"):
-                        new_text = pattern.replace("Company", firm_details['firm_name'])
-                    else:
-                        new_text = f"For: {firm_details['firm_name']}"
-                    
-                    mock_modifications.append({
-                        "type": "TEXT_REPLACE",
-                        "section": "parties",
-                        "current_text": pattern,
-                        "new_text": new_text,
-                        "reason": "Replace company placeholder with actual firm name",
-                        "location_hint": "Parties section"
-                    })
-                    logger.info(f"Found company pattern: '{pattern}' -> '{new_text}'")
-                    break
+            firm_name = firm_details['firm_name']
+            pattern = _first_present(found_in, _PARTY_COMPANY_PATTERNS, "Company")
+            if pattern:
+                new_text = _company_replacement(pattern, firm_name)
+                
+                mock_modifications.append({
+                    "type": "TEXT_REPLACE",
+                    "section": "parties",
+                    "current_text": pattern,
+                    "new_text": new_text,
+                    "reason": "Replace company placeholder with actual firm name",
+                    "location_hint": "Parties section"
+                })
+                logger.debug("Found company pattern: '%s' -> '%s'", pattern, new_text)
             else:
                 # If no patterns found, add a generic company replacement
                 logger.info("No company patterns found, adding generic company replacement")
@@ -635,14 +1708,14 @@ class AIRedliningService:
                     "type": "TEXT_REPLACE",
                     "section": "parties",
                     "current_text": "Company",
-                    "new_text": f"For: {firm_details['firm_name']}",
+                    "new_text": f"For: {firm_name}",
                     "reason": "Replace company placeholder with actual firm name",
                     "location_hint": "Parties section"
                 })
             
             # Look for signature patterns
             if 'signatory_name' in firm_details:
-                if 'By:' in document_text and firm_details['signatory_name'] not in document_text:
+                if found_in['By:'] and not found_in[firm_details['signatory_name']]:
                     mock_modifications.append({
                         "type": "TEXT_REPLACE",
                         "section": "signatures",
@@ -651,408 +1724,41 @@ class AIRedliningService:
                         "reason": "Replace signer placeholder with actual name",
                         "location_hint": "Signature block"
                     })
-                    logger.info(f"Added signer replacement: 'By:' -> 'By: {firm_details['signatory_name']}'")
+                    logger.debug("Added signer replacement: 'By:' -> 'By: %s'", firm_details['signatory_name'])
             
             if 'title' in firm_details:
-                logger.warning(f"Processing title field: '{firm_details['title']}'")
-                # Look for Title: with various formatting patterns
-                title_patterns = [
-                    "Title: \t_______________________________",
-                    "Title:\t_______________________________",
-                    "Title:_______________________________",
-                    "Title:",
-                    "Title: \t",
-                    "Title:\t"
-                ]
-                
-                for title_pattern in title_patterns:
-                    logger.warning(f"Checking title pattern: '{title_pattern}'")
-                    if title_pattern in document_text:
-                        logger.warning(f"Found title pattern '{title_pattern}' in document")
-                        if firm_details['title'] not in document_text:
-                            logger.warning(f"Title '{firm_details['title']}' not in document, adding replacement")
-                            mock_modifications.append({
-                                "type": "TEXT_REPLACE",
-                                "section": "signatures",
-                                "current_text": title_pattern,
-                                "new_text": f"Title: {firm_details['title']}",
-                                "reason": "Replace title placeholder with actual title",
-                                "location_hint": "Signature block"
-                            })
-                            logger.warning(f"Added title replacement: '{title_pattern}' -> 'Title: {firm_details['title']}'")
-                            break
-                        else:
-                            logger.warning(f"Title '{firm_details['title']}' already in document, skipping replacement")
-                    else:
-                        logger.warning(f"Title pattern '{title_pattern}' not found in document")
+                logger.debug("Processing title field: '%s'", firm_details['title'])
+                title_modification = _mock_title_replacement(
+                    found_in, firm_details['title'], "Replace title placeholder with actual title", "Signature block"
+                )
+                if title_modification:
+                    mock_modifications.append(title_modification)
             else:
-                logger.warning("No 'title' key in firm_details, skipping title replacement")
+                logger.debug("No 'title' key in firm_details, skipping title replacement")
+        
+        # The firm and signature rules fill in the same three values, so resolve
+        # them (with their sample defaults) once instead of per rule
+        fd = firm_details or {}
+        signing_party = (
+            fd.get('firm_name', 'Sample Company LLC'),
+            fd.get('signatory_name', 'Sample Signer'),
+            fd.get('title', 'Authorized Signatory')
+        )
         
         for rule in custom_rules:
             rule_name = rule.get('name', '').lower()
             rule_instruction = rule.get('instruction', '')
-            logger.info(f"Processing rule: {rule_name}")
-            
-            # Create specific modifications based on rule type
-            if 'duration' in rule_name or 'term' in rule_name or 'confidentiality' in rule_name:
-                # Extract target duration from rule instruction
-                import re
-                target_years = 2  # Default fallback
-                
-                # Try to extract number from instruction (e.g., "Change to 5 years" → 5)
-                year_match = re.search(r'(\d+)\s*(?:\(\d+\))?\s*years?', rule_instruction, re.IGNORECASE)
-                if year_match:
-                    target_years = int(year_match.group(1))
-                    logger.info(f"📅 Extracted target duration: {target_years} years from instruction")
-                else:
-                    logger.warning(f"⚠️ Could not extract duration from instruction '{rule_instruction}', using default: {target_years} years")
-                
-                # Build dynamic target pattern
-                target_years_text = f"{target_years} ({target_years}) years" if target_years > 0 else f"{target_years} years"
-                target_years_simple = f"{target_years} years"
-                
-                # Check if document already has the target duration - if so, skip modification
-                target_patterns_in_doc = [
-                    target_years_text.lower(),
-                    target_years_simple.lower(),
-                    f"{target_years} ({target_years}) year".lower(),  # singular
-                    f"{target_years} year".lower()  # singular
-                ]
-                
-                # Also check word forms if target is 1-10
-                word_to_num = {
-                    1: 'one', 2: 'two', 3: 'three', 4: 'four', 5: 'five',
-                    6: 'six', 7: 'seven', 8: 'eight', 9: 'nine', 10: 'ten'
-                }
-                if target_years in word_to_num:
-                    word = word_to_num[target_years]
-                    target_patterns_in_doc.extend([
-                        f"{word} ({target_years}) years".lower(),
-                        f"{word} years".lower()
-                    ])
-                
-                # Look for various year patterns in the document and replace with target
-                # Note: We check for target patterns AFTER looking for patterns to replace,
-                # so we can still replace other year patterns even if target already exists
-                year_patterns = [
-                    ('five (5) years', target_years_text),
-                    ('5 years', target_years_simple),
-                    ('three (3) years', target_years_text),
-                    ('3 years', target_years_simple),
-                    ('four (4) years', target_years_text),
-                    ('4 years', target_years_simple),
-                    ('ten (10) years', target_years_text),
-                    ('10 years', target_years_simple),
-                    ('seven (7) years', target_years_text),
-                    ('7 years', target_years_simple),
-                    ('three years', target_years_text),
-                    ('five years', target_years_text),
-                    ('seven years', target_years_text),
-                    ('ten years', target_years_text)
-                ]
-                
-                found_pattern = False
-                for current_pattern, new_pattern in year_patterns:
-                    if current_pattern in document_text.lower():
-                        # Double-check: don't replace if it's already the target
-                        if current_pattern.lower() == target_years_text.lower() or current_pattern.lower() == target_years_simple.lower():
-                            logger.info(f"⚠️ Pattern '{current_pattern}' already matches target '{target_years_text}' - skipping this pattern")
-                            found_pattern = True  # Mark as found but don't add modification
-                            continue  # Skip this pattern but continue checking others
-                        
-                        mock_modifications.append({
-                            "type": "TEXT_REPLACE",
-                            "section": "term",
-                            "current_text": current_pattern,
-                            "new_text": new_pattern,
-                            "reason": rule_instruction,
-                            "location_hint": "Confidentiality term section"
-                        })
-                        logger.info(f"Found year pattern: {current_pattern} -> {new_pattern}")
-                        found_pattern = True
-                        # Don't break - continue to find all patterns that need changing
-                
-                if not found_pattern:
-                    # If no specific patterns found, add a generic year modification
-                    logger.info("No specific year patterns found, adding generic modification")
-                    mock_modifications.append({
-                        "type": "TEXT_REPLACE",
-                        "section": "term",
-                        "current_text": "three years",
-                        "new_text": target_years_text,
-                        "reason": rule_instruction,
-                        "location_hint": "Confidentiality term section"
-                    })
-            
-            elif 'liability' in rule_name or 'damage' in rule_name:
-                # Add liability cap clause
-                mock_modifications.append({
-                    "type": "TEXT_INSERT",
-                    "section": "liability",
-                    "new_text": "In no event shall either party be liable for any indirect, incidental, special, consequential, or punitive damages arising out of or relating to this Agreement.",
-                    "reason": rule_instruction,
-                    "location_hint": "After Section 8, Remedies"
-                })
-            
-            elif 'representatives' in rule_name or ('add' in rule_name and 'parties' in rule_name):
-                # Handle "Add parties" rule - expand Representatives definition
-                # Look for Representatives definition in the document
-                import re
-                representatives_patterns = [
-                    r'("Representatives"|Representatives).*?\)',
-                    r'collectively, "Representatives"',
-                    r'collectively, \'Representatives\'',
-                ]
-                
-                for pattern in representatives_patterns:
-                    matches = list(re.finditer(pattern, document_text, re.IGNORECASE | re.DOTALL))
-                    if matches:
-                        for match in matches:
-                            current_text = match.group(0)
-                            # Check if investors/financing sources are already mentioned
-                            if 'investors' not in current_text.lower() and 'potential financing sources' not in current_text.lower():
-                                # Find where to insert - typically before the closing parenthesis
-                                if current_text.endswith(')'):
-                                    # Insert before the closing paren
-                                    new_text = current_text[:-1] + ', investors, and potential financing sources)'
-                                else:
-                                    # Append to the end
-                                    new_text = current_text + ', investors, and potential financing sources'
-                                
-                                mock_modifications.append({
-                                    "type": "TEXT_REPLACE",
-                                    "section": "definitions",
-                                    "current_text": current_text,
-                                    "new_text": new_text,
-                                    "reason": rule_instruction,
-                                    "location_hint": "Representatives definition section"
-                                })
-                                logger.info(f"Found Representatives definition: '{current_text[:50]}...' -> '{new_text[:50]}...'")
-                                break
-                        if mock_modifications:  # If we added one, break outer loop
-                            break
-            
-            elif 'retention' in rule_name or 'carve' in rule_name or 'retain' in rule_name:
-                # Handle "Retention carve-out" rule - add clause allowing electronic copy retention
-                # Look for return/destroy sections where we can add the carve-out
-                retention_clause = 'Notwithstanding the foregoing, Recipient may retain an electronic copy of Confidential Information and notes if required under Recipient\'s document retention policy, provided that such retained materials remain subject to the confidentiality obligations set forth herein.'
-                
-                # Look for common return/destroy section patterns
-                return_section_patterns = [
-                    'return.*promptly',
-                    'destroy.*return',
-                    'return.*all.*material',
-                    'return.*evaluation.*material',
-                ]
-                
-                found_return_section = False
-                for pattern in return_section_patterns:
-                    matches = list(re.finditer(pattern, document_text, re.IGNORECASE))
-                    if matches:
-                        # Find the paragraph containing this text
-                        for match in matches:
-                            # Get surrounding context (the paragraph)
-                            start = max(0, match.start() - 200)
-                            end = min(len(document_text), match.end() + 200)
-                            context = document_text[start:end]
-                            
-                            # Check if retention clause already exists
-                            if 'retention policy' not in context.lower() and 'electronic copy' not in context.lower():
-                                # Find the end of the sentence/paragraph to insert after
-                                paragraph_end = document_text.find('.', match.end())
-                                if paragraph_end == -1:
-                                    paragraph_end = match.end() + 100
-                                
-                                # Insert the retention clause
-                                insertion_point = paragraph_end + 1
-                                current_text = document_text[insertion_point:insertion_point+50].strip()
-                                
-                                mock_modifications.append({
-                                    "type": "TEXT_INSERT",
-                                    "section": "return_of_materials",
-                                    "new_text": retention_clause,
-                                    "reason": rule_instruction,
-                                    "location_hint": "After return/destroy section"
-                                })
-                                logger.info(f"Added retention carve-out clause after return section")
-                                found_return_section = True
-                                break
-                        if found_return_section:
-                            break
-                
-                if not found_return_section:
-                    # If no return section found, add as a new clause
-                    mock_modifications.append({
-                        "type": "TEXT_INSERT",
-                        "section": "miscellaneous",
-                        "new_text": retention_clause,
-                        "reason": rule_instruction,
-                        "location_hint": "Before final clauses"
-                    })
-                    logger.info(f"Added retention carve-out clause as new insertion")
-            
-            elif 'firm' in rule_name or ('party' in rule_name and 'add' not in rule_name) or ('name' in rule_name and 'parties' not in rule_name):
-                # Get firm details or use defaults
-                firm_name = firm_details.get('firm_name', 'Sample Company LLC') if firm_details else 'Sample Company LLC'
-                signer_name = firm_details.get('signatory_name', 'Sample Signer') if firm_details else 'Sample Signer'
-                signer_title = firm_details.get('title', 'Authorized Signatory') if firm_details else 'Authorized Signatory'
-                
-                # Look for party name patterns using firm details
-                party_patterns = [
-                    ('Company (name to be provided upon execution)', firm_name),
-                    ('Recipient', f'{firm_name} (Recipient)'),
-                    ('Receiving Party', f'{firm_name} (Recipient)')
-                ]
-                
-                for current_pattern, new_pattern in party_patterns:
-                    if current_pattern in document_text:
-                        mock_modifications.append({
-                            "type": "TEXT_REPLACE",
-                            "section": "parties",
-                            "current_text": current_pattern,
-                            "new_text": new_pattern,
-                            "reason": rule_instruction,
-                            "location_hint": "Parties section"
-                        })
-                        logger.info(f"Found party pattern: {current_pattern} -> {new_pattern}")
-                        break
-                
-                # Replace firm placeholders with actual firm details
-                if '[FIRM_NAME]' in document_text:
-                    mock_modifications.append({
-                        "type": "TEXT_REPLACE",
-                        "section": "parties",
-                        "current_text": "[FIRM_NAME]",
-                        "new_text": firm_name,
-                        "reason": rule_instruction,
-                        "location_hint": "Section 1, line 4"
-                    })
-                if '[SIGNER_NAME]' in document_text:
-                    mock_modifications.append({
-                        "type": "TEXT_REPLACE",
-                        "section": "signatures",
-                        "current_text": "[SIGNER_NAME]",
-                        "new_text": signer_name,
-                        "reason": rule_instruction,
-                        "location_hint": "Section 11, line 55"
-                    })
-                if '[SIGNER_TITLE]' in document_text:
-                    mock_modifications.append({
-                        "type": "TEXT_REPLACE",
-                        "section": "signatures",
-                        "current_text": "[SIGNER_TITLE]",
-                        "new_text": signer_title,
-                        "reason": rule_instruction,
-                        "location_hint": "Section 11, line 56"
-                    })
+            logger.debug("Processing rule: %s", rule_name)
             
-            # Add more flexible pattern matching for other rule types
-            elif 'governing' in rule_name or 'law' in rule_name:
-                # Look for governing law patterns
-                law_patterns = [
-                    ('State of Delaware', 'State of New York'),
-                    ('Delaware', 'New York'),
-                    ('Delaware courts', 'New York courts')
-                ]
-                
-                for current_pattern, new_pattern in law_patterns:
-                    if current_pattern in document_text:
-                        mock_modifications.append({
-                            "type": "TEXT_REPLACE",
-                            "section": "governing_law",
-                            "current_text": current_pattern,
-                            "new_text": new_pattern,
-                            "reason": rule_instruction,
-                            "location_hint": "Governing law section"
-                        })
-                        logger.info(f"Found law pattern: {current_pattern} -> {new_pattern}")
-                        break
-            
-            elif 'signature' in rule_name or 'block' in rule_name:
-                # Get firm details or use defaults
-                firm_name = firm_details.get('firm_name', 'Sample Company LLC') if firm_details else 'Sample Company LLC'
-                signer_name = firm_details.get('signatory_name', 'Sample Signer') if firm_details else 'Sample Signer'
-                signer_title = firm_details.get('title', 'Authorized Signatory') if firm_details else 'Authorized Signatory'
-                
-                # Replace signature placeholders instead of inserting new content
-                signature_replacements = []
-                
-                # Look for specific signature patterns in the document
-                # Try multiple variations of the company placeholder
-                company_patterns = [
-                    "For: Company (name to be provided upon execution)",
-                    "For: Company",
-                    "Company (name to be provided upon execution)",
-                    "Company"
-                ]
-                
-                for pattern in company_patterns:
-                    if pattern in document_text:
-                        # Determine the replacement text based on the pattern using firm details
-                        if pattern.startswith("For:"):
-                            new_text = pattern.replace("Company", firm_name)
-                        else:
-                            new_text = f"For: {firm_name}"
-                        
-                        signature_replacements.append({
-                            "type": "TEXT_REPLACE",
-                            "section": "signatures",
-                            "current_text": pattern,
-                            "new_text": new_text,
-                            "reason": rule_instruction,
-                            "location_hint": "Signature block company name"
-                        })
-                        logger.info(f"Found company pattern: '{pattern}' -> '{new_text}'")
-                        break
-                
-                # Check if signer name already exists to avoid duplicates
-                if 'By:' in document_text and signer_name not in document_text:
-                    signature_replacements.append({
-                        "type": "TEXT_REPLACE",
-                        "section": "signatures",
-                        "current_text": "By:",
-                        "new_text": f"By: {signer_name}",
-                        "reason": rule_instruction,
-                        "location_hint": "Signature block signer name"
-                    })
-                
-                # Look for Title: with various formatting patterns
-                title_patterns = [
-                    "Title: \t_______________________________",
-                    "Title:\t_______________________________",
-                    "Title:_______________________________",
-                    "Title:",
-                    "Title: \t",
-                    "Title:\t"
-                ]
-                
-                for title_pattern in title_patterns:
-                    logger.warning(f"Checking rule title pattern: '{title_pattern}'")
-                    if title_pattern in document_text:
-                        logger.warning(f"Found rule title pattern '{title_pattern}' in document")
-                        # Check if title already exists to avoid duplicates
-                        if signer_title not in document_text:
-                            logger.warning(f"'{signer_title}' not in document, adding replacement")
-                            signature_replacements.append({
-                                "type": "TEXT_REPLACE",
-                                "section": "signatures",
-                                "current_text": title_pattern,
-                                "new_text": f"Title: {signer_title}",
-                                "reason": rule_instruction,
-                                "location_hint": "Signature block title"
-                            })
-                            logger.warning(f"Added rule title replacement: '{title_pattern}' -> 'Title: {signer_title}'")
-                            break
-                        else:
-                            logger.warning(f"'{signer_title}' already in document, skipping replacement")
-                    else:
-                        logger.warning(f"Rule title pattern '{title_pattern}' not found in document")
-                
-                if signature_replacements:
-                    mock_modifications.extend(signature_replacements)
-                    logger.info(f"Added {len(signature_replacements)} signature block replacements")
-                else:
-                    logger.info("No signature placeholders found to replace")
+            # Create specific modifications based on rule type, skipping rules
+            # whose placeholders the document doesn't contain at all
+            kind = _mock_rule_kind(rule_name)
+            triggers = _MOCK_RULE_TRIGGERS.get(kind)
+            if triggers and not any(found_in[trigger] for trigger in triggers):
+                continue
+            handler = _MOCK_RULE_HANDLERS.get(kind)
+            if handler:
+                handler(rule_instruction, document_text, found_in, signing_party, mock_modifications)
         
         # If no modifications were found, create a generic one based on the first rule
         if not mock_modifications and custom_rules:
@@ -1066,11 +1772,13 @@ class AIRedliningService:
             })
             logger.info("Added fallback modification")
         
-        logger.info(f"Mock analysis complete. Generated {len(mock_modifications)} modifications:")
-        for i, mod in enumerate(mock_modifications):
-            current = mod.get('current_text', 'N/A')
-            new = mod.get('new_text', 'N/A')
-            logger.info(f"  {i+1}. {mod.get('type', 'UNKNOWN')}: '{current[:50] if current else 'N/A'}...' -> '{new[:50] if new else 'N/A'}...'")
+        logger.info("Mock analysis complete. Generated %d modifications", len(mock_modifications))
+        if logger.isEnabledFor(logging.DEBUG):
+            # One log record for the whole list rather than one per modification
+            logger.debug("Mock modifications:\n%s", "\n".join(
+                f"  {i+1}. {mod.get('type', 'UNKNOWN')}: '{(mod.get('current_text') or 'N/A')[:50]}...' -> '{(mod.get('new_text') or 'N/A')[:50]}...'"
+                for i, mod in enumerate(mock_modifications)
+            ))
         
         return {
             'success': True,
@@ -1082,8 +1790,19 @@ class AIRedliningService:
             'ai_analysis': f"Mock AI analysis generated {len(mock_modifications)} redlining suggestions based on the provided rules. In production, this would be generated by OpenAI GPT-4."
         }
     
-    def _build_system_prompt(self, custom_rules: List[Dict[str, Any]], firm_details: Dict[str, Any] = None) -> str:
+    def _build_system_prompt(self, custom_rules: List[Dict[str, Any]]) -> str:
         """Build the system prompt for GPT-4"""
+        # The prompt only depends on the rule names/instructions - firm values go in the
+        # user message - so every firm using the same rule set shares one prompt prefix,
+        # which OpenAI's prompt cache can reuse
+        rules = tuple((rule.get('name', 'Unnamed Rule'), rule['instruction']) for rule in custom_rules or ())
+        return self._render_system_prompt(rules)
+    
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _render_system_prompt(rules: tuple) -> str:
+        """Render the system prompt for a frozen (name, instruction) rule set"""
+        custom_rules = [{'name': name, 'instruction': instruction} for name, instruction in rules]
         base_prompt = """You are an expert legal AI assistant specializing in NDA (Non-Disclosure Agreement) redlining. 
         Your task is to analyze NDA documents and provide PRECISE, TARGETED redlining instructions.
         
@@ -1137,7 +1856,7 @@ class AIRedliningService:
         - TEXT_DELETE: Remove specific text
         - CLAUSE_ADD: Add entire new clauses
         
-        Return your analysis in this exact JSON format (use the ACTUAL firm details values provided above, NOT these example values):
+        Return your analysis in this exact JSON format (use the ACTUAL firm details values provided with the document, NOT these example values):
         {
             "modifications": [
                 {
@@ -1156,186 +1875,197 @@ class AIRedliningService:
         IMPORTANT: For signature blocks, always use TEXT_REPLACE to fill in existing placeholders. Never use TEXT_INSERT to create new signature fields."""
         
         if custom_rules:
-            rules_text = "\n\n" + "="*80 + "\n"
-            rules_text += "🚨 CRITICAL - CUSTOM RULES TO APPLY 🚨\n"
-            rules_text += "="*80 + "\n"
-            rules_text += "YOU MUST APPLY ALL OF THESE RULES. DO NOT SKIP ANY RULE.\n"
-            rules_text += "EACH RULE MUST RESULT IN AT LEAST ONE MODIFICATION.\n\n"
+            rules_parts = ["\n\n" + "="*80 + "\n"]
+            rules_parts.append("🚨 CRITICAL - CUSTOM RULES TO APPLY 🚨\n")
+            rules_parts.append("="*80 + "\n")
+            rules_parts.append("YOU MUST APPLY ALL OF THESE RULES. DO NOT SKIP ANY RULE.\n")
+            rules_parts.append("EACH RULE MUST RESULT IN AT LEAST ONE MODIFICATION.\n\n")
             
             for idx, rule in enumerate(custom_rules, 1):
                 rule_name = rule.get('name', 'Unnamed Rule')
-                instruction = rule['instruction']
-                
-                # CRITICAL: Replace any placeholders or hardcoded values in rules with actual firm details
-                original_instruction = instruction
-                if firm_details:
-                    # Replace placeholder tokens with actual firm details
-                    if '[FIRM_NAME]' in instruction and firm_details.get('firm_name'):
-                        instruction = instruction.replace('[FIRM_NAME]', firm_details['firm_name'])
-                    
-                    if '[SIGNER_NAME]' in instruction and firm_details.get('signatory_name'):
-                        instruction = instruction.replace('[SIGNER_NAME]', firm_details['signatory_name'])
-                    
-                    if '[TITLE]' in instruction and firm_details.get('title'):
-                        instruction = instruction.replace('[TITLE]', firm_details['title'])
-                    
-                    # Also replace any remaining hardcoded company names
-                    hardcoded_companies = ['JMC Investment LLC', 'JMC Investment', 'JMC', 'Welch Capital Partners']
-                    for company in hardcoded_companies:
-                        if company in instruction and firm_details.get('firm_name'):
-                            instruction = instruction.replace(company, firm_details['firm_name'])
-                    
-                    # Replace hardcoded person names
-                    hardcoded_names = ['John Bagge', 'John', 'Jane Doe']
-                    for name in hardcoded_names:
-                        if name in instruction and firm_details.get('signatory_name'):
-                            instruction = instruction.replace(name, firm_details['signatory_name'])
-                    
-                    # Replace hardcoded titles
-                    hardcoded_titles = ['Vice President', 'President', 'CEO', 'Managing Director']
-                    for title in hardcoded_titles:
-                        if title in instruction and firm_details.get('title'):
-                            instruction = instruction.replace(title, firm_details['title'])
-                    
-                    # Log if instruction was modified
-                    if instruction != original_instruction:
-                        logger.warning(f"RULE TRANSFORMED:")
-                        logger.warning(f"  BEFORE: {original_instruction}")
-                        logger.warning(f"  AFTER:  {instruction}")
-                
-                rules_text += f"RULE {idx}: {rule_name}\n"
-                rules_text += f"  Instruction: {instruction}\n"
-                rules_text += f"  ⚠️  YOU MUST GENERATE AT LEAST ONE MODIFICATION FOR THIS RULE\n\n"
-            
-            rules_text += "="*80 + "\n"
-            rules_text += "CRITICAL REMINDER: You must apply ALL rules above. Each rule type requires:\n\n"
-            rules_text += "1. EXPAND REPRESENTATIVES / ADD PARTIES:\n"
-            rules_text += "   - **CRITICAL**: If a rule asks to expand 'Representatives' definition, you MUST find it and modify it\n"
-            rules_text += "   - Search for the word 'Representatives' (case-insensitive) in the document\n"
-            rules_text += "   - The definition might appear as:\n"
-            rules_text += "     * 'collectively, \"Representatives\"'\n"
-            rules_text += "     * '(collectively, \"Representatives\")'\n"
-            rules_text += "     * 'collectively, \'Representatives\''\n"
-            rules_text += "     * 'Representatives' (in quotes or parentheses)\n"
-            rules_text += "   - Find the COMPLETE definition text that includes 'Representatives'\n"
-            rules_text += "   - Add the new parties to the end of the list (before the closing quote/parenthesis)\n"
-            rules_text += "   - Example: 'collectively, \"Representatives\"' → 'collectively, \"Representatives\", investors, and potential financing sources'\n"
-            rules_text += "   - Example: '(collectively, \"Representatives\")' → '(collectively, \"Representatives\", investors, and potential financing sources)'\n"
-            rules_text += "   - **YOU MUST USE TEXT_REPLACE** to modify the existing definition\n"
-            rules_text += "   - **DO NOT SKIP THIS** - if the rule asks for it, you MUST generate a modification\n"
-            rules_text += "   - If you can't find 'Representatives', search for 'representatives' (lowercase) or 'REPRESENTATIVES' (uppercase)\n\n"
-            rules_text += "2. RETENTION CARVE-OUT:\n"
-            rules_text += "   - **CRITICAL**: Search for sections about 'return', 'destroy', 'destroy or return', 'return of Evaluation Material', or 'Return of Evaluation Material'\n"
-            rules_text += "   - Find the paragraph or section that requires returning/destroying Confidential Information\n"
-            rules_text += "   - Look for sentences like: 'you will destroy or return promptly', 'return all written material', 'destroy or return'\n"
-            rules_text += "   - Add a new sentence AFTER that paragraph/section allowing electronic copy retention\n"
-            rules_text += "   - **DO NOT** add it in sections about contacting Company employees or other unrelated topics\n"
-            rules_text += "   - Example text: 'Notwithstanding the foregoing, Recipient may retain an electronic copy of Confidential Information and notes if required under Recipient's document retention policy, provided that such retained materials remain subject to the confidentiality obligations set forth herein.'\n"
-            rules_text += "   - Use TEXT_INSERT to add this clause\n"
-            rules_text += "   - **IMPORTANT**: The current_text for TEXT_INSERT can be empty or the sentence before where you want to insert\n\n"
-            rules_text += "3. TERM CHANGE:\n"
-            rules_text += "   - **CRITICAL**: You MUST find and change the term duration\n"
-            rules_text += "   - Search the ENTIRE document for sections about 'Term', 'Duration', 'Confidentiality Term', or numbered sections\n"
-            rules_text += "   - Look for patterns like: 'This Agreement shall remain in effect', 'period of X years', 'for X years', 'X years from the date'\n"
-            rules_text += "   - **SPECIAL CASE**: If you see '() years' or '( ) years' (empty parentheses), this is a placeholder that MUST be replaced\n"
-            rules_text += "     Example: 'period of () years' → 'period of two (2) years'\n"
-            rules_text += "   - Find ALL instances of the old duration (e.g., 'three years', 'three (3) years', '3 years', 'three (3) year', '() years')\n"
-            rules_text += "   - Replace with the target duration from the rule (e.g., 'two (2) years')\n"
-            rules_text += "   - **IMPORTANT**: Even if the term section is not in the preview, search for year patterns throughout the document\n"
-            rules_text += "   - Use TEXT_REPLACE for each instance found\n"
-            rules_text += "   - **DO NOT SKIP THIS** - if a term change rule exists, you MUST generate at least one modification\n\n"
-            rules_text += "4. REPLACE COMPANY/NAME/TITLE:\n"
-            rules_text += "   - Find placeholders like 'For: Company', 'By:', 'Title:', 'Dear NAME:'\n"
-            rules_text += "   - Replace with actual values from firm details\n"
-            rules_text += "   - Use TEXT_REPLACE\n\n"
-            rules_text += "="*80 + "\n"
-            rules_text += "⚠️  FINAL CHECK: Before returning your response, verify that:\n"
-            rules_text += "   - You have generated AT LEAST ONE modification for EACH rule listed above\n"
-            rules_text += "   - **RULE 1 (Add parties)**: If a rule asks to expand Representatives, you MUST:\n"
-            rules_text += "     * Search the ENTIRE document for 'Representatives' (try all case variations)\n"
-            rules_text += "     * Find the definition text (it might be long, spanning multiple words)\n"
-            rules_text += "     * Generate a TEXT_REPLACE modification that adds the new parties\n"
-            rules_text += "     * If you don't find it, still generate a modification based on common patterns\n"
-            rules_text += "   - **RULE 2 (Retention carve-out)**: You MUST have a TEXT_INSERT modification\n"
-            rules_text += "   - **RULE 3 (Term change)**: You MUST have at least one TEXT_REPLACE modification\n"
-            rules_text += "   - **COUNT YOUR MODIFICATIONS**: If you have 3 rules, you should have AT LEAST 3 modifications (one per rule minimum)\n"
-            rules_text += "="*80 + "\n"
-            base_prompt += rules_text
-        
-        if firm_details:
-            firm_text = "\n\n" + "="*80 + "\n"
-            firm_text += "🚨 CRITICAL - MANDATORY FIRM DETAILS - DO NOT USE ANY OTHER VALUES 🚨\n"
-            firm_text += "="*80 + "\n"
-            firm_text += "YOU MUST USE THESE EXACT VALUES - DO NOT SUBSTITUTE WITH EXAMPLES:\n\n"
-            
-            if firm_details.get('firm_name'):
-                firm_text += f"COMPANY NAME TO USE: '{firm_details['firm_name']}'\n"
-                firm_text += f"⚠️  **LOCATION**: ONLY at the END of the document in the signature block\n"
-                firm_text += f"✅ CORRECT PATTERNS TO FIND AND REPLACE:\n"
-                firm_text += f"   - 'For: Company' → 'For: {firm_details['firm_name']}'\n"
-                firm_text += f"   - 'Name of company (Recipient):' → 'Name of company (Recipient): {firm_details['firm_name']}'\n"
-                firm_text += f"   - 'Company (name to be provided)' → '{firm_details['firm_name']}'\n"
-                firm_text += f"   - 'Recipient:' → 'Recipient: {firm_details['firm_name']}'\n"
-                firm_text += f"   - Any company placeholder in signature block\n"
-                firm_text += f"❌ WRONG: Do NOT replace (the \"Company\") in the opening paragraphs\n"
-                firm_text += f"❌ WRONG: Do NOT replace \"the Company\" anywhere in the legal text body\n"
-                firm_text += f"❌ WRONG: Do NOT replace \"Company\" if it's in quotes or parentheses\n"
-                firm_text += f"  - In JSON: current_text should match the EXACT format in the document\n\n"
-            
-            if firm_details.get('signatory_name'):
-                firm_text += f"SIGNER NAME TO USE: '{firm_details['signatory_name']}'\n"
-                firm_text += f"✅ CORRECT PATTERNS TO FIND AND REPLACE:\n"
-                firm_text += f"   - 'Dear NAME:' → 'Dear {firm_details['signatory_name']}:'\n"
-                firm_text += f"   - 'By:' (with blank/underscore) → 'By: {firm_details['signatory_name']}'\n"
-                firm_text += f"   - 'Name:' (with blank/underscore) → 'Name: {firm_details['signatory_name']}'\n"
-                firm_text += f"   - 'Signed:' (with blank/underscore) → 'Signed: {firm_details['signatory_name']}'\n"
-                firm_text += f"   - Any name placeholder in signature block\n"
-                firm_text += f"  - In JSON: current_text should be the PLACEHOLDER (e.g., 'By:' or 'Name:'), not the firm detail value\n"
-                firm_text += f"  - DO NOT search for '{firm_details['signatory_name']}' in the document!\n\n"
-            
-            if firm_details.get('title'):
-                firm_text += f"TITLE TO USE: '{firm_details['title']}'\n"
-                firm_text += f"✅ CORRECT PATTERNS TO FIND AND REPLACE:\n"
-                firm_text += f"   - 'Title:' (with blank/underscore) → 'Title: {firm_details['title']}'\n"
-                firm_text += f"   - 'Title: \\t_______________________________' → 'Title: {firm_details['title']}'\n"
-                firm_text += f"   - 'Position:' (with blank) → 'Position: {firm_details['title']}'\n"
-                firm_text += f"   - Any title placeholder in signature block\n"
-                firm_text += f"  - In JSON: current_text should be the PLACEHOLDER (e.g., 'Title:' or 'Title: \\t_______________________________')\n"
-                firm_text += f"  - DO NOT search for '{firm_details['title']}' in the document!\n\n"
-            
-            firm_text += "="*80 + "\n"
-            firm_text += "REMINDER: Use the EXACT values above. Do NOT use placeholder examples.\n"
-            firm_text += "="*80 + "\n"
-            base_prompt += firm_text
+                # Placeholders and example values stay as written here; the user
+                # message says which firm details replace them
+                rules_parts.append(f"RULE {idx}: {rule_name}\n")
+                rules_parts.append(f"  Instruction: {rule['instruction']}\n")
+                rules_parts.append(f"  ⚠️  YOU MUST GENERATE AT LEAST ONE MODIFICATION FOR THIS RULE\n\n")
+            
+            rules_parts.append("="*80 + "\n")
+            rules_parts.append("CRITICAL REMINDER: You must apply ALL rules above. Each rule type requires:\n\n")
+            rules_parts.append("1. EXPAND REPRESENTATIVES / ADD PARTIES:\n")
+            rules_parts.append("   - **CRITICAL**: If a rule asks to expand 'Representatives' definition, you MUST find it and modify it\n")
+            rules_parts.append("   - Search for the word 'Representatives' (case-insensitive) in the document\n")
+            rules_parts.append("   - The definition might appear as:\n")
+            rules_parts.append("     * 'collectively, \"Representatives\"'\n")
+            rules_parts.append("     * '(collectively, \"Representatives\")'\n")
+            rules_parts.append("     * 'collectively, \'Representatives\''\n")
+            rules_parts.append("     * 'Representatives' (in quotes or parentheses)\n")
+            rules_parts.append("   - Find the COMPLETE definition text that includes 'Representatives'\n")
+            rules_parts.append("   - Add the new parties to the end of the list (before the closing quote/parenthesis)\n")
+            rules_parts.append("   - Example: 'collectively, \"Representatives\"' → 'collectively, \"Representatives\", investors, and potential financing sources'\n")
+            rules_parts.append("   - Example: '(collectively, \"Representatives\")' → '(collectively, \"Representatives\", investors, and potential financing sources)'\n")
+            rules_parts.append("   - **YOU MUST USE TEXT_REPLACE** to modify the existing definition\n")
+            rules_parts.append("   - **DO NOT SKIP THIS** - if the rule asks for it, you MUST generate a modification\n")
+            rules_parts.append("   - If you can't find 'Representatives', search for 'representatives' (lowercase) or 'REPRESENTATIVES' (uppercase)\n\n")
+            rules_parts.append("2. RETENTION CARVE-OUT:\n")
+            rules_parts.append("   - **CRITICAL**: Search for sections about 'return', 'destroy', 'destroy or return', 'return of Evaluation Material', or 'Return of Evaluation Material'\n")
+            rules_parts.append("   - Find the paragraph or section that requires returning/destroying Confidential Information\n")
+            rules_parts.append("   - Look for sentences like: 'you will destroy or return promptly', 'return all written material', 'destroy or return'\n")
+            rules_parts.append("   - Add a new sentence AFTER that paragraph/section allowing electronic copy retention\n")
+            rules_parts.append("   - **DO NOT** add it in sections about contacting Company employees or other unrelated topics\n")
+            rules_parts.append("   - Example text: 'Notwithstanding the foregoing, Recipient may retain an electronic copy of Confidential Information and notes if required under Recipient's document retention policy, provided that such retained materials remain subject to the confidentiality obligations set forth herein.'\n")
+            rules_parts.append("   - Use TEXT_INSERT to add this clause\n")
+            rules_parts.append("   - **IMPORTANT**: The current_text for TEXT_INSERT can be empty or the sentence before where you want to insert\n\n")
+            rules_parts.append("3. TERM CHANGE:\n")
+            rules_parts.append("   - **CRITICAL**: You MUST find and change the term duration\n")
+            rules_parts.append("   - Search the ENTIRE document for sections about 'Term', 'Duration', 'Confidentiality Term', or numbered sections\n")
+            rules_parts.append("   - Look for patterns like: 'This Agreement shall remain in effect', 'period of X years', 'for X years', 'X years from the date'\n")
+            rules_parts.append("   - **SPECIAL CASE**: If you see '() years' or '( ) years' (empty parentheses), this is a placeholder that MUST be replaced\n")
+            rules_parts.append("     Example: 'period of () years' → 'period of two (2) years'\n")
+            rules_parts.append("   - Find ALL instances of the old duration (e.g., 'three years', 'three (3) years', '3 years', 'three (3) year', '() years')\n")
+            rules_parts.append("   - Replace with the target duration from the rule (e.g., 'two (2) years')\n")
+            rules_parts.append("   - **IMPORTANT**: Even if the term section is not in the preview, search for year patterns throughout the document\n")
+            rules_parts.append("   - Use TEXT_REPLACE for each instance found\n")
+            rules_parts.append("   - **DO NOT SKIP THIS** - if a term change rule exists, you MUST generate at least one modification\n\n")
+            rules_parts.append("4. REPLACE COMPANY/NAME/TITLE:\n")
+            rules_parts.append("   - Find placeholders like 'For: Company', 'By:', 'Title:', 'Dear NAME:'\n")
+            rules_parts.append("   - Replace with actual values from firm details\n")
+            rules_parts.append("   - Use TEXT_REPLACE\n\n")
+            rules_parts.append("="*80 + "\n")
+            rules_parts.append("⚠️  FINAL CHECK: Before returning your response, verify that:\n")
+            rules_parts.append("   - You have generated AT LEAST ONE modification for EACH rule listed above\n")
+            rules_parts.append("   - **RULE 1 (Add parties)**: If a rule asks to expand Representatives, you MUST:\n")
+            rules_parts.append("     * Search the ENTIRE document for 'Representatives' (try all case variations)\n")
+            rules_parts.append("     * Find the definition text (it might be long, spanning multiple words)\n")
+            rules_parts.append("     * Generate a TEXT_REPLACE modification that adds the new parties\n")
+            rules_parts.append("     * If you don't find it, still generate a modification based on common patterns\n")
+            rules_parts.append("   - **RULE 2 (Retention carve-out)**: You MUST have a TEXT_INSERT modification\n")
+            rules_parts.append("   - **RULE 3 (Term change)**: You MUST have at least one TEXT_REPLACE modification\n")
+            rules_parts.append("   - **COUNT YOUR MODIFICATIONS**: If you have 3 rules, you should have AT LEAST 3 modifications (one per rule minimum)\n")
+            rules_parts.append("="*80 + "\n")
+            base_prompt += ''.join(rules_parts)
         
+        # Firm details are NOT added here - they go at the end of the user prompt so
+        # the system prompt stays identical between calls and OpenAI can serve it
+        # from its prompt cache
         return base_prompt
     
-    def _build_user_prompt(self, document_text: str, custom_rules: List[Dict[str, Any]], firm_details: Dict[str, Any] = None) -> str:
-        """Build the user prompt with document content"""
+    def _build_rule_values_prompt(self, custom_rules: List[Dict[str, Any]], firm_details: Dict[str, Any] = None) -> str:
+        """Build the section mapping the placeholders and example values in the rules to firm details"""
+        if not firm_details or not custom_rules:
+            return ""
+        firm = (firm_details.get('firm_name'), firm_details.get('signatory_name'), firm_details.get('title'))
+        # A firm without any of the fields can't change a rule, so the rules aren't scanned
+        if not any(firm):
+            return ""
+        return self._render_rule_values_prompt(tuple(rule['instruction'] for rule in custom_rules), firm)
+    
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _render_rule_values_prompt(instructions: tuple, firm: tuple) -> str:
+        """Render the rule values section for frozen rule instructions and (firm_name, signatory_name, title)"""
+        firm_values = dict(zip(('firm_name', 'signatory_name', 'title'), firm, strict=True))
+        # Only the values that occur in the rules and that the firm can fill, in order of
+        # first appearance; longer text is matched first ("JMC Investment LLC" before "JMC")
+        replacements = {}
+        for instruction in instructions:
+            for token in _RULE_VALUE_RE.findall(instruction):
+                value = firm_values[_RULE_VALUE_KEYS[token]]
+                if value:
+                    replacements.setdefault(token, value)
+        if not replacements:
+            return ""
+        logger.debug("Rule values for firm: %s", replacements)
+        value_parts = ["\n\nRULE VALUES FOR THIS FIRM - wherever the rules mention these placeholders or example values, use the firm's value instead:\n"]
+        value_parts.extend(f"   - '{token}' → '{value}'\n" for token, value in replacements.items())
+        return ''.join(value_parts)
+    
+    def _build_firm_details_prompt(self, firm_details: Dict[str, Any] = None) -> str:
+        """Build the mandatory firm details section of the prompt"""
+        if not firm_details:
+            return ""
+        # Only these three fields are rendered, so requests for the same firm share one section
+        return self._render_firm_details_prompt(
+            (firm_details.get('firm_name'), firm_details.get('signatory_name'), firm_details.get('title'))
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _render_firm_details_prompt(firm: tuple) -> str:
+        """Render the firm details section for a frozen (firm_name, signatory_name, title)"""
+        firm_name, signatory_name, title = firm
+        firm_parts = ["\n\n" + "="*80 + "\n"]
+        firm_parts.append("🚨 CRITICAL - MANDATORY FIRM DETAILS - DO NOT USE ANY OTHER VALUES 🚨\n")
+        firm_parts.append("="*80 + "\n")
+        firm_parts.append("YOU MUST USE THESE EXACT VALUES - DO NOT SUBSTITUTE WITH EXAMPLES:\n\n")
+        
+        if firm_name:
+            firm_parts.append(f"COMPANY NAME TO USE: '{firm_name}'\n")
+            firm_parts.append(f"⚠️  **LOCATION**: ONLY at the END of the document in the signature block\n")
+            firm_parts.append(f"✅ CORRECT PATTERNS TO FIND AND REPLACE:\n")
+            firm_parts.append(f"   - 'For: Company' → 'For: {firm_name}'\n")
+            firm_parts.append(f"   - 'Name of company (Recipient):' → 'Name of company (Recipient): {firm_name}'\n")
+            firm_parts.append(f"   - 'Company (name to be provided)' → '{firm_name}'\n")
+            firm_parts.append(f"   - 'Recipient:' → 'Recipient: {firm_name}'\n")
+            firm_parts.append(f"   - Any company placeholder in signature block\n")
+            firm_parts.append(f"❌ WRONG: Do NOT replace (the \"Company\") in the opening paragraphs\n")
+            firm_parts.append(f"❌ WRONG: Do NOT replace \"the Company\" anywhere in the legal text body\n")
+            firm_parts.append(f"❌ WRONG: Do NOT replace \"Company\" if it's in quotes or parentheses\n")
+            firm_parts.append(f"  - In JSON: current_text should match the EXACT format in the document\n\n")
+        
+        if signatory_name:
+            firm_parts.append(f"SIGNER NAME TO USE: '{signatory_name}'\n")
+            firm_parts.append(f"✅ CORRECT PATTERNS TO FIND AND REPLACE:\n")
+            firm_parts.append(f"   - 'Dear NAME:' → 'Dear {signatory_name}:'\n")
+            firm_parts.append(f"   - 'By:' (with blank/underscore) → 'By: {signatory_name}'\n")
+            firm_parts.append(f"   - 'Name:' (with blank/underscore) → 'Name: {signatory_name}'\n")
+            firm_parts.append(f"   - 'Signed:' (with blank/underscore) → 'Signed: {signatory_name}'\n")
+            firm_parts.append(f"   - Any name placeholder in signature block\n")
+            firm_parts.append(f"  - In JSON: current_text should be the PLACEHOLDER (e.g., 'By:' or 'Name:'), not the firm detail value\n")
+            firm_parts.append(f"  - DO NOT search for '{signatory_name}' in the document!\n\n")
+        
+        if title:
+            firm_parts.append(f"TITLE TO USE: '{title}'\n")
+            firm_parts.append(f"✅ CORRECT PATTERNS TO FIND AND REPLACE:\n")
+            firm_parts.append(f"   - 'Title:' (with blank/underscore) → 'Title: {title}'\n")
+            firm_parts.append(f"   - 'Title: \\t_______________________________' → 'Title: {title}'\n")
+            firm_parts.append(f"   - 'Position:' (with blank) → 'Position: {title}'\n")
+            firm_parts.append(f"   - Any title placeholder in signature block\n")
+            firm_parts.append(f"  - In JSON: current_text should be the PLACEHOLDER (e.g., 'Title:' or 'Title: \\t_______________________________')\n")
+            firm_parts.append(f"  - DO NOT search for '{title}' in the document!\n\n")
+        
+        firm_parts.append("="*80 + "\n")
+        firm_parts.append("REMINDER: Use the EXACT values above. Do NOT use placeholder examples.\n")
+        firm_parts.append("="*80 + "\n")
+        return ''.join(firm_parts)
+    
+    def _document_preview(self, document_text: str) -> str:
+        """Cut the document down to the part sent to the model"""
         # Limit document text to fit within token budget (GPT-4 has 8192 total, we need room for prompt + response)
         # Using ~3000 chars (~750 tokens) for document preview - increased to include term sections that are often later in the document
         text_limit = 3000
-        document_preview = document_text[:text_limit]
+        if len(document_text) <= text_limit:
+            return document_text
         
         # Also include a snippet from the end of the document (where term sections often are)
-        # This helps catch term sections that might be near the end
-        if len(document_text) > text_limit:
-            end_snippet = document_text[-500:]  # Last 500 chars
-            document_preview += f"\n\n[... document continues ...]\n\n[end of document]:\n{end_snippet}"
+        # This helps catch term sections that might be near the end. The head, marker and
+        # last 500 chars are formatted in one go rather than appended to the head slice
+        return f"{document_text[:text_limit]}\n\n[... document continues ...]\n\n[end of document]:\n{document_text[-500:]}"
+    
+    def _build_user_prompt(self, document_text: str, custom_rules: List[Dict[str, Any]], firm_details: Dict[str, Any] = None,
+                           document_preview: Optional[str] = None) -> str:
+        """Build the user prompt with document content"""
+        if document_preview is None:
+            document_preview = self._document_preview(document_text)
         
-        # Check if document contains "Representatives" and log it
+        # Check if document contains "Representatives" (the context is debug-only)
         has_representatives = 'Representatives' in document_text or 'representatives' in document_text.lower()
-        logger.warning(f"Document contains 'Representatives': {has_representatives}")
-        if has_representatives:
+        logger.debug("Document contains 'Representatives': %s", has_representatives)
+        if has_representatives and logger.isEnabledFor(logging.DEBUG):
             # Find and log the context around "Representatives"
-            import re
-            reps_matches = list(re.finditer(r'[Rr]epresentatives', document_text))
-            if reps_matches:
-                for match in reps_matches[:3]:  # Log first 3 occurrences
-                    start = max(0, match.start() - 100)
-                    end = min(len(document_text), match.end() + 100)
-                    context = document_text[start:end]
-                    logger.warning(f"Found 'Representatives' at position {match.start()}: ...{context}...")
+            for match in itertools.islice(_REPRESENTATIVES_WORD_RE.finditer(document_text), 3):  # Log first 3 occurrences
+                start = max(0, match.start() - 100)
+                end = min(len(document_text), match.end() + 100)
+                logger.debug("Found 'Representatives' at position %d: ...%s...", match.start(), document_text[start:end])
         
         # Add a special note if Representatives is found and there's an "Add parties" rule
         add_parties_rule = None
@@ -1442,28 +2172,57 @@ IMPORTANT: Only make the specific changes requested in the custom rules. Do not
 
 Please provide your analysis in the specified JSON format."""
 
+        prompt_parts = [prompt, self._build_firm_details_prompt(firm_details),
+                        self._build_rule_values_prompt(custom_rules, firm_details)]
+        
         # Add firm details reminder at the end for maximum emphasis
         if firm_details:
-            prompt += f"\n\n" + "!"*80 + "\n"
-            prompt += f"🚨 FINAL REMINDER - MANDATORY REPLACEMENTS - USE THESE EXACT VALUES:\n"
-            prompt += "!"*80 + "\n"
+            prompt_parts.append(f"\n\n" + "!"*80 + "\n")
+            prompt_parts.append(f"🚨 FINAL REMINDER - MANDATORY REPLACEMENTS - USE THESE EXACT VALUES:\n")
+            prompt_parts.append("!"*80 + "\n")
             if firm_details.get('signatory_name'):
-                prompt += f'✅ REQUIRED: Replace "Dear NAME:" with "Dear {firm_details["signatory_name"]}:"\n'
-                prompt += f'✅ REQUIRED: Replace "By:" with "By: {firm_details["signatory_name"]}"\n'
+                prompt_parts.append(f'✅ REQUIRED: Replace "Dear NAME:" with "Dear {firm_details["signatory_name"]}:"\n')
+                prompt_parts.append(f'✅ REQUIRED: Replace "By:" with "By: {firm_details["signatory_name"]}"\n')
             if firm_details.get('firm_name'):
-                prompt += f'✅ REQUIRED: Replace "For: Company" with "For: {firm_details["firm_name"]}"\n'
+                prompt_parts.append(f'✅ REQUIRED: Replace "For: Company" with "For: {firm_details["firm_name"]}"\n')
             if firm_details.get('title'):
-                prompt += f'✅ REQUIRED: Replace "Title:" fields with "Title: {firm_details["title"]}"\n'
-            prompt += f"\n❌ DO NOT use placeholder examples - use actual firm details only!\n"
-            prompt += f"❌ DO NOT leave placeholders like 'Dear NAME:', 'Company', or blanks unchanged!\n"
-            prompt += "!"*80 + "\n"
+                prompt_parts.append(f'✅ REQUIRED: Replace "Title:" fields with "Title: {firm_details["title"]}"\n')
+            prompt_parts.append(f"\n❌ DO NOT use placeholder examples - use actual firm details only!\n")
+            prompt_parts.append(f"❌ DO NOT leave placeholders like 'Dear NAME:', 'Company', or blanks unchanged!\n")
+            prompt_parts.append("!"*80 + "\n")
 
-        return prompt
+        return ''.join(prompt_parts)
     
     def _parse_ai_response(self, ai_response: str) -> List[Dict[str, Any]]:
         """Parse the AI response and extract redlining instructions"""
         try:
-            # Try to extract JSON from the response
+            # Fast path: JSON mode (and well-behaved models) return exactly one JSON object
+            if ai_response.lstrip().startswith('{'):
+                try:
+                    parsed = json.loads(ai_response)
+                except ValueError:
+                    parsed = None
+                if isinstance(parsed, dict):
+                    modifications = parsed.get('modifications', [])
+                    self._unescape_modifications(modifications)
+                    logger.info(f"Successfully parsed {len(modifications)} modifications from AI response")
+                    return modifications
+            
+            # Otherwise decode the first JSON object in place, wherever it starts -
+            # one pass, no slicing or escaping of the response
+            start = ai_response.find('{')
+            if start != -1:
+                try:
+                    parsed, _ = _LENIENT_JSON_DECODER.raw_decode(ai_response, start)
+                except json.JSONDecodeError:
+                    parsed = None
+                if isinstance(parsed, dict):
+                    modifications = parsed.get('modifications', [])
+                    self._unescape_modifications(modifications)
+                    logger.info(f"Successfully parsed {len(modifications)} modifications from AI response")
+                    return modifications
+            
+            # Fall back to slicing out the outermost braces and repairing control characters
             if '{' in ai_response and '}' in ai_response:
                 start = ai_response.find('{')
                 end = ai_response.rfind('}') + 1
@@ -1471,24 +2230,15 @@ Please provide your analysis in the specified JSON format."""
                 
                 # Fix: Escape control characters (tabs, newlines) that might be in the JSON
                 # This is necessary because the AI might include literal tabs in the response
-                import re
                 # Replace literal tab characters with escaped tabs
                 json_str = json_str.replace('\t', '\\t')
                 # Replace literal newlines with escaped newlines (if any)
-                json_str = re.sub(r'(?<!\\)\n', '\\n', json_str)
+                json_str = _UNESCAPED_NEWLINE_RE.sub('\\n', json_str)
                 
                 logger.info(f"Parsing AI response JSON (length: {len(json_str)})")
                 parsed = json.loads(json_str)
                 modifications = parsed.get('modifications', [])
-                
-                # Unescape control characters in the modifications
-                # After JSON parsing, \t becomes literal "\t" but we need actual tab characters
-                for mod in modifications:
-                    if 'current_text' in mod:
-                        # Replace escaped sequences with actual characters
-                        mod['current_text'] = mod['current_text'].replace('\\t', '\t').replace('\\n', '\n')
-                    if 'new_text' in mod:
-                        mod['new_text'] = mod['new_text'].replace('\\t', '\t').replace('\\n', '\n')
+                self._unescape_modifications(modifications)
                 
                 logger.info(f"Successfully parsed {len(modifications)} modifications from AI response")
                 return modifications
@@ -1508,10 +2258,8 @@ Please provide your analysis in the specified JSON format."""
                 # Try to extract what we can from the partial JSON
                 try:
                     # Try to find the last complete modification
-                    import re
                     # Find all complete modification objects (more flexible pattern)
-                    mod_pattern = r'\{\s*"type":\s*"[^"]+",\s*"section":\s*"[^"]+",\s*"current_text":\s*"(?:[^"\\]|\\.)*",\s*"new_text":\s*"(?:[^"\\]|\\.)*",\s*"reason":\s*"(?:[^"\\]|\\.)*",\s*"location_hint":\s*"(?:[^"\\]|\\.)*"\s*\}'
-                    matches = re.findall(mod_pattern, json_str_local, re.DOTALL)
+                    matches = _COMPLETE_MOD_RE.findall(json_str_local)
                     if matches:
                         logger.warning(f"Found {len(matches)} complete modifications in truncated response")
                         # Reconstruct a valid JSON
@@ -1529,6 +2277,17 @@ Please provide your analysis in the specified JSON format."""
             logger.error(f"Traceback: {traceback.format_exc()}")
             return []
 
+    @staticmethod
+    def _unescape_modifications(modifications: List[Dict[str, Any]]) -> None:
+        """Turn escaped tab/newline sequences left in the texts into the actual characters"""
+        # After JSON parsing, \t becomes literal "\t" but we need actual tab characters
+        for mod in modifications:
+            if 'current_text' in mod:
+                # Replace escaped sequences with actual characters
+                mod['current_text'] = mod['current_text'].replace('\\t', '\t').replace('\\n', '\n')
+            if 'new_text' in mod:
+                mod['new_text'] = mod['new_text'].replace('\\t', '\t').replace('\\n', '\n')
+    
     def generate_changes_for_review(self, document_text: str, custom_rules: List[Dict], firm_details: Dict[str, str]) -> Dict[str, Any]:
         """Generate changes with unique IDs for review interface"""
         logger.info("Generating changes for review interface")
@@ -1589,15 +2348,33 @@ Please provide your analysis in the specified JSON format."""
 
     def apply_accepted_changes(self, doc_path: str, accepted_changes: List[Dict], signature_path: str = None) -> Dict[str, Any]:
         """Apply only the accepted changes to create final document"""
-        accepted_count = len([c for c in accepted_changes if c.get("status") == "accepted"])
+        # Keep each accepted (current_text, new_text) pair once, in order - a repeat would
+        # only find the already-redlined text and mark it up a second time - and drop
+        # changes with no text before any document scan
+        to_apply = {}
+        accepted_count = 0
+        for change in accepted_changes:
+            if change.get("status") != "accepted":
+                continue
+            accepted_count += 1
+            old_text, new_text = change.get("current_text", ""), change.get("new_text", "")
+            if not old_text or not new_text:
+                logger.warning(f"Skipping change with empty text: {change}")
+                continue
+            to_apply.setdefault((old_text, new_text), change)
         logger.warning(f"========== APPLYING {accepted_count} ACCEPTED CHANGES ==========")
         logger.warning(f"Total changes received: {len(accepted_changes)}")
+        if len(to_apply) < accepted_count:
+            logger.warning(f"Applying {len(to_apply)} distinct non-empty changes")
         
         try:
             # Load the document
             doc = DocxDocument(doc_path)
             logger.warning(f"Document loaded: {doc_path}")
-            logger.warning(f"Document has {len(doc.paragraphs)} paragraphs")
+            # doc.paragraphs builds a Paragraph proxy for every paragraph on each access -
+            # build the list once and use it for the count as well as the changes below
+            paragraphs = doc.paragraphs
+            logger.warning(f"Document has {len(paragraphs)} paragraphs")
             
             # Enable Track Changes mode in the document settings
             try:
@@ -1612,25 +2389,34 @@ Please provide your analysis in the specified JSON format."""
             except Exception as tc_error:
                 logger.warning(f"Could not enable Track Changes mode: {tc_error}")
             
-            # Apply each accepted change
+            # Apply each accepted change. Changes only rewrite runs, never add or remove
+            # paragraphs, so the paragraph list and their texts are read once up front
+            # and a paragraph's text refreshed only when a change lands in it
+            para_texts = _paragraph_texts(doc)
+            # Where every change's text first occurs, from one search for all of them.
+            # A position stays valid while no paragraph before it has been rewritten
+            original_texts = list(para_texts)
+            first_hits = _first_paragraph_hits(para_texts, (old_text for old_text, _ in to_apply))
             changes_actually_applied = 0
-            for idx, change in enumerate(accepted_changes):
-                if change.get("status") == "accepted":
-                    logger.warning(f"\nApplying change {idx+1}/{len(accepted_changes)}:")
-                    logger.warning(f"  Old: '{change.get('current_text', '')[:80]}'")
-                    logger.warning(f"  New: '{change.get('new_text', '')[:80]}'")
-                    result = self._apply_single_change(doc, change)
-                    if result:
-                        changes_actually_applied += 1
-                        logger.warning(f"  ✅ Applied successfully")
-                    else:
-                        logger.warning(f"  ❌ Failed to apply")
+            for idx, ((old_text, _), change) in enumerate(to_apply.items()):
+                logger.warning(f"\nApplying change {idx+1}/{len(to_apply)}:")
+                logger.warning(f"  Old: '{change.get('current_text', '')[:80]}'")
+                logger.warning(f"  New: '{change.get('new_text', '')[:80]}'")
+                first_idx = first_hits.get(old_text, len(paragraphs) if '\0' not in old_text else 0)
+                if para_texts[:first_idx] != original_texts[:first_idx]:
+                    first_idx = None
+                result = self._apply_single_change(doc, change, paragraphs, para_texts, first_idx)
+                if result:
+                    changes_actually_applied += 1
+                    logger.warning(f"  ✅ Applied successfully")
+                else:
+                    logger.warning(f"  ❌ Failed to apply")
             
             logger.warning(f"Successfully applied {changes_actually_applied} out of {accepted_count} accepted changes")
             
             # Apply signature if provided
             if signature_path and os.path.exists(signature_path):
-                self._apply_signature(doc, signature_path)
+                self._apply_signature(doc, signature_path, paragraphs, para_texts)
             
             # Generate output path
             output_path = self._generate_output_path(doc_path)
@@ -1655,84 +2441,83 @@ Please provide your analysis in the specified JSON format."""
     
     def _generate_output_path(self, input_path: str) -> str:
         """Generate output path for the processed document"""
-        # Create outputs directory if it doesn't exist
-        output_dir = 'outputs'
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Get the absolute path to the outputs directory
-        base_dir = os.path.abspath(output_dir)
-        filename = os.path.basename(input_path)
-        name, ext = os.path.splitext(filename)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"{name}_final_{timestamp}{ext}"
-        return os.path.abspath(os.path.join(base_dir, output_filename))
+        # A nanosecond stamp keeps names unique across calls and restarts
+        # without any date formatting
+        source = Path(input_path)
+        self._output_dir.mkdir(exist_ok=True)
+        return str(self._output_dir / f"{source.stem}_final_{time.time_ns()}{source.suffix}")
     
-    def _apply_signature(self, doc: DocxDocument, signature_path: str):
+    def _apply_signature(self, doc: DocxDocument, signature_path: str, paragraphs: Optional[List[Paragraph]] = None,
+                         para_texts: Optional[List[str]] = None):
         """Apply signature image to the document"""
+        def find_paragraph(marker: str) -> Optional[Paragraph]:
+            # Reuse the paragraph texts the caller already keeps up to date when it has them
+            if paragraphs is None:
+                return _find_body_paragraph(doc, marker)
+            para_idx = _first_paragraph_index(para_texts, marker)
+            return paragraphs[para_idx] if para_idx < len(paragraphs) else None
+        
         try:
-            from docx.shared import Inches
-            from docx.enum.text import WD_ALIGN_PARAGRAPH
-            
             logger.info(f"Applying signature from: {signature_path}")
             
             # Find "Signed:" text and add signature right after it
             signature_added = False
             
-            for paragraph in doc.paragraphs:
-                if 'Signed:' in paragraph.text:
-                    logger.info(f"Found 'Signed:' in paragraph: {paragraph.text}")
-                    
-                    # Clear the paragraph and rebuild it with proper signature placement
-                    original_text = paragraph.text
-                    paragraph.clear()
-                    
-                    # Split text around "Signed:"
-                    parts = original_text.split('Signed:', 1)
-                    
-                    # Add text before "Signed:"
-                    if parts[0].strip():
-                        before_run = paragraph.add_run(parts[0])
-                    
-                    # Add "Signed:" text
-                    signed_run = paragraph.add_run("Signed: ")
-                    
-                    # Add signature image immediately after "Signed:"
-                    signature_run = paragraph.add_run()
-                    signature_run.add_picture(signature_path, width=Inches(1.2))
-                    
-                    # Add any remaining text after "Signed:"
-                    if len(parts) > 1 and parts[1].strip():
-                        remaining_run = paragraph.add_run(parts[1])
-                    
-                    signature_added = True
-                    logger.info("Signature added right next to 'Signed:' text")
-                    break
+            paragraph = find_paragraph('Signed:')
+            if paragraph is not None:
+                logger.info(f"Found 'Signed:' in paragraph: {paragraph.text}")
+                
+                # Clear the paragraph and rebuild it with proper signature placement
+                original_text = paragraph.text
+                paragraph.clear()
+                
+                # Split text around "Signed:"
+                parts = original_text.split('Signed:', 1)
+                
+                # Add text before "Signed:"
+                if parts[0].strip():
+                    before_run = paragraph.add_run(parts[0])
+                
+                # Add "Signed:" text
+                signed_run = paragraph.add_run("Signed: ")
+                
+                # Add signature image immediately after "Signed:"
+                signature_run = paragraph.add_run()
+                signature_run.add_picture(signature_path, width=Inches(1.2))
+                
+                # Add any remaining text after "Signed:"
+                if len(parts) > 1 and parts[1].strip():
+                    remaining_run = paragraph.add_run(parts[1])
+                
+                signature_added = True
+                logger.info("Signature added right next to 'Signed:' text")
             
             # If no "Signed:" found, look for signature placeholders
             if not signature_added:
-                for paragraph in doc.paragraphs:
-                    if '[SIGNATURE]' in paragraph.text:
-                        # Replace placeholder with signature
-                        paragraph.text = paragraph.text.replace('[SIGNATURE]', '')
-                        
-                        # Add signature image
-                        run = paragraph.runs[0] if paragraph.runs else paragraph.add_run()
-                        run.add_picture(signature_path, width=Inches(1.5))
-                        signature_added = True
-                        logger.info("Signature added at [SIGNATURE] placeholder")
-                        break
+                paragraph = find_paragraph('[SIGNATURE]')
+                if paragraph is not None:
+                    # Replace placeholder with signature
+                    paragraph.text = paragraph.text.replace('[SIGNATURE]', '')
+                    
+                    # Add signature image
+                    run = paragraph.runs[0] if paragraph.runs else paragraph.add_run()
+                    run.add_picture(signature_path, width=Inches(1.5))
+                    signature_added = True
+                    logger.info("Signature added at [SIGNATURE] placeholder")
             
             # If still not added, add at the end of the document
             if not signature_added:
                 logger.warning("No signature placeholder found, adding at end of document")
-                last_paragraph = doc.paragraphs[-1]
+                # Reuse the caller's paragraph list rather than building another for one item
+                last_paragraph = (paragraphs if paragraphs is not None else doc.paragraphs)[-1]
                 run = last_paragraph.add_run()
                 run.add_picture(signature_path, width=Inches(1.5))
                 
         except Exception as e:
             logger.error(f"Error applying signature: {str(e)}")
     
-    def _apply_single_change(self, doc: DocxDocument, change: Dict) -> bool:
+    def _apply_single_change(self, doc: DocxDocument, change: Dict, paragraphs: Optional[List[Paragraph]] = None,
+                             para_texts: Optional[List[str]] = None, first_idx: Optional[int] = None) -> bool:
         """Apply a single change to the document, returns True if successful"""
         try:
             old_text = change.get("current_text", "")
@@ -1742,13 +2527,29 @@ Please provide your analysis in the specified JSON format."""
                 logger.warning(f"Skipping change with empty text: {change}")
                 return False
             
-            # Find and replace text in the document
+            # The caller may pass the paragraphs and their texts so they are read once
+            # per document rather than once per change
+            if paragraphs is None:
+                paragraphs = doc.paragraphs
+                para_texts = _paragraph_texts(doc)
+            
+            # Find and replace text in the document. One search over all the paragraph
+            # texts (NUL-separated, so a hit never spans two) finds the first paragraph
+            # that can hold the exact text - the ones before it are skipped, and all of
+            # them when there is no exact match at all. The caller may already know
+            # that first paragraph
             found = False
-            for para_idx, paragraph in enumerate(doc.paragraphs):
+            if first_idx is None:
+                first_idx = 0
+                if '\0' not in old_text:
+                    first_idx = _first_paragraph_index(para_texts, old_text)
+            for para_idx in range(first_idx, len(paragraphs)):
+                paragraph = paragraphs[para_idx]
                 # Try exact match first
-                if old_text in paragraph.text:
-                    logger.warning(f"  Found exact match in paragraph {para_idx}: '{paragraph.text[:100]}'")
+                if old_text in para_texts[para_idx]:
+                    logger.warning(f"  Found exact match in paragraph {para_idx}: '{para_texts[para_idx][:100]}'")
                     success = self._replace_text_in_paragraph(paragraph, old_text, new_text)
+                    para_texts[para_idx] = paragraph.text
                     if success:
                         logger.warning(f"  ✅ Change applied in paragraph {para_idx}")
                         found = True
@@ -1758,21 +2559,28 @@ Please provide your analysis in the specified JSON format."""
             
             # If not found, try with whitespace normalization (e.g., "For: Company" vs "For:\tCompany")
             if not found:
-                import re
                 # Normalize whitespace for comparison
-                old_text_normalized = re.sub(r'\s+', ' ', old_text.strip())
-                
-                for para_idx, paragraph in enumerate(doc.paragraphs):
-                    para_text_normalized = re.sub(r'\s+', ' ', paragraph.text.strip())
+                old_text_normalized = _WS_RE.sub(' ', old_text.strip())
+                # Normalizing only collapses whitespace, so the longest word of the change
+                # must appear verbatim in any paragraph that can match - paragraphs
+                # without it are skipped before normalizing them
+                longest_word = max(old_text_normalized.split(' '), key=len)
+                
+                for para_idx, paragraph in enumerate(paragraphs):
+                    para_text = para_texts[para_idx]
+                    if longest_word not in para_text:
+                        continue
+                    para_text_normalized = _WS_RE.sub(' ', para_text.strip())
                     if old_text_normalized in para_text_normalized:
                         # Find the actual text in the original paragraph
                         # Extract the actual text with original whitespace
-                        actual_old_text = self._find_text_with_whitespace(paragraph.text, old_text)
+                        actual_old_text = self._find_text_with_whitespace(para_text, old_text)
                         if actual_old_text:
                             logger.warning(f"  Found with whitespace variation in paragraph {para_idx}")
                             logger.warning(f"    Looking for: '{old_text}'")
                             logger.warning(f"    Found actual: '{actual_old_text}'")
                             success = self._replace_text_in_paragraph(paragraph, actual_old_text, new_text)
+                            para_texts[para_idx] = paragraph.text
                             if success:
                                 logger.warning(f"  ✅ Change applied with whitespace normalization in paragraph {para_idx}")
                                 found = True
@@ -1791,8 +2599,6 @@ Please provide your analysis in the specified JSON format."""
     
     def _find_text_with_whitespace(self, paragraph_text: str, search_text: str) -> str:
         """Find text in paragraph that matches after whitespace normalization"""
-        import re
-        
         # Try exact match first
         if search_text in paragraph_text:
             return search_text
@@ -1801,45 +2607,26 @@ Please provide your analysis in the specified JSON format."""
         # The document might have "()" or "( )" or other variations
         if '()' in search_text:
             # Try variations with spaces inside parentheses
-            variations_with_parens = [
-                search_text.replace('()', '( )'),  # Space inside: "( )"
-                search_text.replace('()', '(  )'),  # Double space: "(  )"
-                search_text.replace('()', '()'),  # Keep original
-            ]
-            for variation in variations_with_parens:
+            for variation in _paren_variations(search_text):
                 if variation in paragraph_text:
                     logger.warning(f"    Found with parentheses variation: '{variation}'")
                     return variation
             
             # Try pattern matching for empty parentheses: match () or ( ) or (  ) etc.
-            paren_pattern = search_text.replace('()', r'\(\s*\)')  # Match () with optional spaces
-            pattern = re.escape(search_text)
-            pattern = pattern.replace(r'\(\)', r'\(\s*\)')  # Allow spaces in empty parentheses
-            pattern = pattern.replace(r'\ ', r'\s+')  # Allow any whitespace where there was a space
-            
-            match = re.search(pattern, paragraph_text)
+            match = _flexible_whitespace_re(search_text, empty_parens=True).search(paragraph_text)
             if match:
                 logger.warning(f"    Found with empty parentheses pattern matching: '{match.group(0)}'")
                 return match.group(0)
         
         # Try common whitespace variations
-        variations = [
-            search_text.replace(' ', '\t'),  # Replace spaces with tabs
-            search_text.replace(' ', '  '),  # Replace single space with double
-            re.sub(r'\s+', '\t', search_text),  # All whitespace to tabs
-        ]
-        
-        for variation in variations:
+        for variation in _whitespace_variations(search_text):
             if variation in paragraph_text:
                 logger.warning(f"    Found with whitespace variation: '{variation}'")
                 return variation
         
         # Try pattern matching with flexible whitespace
         # For "For: Company", match "For:<any whitespace>Company"
-        pattern = re.escape(search_text)
-        pattern = pattern.replace(r'\ ', r'\s+')  # Allow any whitespace where there was a space
-        
-        match = re.search(pattern, paragraph_text)
+        match = _flexible_whitespace_re(search_text).search(paragraph_text)
         if match:
             logger.warning(f"    Found with pattern matching: '{match.group(0)}'")
             return match.group(0)
@@ -1853,20 +2640,28 @@ Please provide your analysis in the specified JSON format."""
             if old_text in paragraph.text:
                 logger.warning(f"    Applying Track Changes to show old and new text")
                 
+                # Usually the text sits inside one run (or across two) - split just those
+                # runs and keep the rest of the paragraph as it is
+                if _splice_tracked_replacement(paragraph, old_text, new_text):
+                    logger.warning(f"    ✅✅ Track Changes complete (in place) - old text struck through, new text in red")
+                    return True
+                
+                # Otherwise the match spans runs - rebuild the paragraph around it
                 # Store original text
                 original_text = paragraph.text
                 
                 # Clear all runs and create new ones
                 paragraph.clear()
                 
-                # Split text around the old_text and create runs
-                parts = original_text.split(old_text, 1)  # Split only once for first occurrence
-                logger.warning(f"    Text split into {len(parts)} parts")
+                # Slice the text around the first occurrence of old_text and create runs
+                match_idx = original_text.find(old_text)
+                before = original_text[:match_idx]
+                after = original_text[match_idx + len(old_text):]
                 
                 # Add text before the replacement (no formatting)
-                if parts[0]:
-                    before_run = paragraph.add_run(parts[0])
-                    logger.warning(f"    Added text before: '{parts[0][:50]}'")
+                if before:
+                    before_run = paragraph.add_run(before)
+                    logger.warning(f"    Added text before: '{before[:50]}'")
                 
                 # Add OLD text with BLACK strikethrough (shows what was removed)
                 deleted_run = paragraph.add_run(old_text)
@@ -1881,54 +2676,53 @@ Please provide your analysis in the specified JSON format."""
                 logger.warning(f"    ✅ Added INSERTION (red underline): '{new_text[:50]}'")
                 
                 # Add any remaining text after the replacement (no formatting)
-                if len(parts) > 1 and parts[1]:
-                    after_run = paragraph.add_run(parts[1])
-                    logger.warning(f"    Added text after: '{parts[1][:50]}'")
+                if after:
+                    after_run = paragraph.add_run(after)
+                    logger.warning(f"    Added text after: '{after[:50]}'")
                 
                 logger.warning(f"    ✅✅ Track Changes complete - document will show BOTH old (strikethrough) and new (red underline) text")
                 return True
             else:
-                logger.warning(f"Text '{old_text}' not found in paragraph: '{paragraph.text}'")
-                # Try case-insensitive search with change tracking
-                if old_text.lower() in paragraph.text.lower():
+                # Read the paragraph text once - Paragraph.text rebuilds it from the runs
+                # on every access
+                original_text = paragraph.text
+                logger.warning(f"Text '{old_text}' not found in paragraph: '{original_text}'")
+                # Try case-insensitive search with change tracking - a single find on the
+                # lowered text both detects the match and locates it
+                idx = original_text.lower().find(old_text.lower())
+                if idx != -1:
                     logger.info(f"Found case-insensitive match, trying replacement with change tracking")
                     
-                    # Find the actual old text in the paragraph
-                    text_lower = paragraph.text.lower()
-                    idx = text_lower.find(old_text.lower())
+                    # Extract the actual old text from the paragraph
+                    actual_old_text = original_text[idx:idx+len(old_text)]
                     
-                    if idx != -1:
-                        # Extract the actual old text from the paragraph
-                        actual_old_text = paragraph.text[idx:idx+len(old_text)]
-                        
-                        # Clear the paragraph and rebuild with change tracking
-                        original_text = paragraph.text
-                        paragraph.clear()
-                        
-                        # Split on the actual old text
-                        parts = original_text.split(actual_old_text, 1)
-                        
-                        # Add text before replacement
-                        if parts[0]:
-                            run = paragraph.add_run(parts[0])
-                        
-                        # Add OLD text with black strikethrough
-                        deleted_run = paragraph.add_run(actual_old_text)
-                        deleted_run.font.strike = True
-                        deleted_run.font.color.rgb = RGBColor(0, 0, 0)  # Black strikethrough
-                        
-                        # Add NEW text with red underline
-                        added_run = paragraph.add_run(new_text)
-                        added_run.font.underline = True
-                        added_run.font.color.rgb = RGBColor(255, 0, 0)  # Red underline
-                        
-                        # Add remaining text
-                        if len(parts) > 1:
-                            run = paragraph.add_run(parts[1])
-                        
-                        logger.info(f"Case-insensitive replacement with visual change tracking: '{actual_old_text}' (strikethrough) -> '{new_text}' (red underline)")
-                        return True
-                
+                    # Clear the paragraph and rebuild with change tracking
+                    paragraph.clear()
+                    
+                    # Split on the actual old text
+                    parts = original_text.split(actual_old_text, 1)
+                    
+                    # Add text before replacement
+                    if parts[0]:
+                        run = paragraph.add_run(parts[0])
+                    
+                    # Add OLD text with black strikethrough
+                    deleted_run = paragraph.add_run(actual_old_text)
+                    deleted_run.font.strike = True
+                    deleted_run.font.color.rgb = RGBColor(0, 0, 0)  # Black strikethrough
+                    
+                    # Add NEW text with red underline
+                    added_run = paragraph.add_run(new_text)
+                    added_run.font.underline = True
+                    added_run.font.color.rgb = RGBColor(255, 0, 0)  # Red underline
+                    
+                    # Add remaining text
+                    if len(parts) > 1:
+                        run = paragraph.add_run(parts[1])
+                    
+                    logger.info(f"Case-insensitive replacement with visual change tracking: '{actual_old_text}' (strikethrough) -> '{new_text}' (red underline)")
+                    return True
+            
         except Exception as e:
             logger.error(f"Error replacing text in paragraph: {str(e)}")
             # Fallback to simple replacement with change tracking
@@ -1966,40 +2760,15 @@ Please provide your analysis in the specified JSON format."""
     def _add_track_change_deletion(self, run):
         """Add Word Track Changes deletion markup to a run"""
         try:
-            import uuid
-            # Create deletion markup - w:del must contain w:r (run) elements
-            del_elem = OxmlElement('w:del')
-            change_id = str(uuid.uuid4())[:8]  # Use unique ID for each change
-            del_elem.set(qn('w:id'), change_id)
-            del_elem.set(qn('w:author'), 'AI Redlining System')
-            del_elem.set(qn('w:date'), datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'))
-            
-            # Create a run element inside the deletion
-            run_elem = OxmlElement('w:r')
-            
-            # Add run properties (formatting)
-            rPr = OxmlElement('w:rPr')
-            # Copy any formatting from the original run
-            if run.font.bold:
-                b_elem = OxmlElement('w:b')
-                rPr.append(b_elem)
-            if run.font.italic:
-                i_elem = OxmlElement('w:i')
-                rPr.append(i_elem)
-            # Add strikethrough for deleted text
-            strike_elem = OxmlElement('w:strike')
-            rPr.append(strike_elem)
-            run_elem.append(rPr)
-            
-            # Use w:delText for deleted text (required for Track Changes deletions)
-            text_elem = OxmlElement('w:delText')
-            text_elem.set(qn('xml:space'), 'preserve')  # Preserve whitespace
-            text_elem.text = run.text
-            run_elem.append(text_elem)
-            del_elem.append(run_elem)
+            # A run that is no longer in the document can't be marked up - check that
+            # before building the markup rather than finding out when swapping it in
+            parent = run._element.getparent()
+            if parent is None:
+                raise ValueError("run is not attached to a paragraph")
+            del_elem = _tracked_deletion(run)
             
             # Replace the run's XML with the deletion markup
-            run._element.getparent().replace(run._element, del_elem)
+            parent.replace(run._element, del_elem)
             logger.warning(f"      ✅ Track Changes deletion XML created")
             
         except Exception as e:
@@ -2012,38 +2781,15 @@ Please provide your analysis in the specified JSON format."""
     def _add_track_change_insertion(self, run):
         """Add Word Track Changes insertion markup to a run"""
         try:
-            import uuid
-            # Create insertion markup - w:ins must contain w:r (run) elements
-            ins_elem = OxmlElement('w:ins')
-            change_id = str(uuid.uuid4())[:8]  # Use unique ID for each change
-            ins_elem.set(qn('w:id'), change_id)
-            ins_elem.set(qn('w:author'), 'AI Redlining System')
-            ins_elem.set(qn('w:date'), datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'))
-            
-            # Create a run element inside the insertion
-            run_elem = OxmlElement('w:r')
-            
-            # Add run properties (formatting)
-            rPr = OxmlElement('w:rPr')
-            # Add underline for inserted text
-            u_elem = OxmlElement('w:u')
-            u_elem.set(qn('w:val'), 'single')
-            rPr.append(u_elem)
-            # Add color for inserted text (red)
-            color_elem = OxmlElement('w:color')
-            color_elem.set(qn('w:val'), 'FF0000')  # Red
-            rPr.append(color_elem)
-            run_elem.append(rPr)
-            
-            # Add the text to the run element
-            text_elem = OxmlElement('w:t')
-            text_elem.set(qn('xml:space'), 'preserve')  # Preserve whitespace
-            text_elem.text = run.text
-            run_elem.append(text_elem)
-            ins_elem.append(run_elem)
+            # A run that is no longer in the document can't be marked up - check that
+            # before building the markup rather than finding out when swapping it in
+            parent = run._element.getparent()
+            if parent is None:
+                raise ValueError("run is not attached to a paragraph")
+            ins_elem = _tracked_insertion(run)
             
             # Replace the run's XML with the insertion markup
-            run._element.getparent().replace(run._element, ins_elem)
+            parent.replace(run._element, ins_elem)
             logger.warning(f"      ✅ Track Changes insertion XML created")
             
         except Exception as e:
@@ -2056,6 +2802,15 @@ Please provide your analysis in the specified JSON format."""
 class DocumentProcessor:
     def __init__(self, ai_service: AIRedliningService):
         self.ai_service = ai_service
+        # Per-document paragraph text cache and placeholder token index, filled
+        # in during text extraction so later passes don't re-read every paragraph
+        self._indexed_doc = None
+        self._paragraph_text_cache: Optional[List[str]] = None
+        self._token_index: Optional[Dict[str, List[int]]] = None
+        self._dirty_paragraphs = set()
+        # Resolve the outputs directory once rather than per document; it is only
+        # created when a document is actually written
+        self._output_dir = Path('outputs').resolve()
     
     def process_document(self, doc_path: str, custom_rules: List[Dict[str, Any]], 
                         firm_details: Dict[str, Any], signature_path: str = None) -> Dict[str, Any]:
@@ -2064,32 +2819,17 @@ class DocumentProcessor:
         Optimized for large files with memory efficiency
         """
         try:
-            # Check file size and use appropriate processing method
-            file_size = os.path.getsize(doc_path)
-            logger.info(f"Processing document: {file_size} bytes ({file_size/1024:.1f} KB)")
-            
-            # For large files (>100KB), use chunked processing
-            if file_size > 100 * 1024:  # 100KB threshold
-                return self._process_large_document(doc_path, custom_rules, firm_details, signature_path)
+            # Stream the paragraph text for the AI straight from the package, so the full
+            # document is only loaded once the analysis has succeeded (and isn't held in
+            # memory during it). Fall back to loading it first for unusual packages
+            doc = None
+            paragraph_texts = _stream_paragraph_texts(doc_path)
+            if paragraph_texts is None:
+                doc = DocxDocument(doc_path)
+                document_text = self._extract_document_text(doc)
             else:
-                return self._process_small_document(doc_path, custom_rules, firm_details, signature_path)
-            
-        except Exception as e:
-            logger.error(f"Error processing document: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-    
-    def _process_small_document(self, doc_path: str, custom_rules: List[Dict[str, Any]], 
-                               firm_details: Dict[str, Any], signature_path: str = None) -> Dict[str, Any]:
-        """Process small documents (<100KB) using standard method"""
-        try:
-            # Load the document
-            doc = DocxDocument(doc_path)
-            
-            # Extract text for AI analysis
-            document_text = self._extract_document_text(doc)
+                document_text = '\n'.join(paragraph_texts)
+            logger.info(f"Processing document: {len(document_text)} characters")
             
             # Get AI redlining instructions
             ai_result = self.ai_service.analyze_document(document_text, custom_rules, firm_details)
@@ -2100,6 +2840,10 @@ class DocumentProcessor:
                     'error': ai_result['error']
                 }
             
+            if doc is None:
+                doc = DocxDocument(doc_path)
+                self._index_paragraph_texts(doc, paragraph_texts)
+            
             # Apply AI modifications
             modifications = ai_result['redlining_instructions']
             if isinstance(modifications, dict) and 'modifications' in modifications:
@@ -2141,67 +2885,7 @@ class DocumentProcessor:
             }
             
         except Exception as e:
-            logger.error(f"Error processing small document: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-    
-    def _process_large_document(self, doc_path: str, custom_rules: List[Dict[str, Any]], 
-                               firm_details: Dict[str, Any], signature_path: str = None) -> Dict[str, Any]:
-        """Process large documents (>100KB) using memory-efficient chunked method"""
-        try:
-            logger.info("Processing large document with chunked method")
-            
-            # Load the document
-            doc = DocxDocument(doc_path)
-            
-            # Extract text in chunks for AI analysis
-            document_text = self._extract_document_text_chunked(doc)
-            
-            # Get AI redlining instructions
-            ai_result = self.ai_service.analyze_document(document_text, custom_rules, firm_details)
-            
-            if not ai_result['success']:
-                return {
-                    'success': False,
-                    'error': ai_result['error']
-                }
-            
-            # Apply AI modifications
-            modifications = ai_result['redlining_instructions']
-            if isinstance(modifications, dict) and 'modifications' in modifications:
-                modifications = modifications['modifications']
-            
-            # Apply modifications if we have any
-            if modifications:
-                self._apply_modifications_chunked(doc, modifications)
-            
-            # Apply firm details
-            self._apply_firm_details_chunked(doc, firm_details)
-            
-            # Apply signature if provided
-            if signature_path and os.path.exists(signature_path):
-                self._apply_signature(doc, signature_path)
-            
-            # Generate output path
-            output_path = self._generate_output_path(doc_path)
-            
-            # Ensure output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            # Save the modified document
-            doc.save(output_path)
-            
-            return {
-                'success': True,
-                'output_path': output_path,
-                'modifications_applied': len(modifications) if modifications else 0,
-                'ai_analysis': ai_result.get('ai_analysis', 'No analysis available')
-            }
-            
-        except Exception as e:
-            logger.error(f"Error processing large document: {str(e)}")
+            logger.error(f"Error processing document: {str(e)}")
             return {
                 'success': False,
                 'error': str(e)
@@ -2209,47 +2893,68 @@ class DocumentProcessor:
     
     def _extract_document_text(self, doc: DocxDocument) -> str:
         """Extract text content from the Word document"""
-        text_parts = []
-        for paragraph in doc.paragraphs:
-            text_parts.append(paragraph.text)
+        text_parts = _paragraph_texts(doc)
         
+        self._index_paragraph_texts(doc, text_parts)
         return '\n'.join(text_parts)
     
-    def _extract_document_text_chunked(self, doc: DocxDocument) -> str:
-        """Extract text content from large Word documents in chunks for memory efficiency"""
-        text_parts = []
-        chunk_size = 1000  # Process 1000 paragraphs at a time
-        total_paragraphs = len(doc.paragraphs)
+    def _index_paragraph_texts(self, doc: DocxDocument, texts: List[str]):
+        """Cache paragraph texts and record which paragraphs contain each known token"""
+        token_index = {}
+        for i, text in enumerate(texts):
+            # Every known token starts with '[' - skip plain paragraphs cheaply
+            if '[' not in text:
+                continue
+            # One scan for all the tokens, each paragraph listed once per token
+            for token in dict.fromkeys(_KNOWN_TOKEN_RE.findall(text)):
+                token_index.setdefault(token, []).append(i)
         
-        logger.info(f"Extracting text from {total_paragraphs} paragraphs in chunks of {chunk_size}")
+        self._indexed_doc = doc
+        self._paragraph_text_cache = texts
+        self._token_index = token_index
+        self._dirty_paragraphs = set()
+    
+    def _mark_paragraph_dirty(self, paragraph):
+        """Note that a paragraph changed so its cached text can't be trusted"""
+        self._dirty_paragraphs.add(paragraph._p)
+    
+    def _token_paragraphs(self, doc: DocxDocument, tokens: List[str]) -> list:
+        """Return the paragraphs that may contain any of tokens, in document order"""
+        paragraphs = doc.paragraphs
+        if self._indexed_doc is not doc or self._token_index is None:
+            self._index_paragraph_texts(doc, _paragraph_texts(doc))
         
-        for i in range(0, total_paragraphs, chunk_size):
-            chunk_end = min(i + chunk_size, total_paragraphs)
-            chunk_text = []
-            
-            for j in range(i, chunk_end):
-                if j < len(doc.paragraphs):
-                    chunk_text.append(doc.paragraphs[j].text)
-            
-            text_parts.extend(chunk_text)
-            
-            # Log progress for large documents
-            if total_paragraphs > 5000:
-                progress = (chunk_end / total_paragraphs) * 100
-                logger.info(f"Text extraction progress: {progress:.1f}%")
+        candidates = set()
+        for token in tokens:
+            candidates.update(self._token_index.get(token, ()))
+        # Paragraphs added since indexing (inserted text, new clauses)
+        candidates.update(range(len(self._paragraph_text_cache), len(paragraphs)))
+        # Paragraphs edited since indexing may have gained a token
+        if self._dirty_paragraphs:
+            candidates.update(i for i, p in enumerate(paragraphs) if p._p in self._dirty_paragraphs)
         
-        return '\n'.join(text_parts)
+        return [paragraphs[i] for i in sorted(candidates) if i < len(paragraphs)]
     
     def _apply_modifications(self, doc: DocxDocument, modifications: List[Dict[str, Any]]):
         """Apply AI-generated modifications to the document"""
+        # Replacements and deletions only rewrite runs, so consecutive ones share one
+        # read of the paragraph texts (kept current as they change). Any other
+        # modification may add paragraphs, so the texts are read again after it
+        paragraph_state = None
         for mod in modifications:
             try:
-                if mod['type'] == 'TEXT_REPLACE':
-                    self._replace_text(doc, mod['current_text'], mod['new_text'])
-                elif mod['type'] == 'TEXT_INSERT':
+                if mod['type'] in ('TEXT_REPLACE', 'TEXT_DELETE'):
+                    if paragraph_state is None:
+                        para_texts = _paragraph_texts(doc)
+                        paragraph_state = (doc.paragraphs, para_texts, [text.lower() for text in para_texts])
+                    if mod['type'] == 'TEXT_REPLACE':
+                        self._replace_text(doc, mod['current_text'], mod['new_text'], *paragraph_state)
+                    else:
+                        self._delete_text(doc, mod['current_text'], *paragraph_state)
+                    continue
+                paragraph_state = None
+                if mod['type'] == 'TEXT_INSERT':
                     self._insert_text(doc, mod['new_text'], mod.get('location_hint', ''))
-                elif mod['type'] == 'TEXT_DELETE':
-                    self._delete_text(doc, mod['current_text'])
                 elif mod['type'] == 'CLAUSE_ADD':
                     self._add_clause(doc, mod['new_text'])
                     
@@ -2257,57 +2962,30 @@ class DocumentProcessor:
                 logger.warning(f"Failed to apply modification {mod}: {str(e)}")
                 continue
     
-    def _apply_modifications_chunked(self, doc: DocxDocument, modifications: List[Dict[str, Any]]):
-        """Apply AI-generated modifications to large documents in chunks for memory efficiency"""
-        logger.info(f"Applying {len(modifications)} modifications to large document")
-        
-        for i, mod in enumerate(modifications):
-            try:
-                if mod['type'] == 'TEXT_REPLACE':
-                    self._replace_text_chunked(doc, mod['current_text'], mod['new_text'])
-                elif mod['type'] == 'TEXT_INSERT':
-                    self._insert_text_chunked(doc, mod['new_text'], mod.get('location_hint', ''))
-                elif mod['type'] == 'TEXT_DELETE':
-                    self._delete_text_chunked(doc, mod['current_text'])
-                elif mod['type'] == 'CLAUSE_ADD':
-                    self._add_clause_chunked(doc, mod['new_text'])
-                
-                # Log progress for large documents
-                if len(modifications) > 10:
-                    progress = ((i + 1) / len(modifications)) * 100
-                    logger.info(f"Modification progress: {progress:.1f}%")
-                    
-            except Exception as e:
-                logger.warning(f"Failed to apply modification {mod}: {str(e)}")
-                continue
-    
-    def _replace_text(self, doc: DocxDocument, old_text: str, new_text: str):
-        """Replace text in the document with professional redlining"""
+    def _replace_text(self, doc: DocxDocument, old_text: str, new_text: str, paragraphs: Optional[List[Paragraph]] = None,
+                      para_texts: Optional[List[str]] = None, para_lowers: Optional[List[str]] = None) -> bool:
+        """Replace text in the document with professional redlining, returns True if replaced"""
         logger.info(f"Attempting to replace '{old_text}' with '{new_text}'")
-        logger.info(f"Document has {len(doc.paragraphs)} paragraphs")
-        replaced = False
+        # Read every paragraph's text (and its lowercase form) once - the diagnostics
+        # and searches below would otherwise rebuild and re-lowercase each paragraph's
+        # text for every pattern and variation. A paragraph's entries are refreshed
+        # whenever a replacement is attempted in it. The caller may pass these in to
+        # share them between replacements
+        if paragraphs is None:
+            paragraphs = doc.paragraphs
+            para_texts = _paragraph_texts(doc)
+            para_lowers = [text.lower() for text in para_texts]
         
-        # Log first few paragraphs to see what text is actually in the document
-        logger.warning("First 10 paragraphs in document:")
-        for i, para in enumerate(doc.paragraphs[:10]):
-            logger.warning(f"Paragraph {i+1}: '{para.text}'")
-        
-        # Also search for common patterns to see what's actually in the document
-        logger.warning("Searching for common patterns in document:")
-        common_patterns = ["For:", "Company", "Dear", "NAME", "Title:", "By:"]
-        for pattern in common_patterns:
-            found_paragraphs = []
-            for i, para in enumerate(doc.paragraphs):
-                if pattern.lower() in para.text.lower():
-                    found_paragraphs.append(f"Para {i+1}: '{para.text}'")
-            if found_paragraphs:
-                logger.warning(f"Found '{pattern}' in: {found_paragraphs}")
-            else:
-                logger.warning(f"'{pattern}' not found in document")
+        def refresh(i):
+            para_texts[i] = paragraphs[i].text
+            para_lowers[i] = para_texts[i].lower()
+        
+        logger.info(f"Document has {len(paragraphs)} paragraphs")
+        replaced = False
         
-        # Search for variations of the specific text we're trying to replace
-        logger.warning(f"Searching for variations of '{old_text}':")
-        variations_to_search = [
+        # Wordings of the text to fall back on when it isn't found as-is. Each is tried
+        # once, in this order - an empty one would "match" every paragraph, so it is dropped
+        variations_to_search = list(dict.fromkeys(v for v in (
             old_text,
             old_text.replace(" ", ""),  # No spaces
             old_text.replace(":", ""),  # No colon
@@ -2315,35 +2993,25 @@ class DocumentProcessor:
             old_text.upper(),           # Uppercase
             old_text.replace("Company", "Comapny"),  # Common typo
             old_text.replace("Company", "company"),  # Case variation
-            "For: Company",  # Common pattern
-            "For:Company",   # No space after colon
-            "For Company",   # No colon
-            "for: company",  # All lowercase
-            "FOR: COMPANY",  # All uppercase
-            # Handle multiple whitespace variations
-            "For:  Company",  # Double space
-            "For:   Company", # Triple space
-            "For:    Company", # Quadruple space
-            "For:\tCompany",  # Tab after colon
-            "For: \tCompany", # Space and tab
-            "For:\t Company", # Tab and space
-            "For: \t Company", # Space, tab, space
-        ]
-        for variation in variations_to_search:
-            found_paragraphs = []
-            for i, para in enumerate(doc.paragraphs):
-                if variation.lower() in para.text.lower():
-                    found_paragraphs.append(f"Para {i+1}: '{para.text}'")
-            if found_paragraphs:
-                logger.warning(f"Found variation '{variation}' in: {found_paragraphs}")
-            else:
-                logger.warning(f"Variation '{variation}' not found in document")
+            *_FOR_COMPANY_VARIATIONS,
+        ) if v))
+        
+        # Diagnostics only - what the document actually holds around the text
+        if logger.isEnabledFor(logging.DEBUG):
+            self._debug_dump_paragraphs(para_texts, para_lowers, old_text, variations_to_search)
+        
+        def first_candidate(needle):
+            # Paragraphs before the first one holding needle can't match it
+            return 0 if '\0' in needle else _first_paragraph_index(para_texts, needle)
         
         # First, try exact match
-        for paragraph in doc.paragraphs:
-            if old_text in paragraph.text:
-                logger.warning(f"Found exact match in paragraph: {paragraph.text}")
-                if self._replace_text_in_paragraph(paragraph, old_text, new_text):
+        for i in range(first_candidate(old_text), len(paragraphs)):
+            paragraph = paragraphs[i]
+            if old_text in para_texts[i]:
+                logger.warning(f"Found exact match in paragraph: {para_texts[i]}")
+                success = self._replace_text_in_paragraph(paragraph, old_text, new_text)
+                refresh(i)
+                if success:
                     logger.warning(f"Successfully replaced. New paragraph: {paragraph.text}")
                     replaced = True
                     break
@@ -2351,17 +3019,24 @@ class DocumentProcessor:
         # If exact match failed, try normalized whitespace matching
         if not replaced:
             logger.warning("Trying normalized whitespace matching")
-            import re
             # Normalize whitespace in the old text (replace multiple spaces/tabs with single space)
-            normalized_old = re.sub(r'\s+', ' ', old_text.strip())
-            for paragraph in doc.paragraphs:
-                # Normalize whitespace in paragraph text
-                normalized_para = re.sub(r'\s+', ' ', paragraph.text.strip())
-                if normalized_old.lower() in normalized_para.lower():
-                    logger.warning(f"Found normalized match in paragraph: {paragraph.text}")
+            normalized_old = _WS_RE.sub(' ', old_text.strip()).lower()
+            # Normalizing only collapses whitespace, so the longest word of the text must
+            # appear as-is in any (lowercased) paragraph that can match - paragraphs
+            # without it are skipped before normalizing them
+            longest_word = max(normalized_old.split(' '), key=len)
+            for i, paragraph in enumerate(paragraphs):
+                if longest_word not in para_lowers[i]:
+                    continue
+                # Normalize whitespace in the (already lowercased) paragraph text
+                normalized_para = _WS_RE.sub(' ', para_lowers[i].strip())
+                if normalized_old in normalized_para:
+                    logger.warning(f"Found normalized match in paragraph: {para_texts[i]}")
                     # Try to find the actual text in the paragraph and replace it
-                    if old_text in paragraph.text:
-                        if self._replace_text_in_paragraph(paragraph, old_text, new_text):
+                    if old_text in para_texts[i]:
+                        success = self._replace_text_in_paragraph(paragraph, old_text, new_text)
+                        refresh(i)
+                        if success:
                             logger.warning(f"Successfully replaced with normalized matching. New paragraph: {paragraph.text}")
                             replaced = True
                             break
@@ -2369,60 +3044,68 @@ class DocumentProcessor:
                         # If exact text not found, try to find and replace the normalized version
                         # Find the actual text pattern in the paragraph
                         for variation in variations_to_search:
-                            if variation in paragraph.text:
+                            if variation in para_texts[i]:
                                 logger.warning(f"Found variation '{variation}' in paragraph, replacing with '{new_text}'")
-                                if self._replace_text_in_paragraph(paragraph, variation, new_text):
+                                success = self._replace_text_in_paragraph(paragraph, variation, new_text)
+                                refresh(i)
+                                if success:
                                     logger.warning(f"Successfully replaced variation. New paragraph: {paragraph.text}")
                                     replaced = True
                                     break
                         if replaced:
                             break
         
-        if not replaced:
+        # Placeholder tokens like [FIRM_NAME] have no wording variants - if the
+        # token itself isn't there, a "variation" would only hit unrelated text
+        is_placeholder = old_text.startswith('[') and old_text.endswith(']')
+        
+        if not replaced and not is_placeholder:
             logger.warning(f"Exact text '{old_text}' not found, trying variations")
             # Try partial matches for common variations
-            variations = [
+            variations = (
                 old_text.replace("5", "five (5)"),
                 old_text.replace("five (5)", "5"),
                 old_text.replace("years", "year"),
                 old_text.replace("year", "years"),
-                "five (5) years",  # Common legal format
-                "five years",
-                "5 year",
-                "five year",
+                *_TERM_FALLBACK_VARIATIONS,
                 # For company name variations
                 old_text.replace("For: ", ""),
                 old_text.replace("Company (name to be provided upon execution)", "Company"),
-                "Company",
-                "For: Company",
-                "Company (name to be provided upon execution)",
-                "For: Company (name to be provided upon execution)",
+                *_COMPANY_FALLBACK_VARIATIONS,
                 # Additional variations for better matching
                 "For: " + old_text,
                 old_text + " (name to be provided upon execution)",
                 "For: " + old_text + " (name to be provided upon execution)"
-            ]
+            )
+            # Skip empty variations and ones that don't change anything, keeping
+            # the first occurrence of each so the search order stays the same
+            variations = list(dict.fromkeys(v for v in variations if v and v != old_text))
             
             for variation in variations:
-                if variation and variation != old_text:  # Skip empty or duplicate variations
-                    logger.info(f"Trying variation: '{variation}'")
-                    for paragraph in doc.paragraphs:
-                        if variation in paragraph.text:
-                            logger.info(f"Found variation '{variation}' in paragraph: {paragraph.text}")
-                            if self._replace_text_in_paragraph(paragraph, variation, new_text):
-                                logger.info(f"Successfully replaced variation. New paragraph: {paragraph.text}")
-                                replaced = True
-                                break
-                    if replaced:
-                        break
+                logger.info(f"Trying variation: '{variation}'")
+                for i in range(first_candidate(variation), len(paragraphs)):
+                    paragraph = paragraphs[i]
+                    if variation in para_texts[i]:
+                        logger.info(f"Found variation '{variation}' in paragraph: {para_texts[i]}")
+                        success = self._replace_text_in_paragraph(paragraph, variation, new_text)
+                        refresh(i)
+                        if success:
+                            logger.info(f"Successfully replaced variation. New paragraph: {paragraph.text}")
+                            replaced = True
+                            break
+                if replaced:
+                    break
             
             # If still not found, try case-insensitive search
             if not replaced:
                 logger.info("Trying case-insensitive search")
-                for paragraph in doc.paragraphs:
-                    if old_text.lower() in paragraph.text.lower():
-                        logger.info(f"Found case-insensitive match in paragraph: {paragraph.text}")
-                        if self._replace_text_in_paragraph(paragraph, old_text, new_text):
+                old_lower = old_text.lower()
+                for i, paragraph in enumerate(paragraphs):
+                    if old_lower in para_lowers[i]:
+                        logger.info(f"Found case-insensitive match in paragraph: {para_texts[i]}")
+                        success = self._replace_text_in_paragraph(paragraph, old_text, new_text)
+                        refresh(i)
+                        if success:
                             logger.info(f"Successfully replaced case-insensitive. New paragraph: {paragraph.text}")
                             replaced = True
                             break
@@ -2431,9 +3114,31 @@ class DocumentProcessor:
             logger.error(f"Failed to replace '{old_text}' with '{new_text}' - no matches found")
         else:
             logger.info(f"Successfully replaced '{old_text}' with '{new_text}'")
+        
+        return replaced
+    
+    def _debug_dump_paragraphs(self, para_texts: List[str], para_lowers: List[str], old_text: str,
+                               variations: List[str]):
+        """Log which paragraphs hold the common placeholders and each variation of old_text"""
+        logger.debug("First 10 paragraphs in document:")
+        for i, text in enumerate(para_texts[:10]):
+            logger.debug("Paragraph %d: %r", i + 1, text)
+        
+        found = {pattern.lower(): [] for pattern in _COMMON_PATTERNS}
+        for i, text_lower in enumerate(para_lowers):
+            for pattern_lower in set(_COMMON_PATTERNS_RE.findall(text_lower)):
+                found[pattern_lower].append((i + 1, para_texts[i]))
+        for pattern in _COMMON_PATTERNS:
+            logger.debug("%r found in: %s", pattern, found[pattern.lower()])
+        
+        for variation in variations:
+            variation_lower = variation.lower()
+            found_paragraphs = [(i + 1, para_texts[i]) for i, text_lower in enumerate(para_lowers) if variation_lower in text_lower]
+            logger.debug("Variation %r of %r found in: %s", variation, old_text, found_paragraphs)
     
     def _replace_text_in_paragraph(self, paragraph, old_text: str, new_text: str):
         """Replace text in a paragraph while preserving formatting"""
+        self._mark_paragraph_dirty(paragraph)
         try:
             # First, try to find and replace in individual runs
             for run in paragraph.runs:
@@ -2447,6 +3152,12 @@ class DocumentProcessor:
                     logger.info(f"Replaced text in run: '{old_text}' -> '{new_text}'")
                     return True
             
+            # Text split across two runs is spliced in place, keeping the other runs
+            # (and their formatting) rather than rebuilding the paragraph
+            if _splice_tracked_replacement(paragraph, old_text, new_text, track_changes=True):
+                logger.info(f"Visual change tracking added across runs: '{old_text}' (strikethrough) -> '{new_text}' (red underline)")
+                return True
+            
             # If not found in individual runs, try paragraph-level replacement
             if old_text in paragraph.text:
                 logger.info(f"Text found in paragraph, doing paragraph-level replacement")
@@ -2484,47 +3195,46 @@ class DocumentProcessor:
                 logger.info(f"Final paragraph text: {paragraph.text}")
                 return True
             else:
-                logger.warning(f"Text '{old_text}' not found in paragraph: '{paragraph.text}'")
-                # Try case-insensitive search with change tracking
-                if old_text.lower() in paragraph.text.lower():
+                # Read the paragraph text once - Paragraph.text rebuilds it from the runs
+                # on every access
+                original_text = paragraph.text
+                logger.warning(f"Text '{old_text}' not found in paragraph: '{original_text}'")
+                # Try case-insensitive search with change tracking - a single find on the
+                # lowered text both detects the match and locates it
+                idx = original_text.lower().find(old_text.lower())
+                if idx != -1:
                     logger.info(f"Found case-insensitive match, trying replacement with change tracking")
                     
-                    # Find the actual old text in the paragraph
-                    text_lower = paragraph.text.lower()
-                    idx = text_lower.find(old_text.lower())
+                    # Extract the actual old text from the paragraph
+                    actual_old_text = original_text[idx:idx+len(old_text)]
                     
-                    if idx != -1:
-                        # Extract the actual old text from the paragraph
-                        actual_old_text = paragraph.text[idx:idx+len(old_text)]
-                        
-                        # Clear the paragraph and rebuild with change tracking
-                        original_text = paragraph.text
-                        paragraph.clear()
-                        
-                        # Split on the actual old text
-                        parts = original_text.split(actual_old_text, 1)
-                        
-                        # Add text before replacement
-                        if parts[0]:
-                            run = paragraph.add_run(parts[0])
-                        
-                        # Add OLD text with black strikethrough
-                        deleted_run = paragraph.add_run(actual_old_text)
-                        deleted_run.font.strike = True
-                        deleted_run.font.color.rgb = RGBColor(0, 0, 0)  # Black strikethrough
-                        
-                        # Add NEW text with red underline
-                        added_run = paragraph.add_run(new_text)
-                        added_run.font.underline = True
-                        added_run.font.color.rgb = RGBColor(255, 0, 0)  # Red underline
-                        
-                        # Add remaining text
-                        if len(parts) > 1:
-                            run = paragraph.add_run(parts[1])
-                        
-                        logger.info(f"Case-insensitive replacement with visual change tracking: '{actual_old_text}' (strikethrough) -> '{new_text}' (red underline)")
-                        return True
-                
+                    # Clear the paragraph and rebuild with change tracking
+                    paragraph.clear()
+                    
+                    # Split on the actual old text
+                    parts = original_text.split(actual_old_text, 1)
+                    
+                    # Add text before replacement
+                    if parts[0]:
+                        run = paragraph.add_run(parts[0])
+                    
+                    # Add OLD text with black strikethrough
+                    deleted_run = paragraph.add_run(actual_old_text)
+                    deleted_run.font.strike = True
+                    deleted_run.font.color.rgb = RGBColor(0, 0, 0)  # Black strikethrough
+                    
+                    # Add NEW text with red underline
+                    added_run = paragraph.add_run(new_text)
+                    added_run.font.underline = True
+                    added_run.font.color.rgb = RGBColor(255, 0, 0)  # Red underline
+                    
+                    # Add remaining text
+                    if len(parts) > 1:
+                        run = paragraph.add_run(parts[1])
+                    
+                    logger.info(f"Case-insensitive replacement with visual change tracking: '{actual_old_text}' (strikethrough) -> '{new_text}' (red underline)")
+                    return True
+            
         except Exception as e:
             logger.error(f"Error replacing text in paragraph: {str(e)}")
             # Fallback to simple replacement with change tracking
@@ -2562,40 +3272,15 @@ class DocumentProcessor:
     def _add_track_change_deletion(self, run):
         """Add Word Track Changes deletion markup to a run"""
         try:
-            import uuid
-            # Create deletion markup - w:del must contain w:r (run) elements
-            del_elem = OxmlElement('w:del')
-            change_id = str(uuid.uuid4())[:8]  # Use unique ID for each change
-            del_elem.set(qn('w:id'), change_id)
-            del_elem.set(qn('w:author'), 'AI Redlining System')
-            del_elem.set(qn('w:date'), datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'))
-            
-            # Create a run element inside the deletion
-            run_elem = OxmlElement('w:r')
-            
-            # Add run properties (formatting)
-            rPr = OxmlElement('w:rPr')
-            # Copy any formatting from the original run
-            if run.font.bold:
-                b_elem = OxmlElement('w:b')
-                rPr.append(b_elem)
-            if run.font.italic:
-                i_elem = OxmlElement('w:i')
-                rPr.append(i_elem)
-            # Add strikethrough for deleted text
-            strike_elem = OxmlElement('w:strike')
-            rPr.append(strike_elem)
-            run_elem.append(rPr)
-            
-            # Use w:delText for deleted text (required for Track Changes deletions)
-            text_elem = OxmlElement('w:delText')
-            text_elem.set(qn('xml:space'), 'preserve')  # Preserve whitespace
-            text_elem.text = run.text
-            run_elem.append(text_elem)
-            del_elem.append(run_elem)
+            # A run that is no longer in the document can't be marked up - check that
+            # before building the markup rather than finding out when swapping it in
+            parent = run._element.getparent()
+            if parent is None:
+                raise ValueError("run is not attached to a paragraph")
+            del_elem = _tracked_deletion(run)
             
             # Replace the run's XML with the deletion markup
-            run._element.getparent().replace(run._element, del_elem)
+            parent.replace(run._element, del_elem)
             logger.warning(f"      ✅ Track Changes deletion XML created")
             
         except Exception as e:
@@ -2608,38 +3293,15 @@ class DocumentProcessor:
     def _add_track_change_insertion(self, run):
         """Add Word Track Changes insertion markup to a run"""
         try:
-            import uuid
-            # Create insertion markup - w:ins must contain w:r (run) elements
-            ins_elem = OxmlElement('w:ins')
-            change_id = str(uuid.uuid4())[:8]  # Use unique ID for each change
-            ins_elem.set(qn('w:id'), change_id)
-            ins_elem.set(qn('w:author'), 'AI Redlining System')
-            ins_elem.set(qn('w:date'), datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'))
-            
-            # Create a run element inside the insertion
-            run_elem = OxmlElement('w:r')
-            
-            # Add run properties (formatting)
-            rPr = OxmlElement('w:rPr')
-            # Add underline for inserted text
-            u_elem = OxmlElement('w:u')
-            u_elem.set(qn('w:val'), 'single')
-            rPr.append(u_elem)
-            # Add color for inserted text (red)
-            color_elem = OxmlElement('w:color')
-            color_elem.set(qn('w:val'), 'FF0000')  # Red
-            rPr.append(color_elem)
-            run_elem.append(rPr)
-            
-            # Add the text to the run element
-            text_elem = OxmlElement('w:t')
-            text_elem.set(qn('xml:space'), 'preserve')  # Preserve whitespace
-            text_elem.text = run.text
-            run_elem.append(text_elem)
-            ins_elem.append(run_elem)
+            # A run that is no longer in the document can't be marked up - check that
+            # before building the markup rather than finding out when swapping it in
+            parent = run._element.getparent()
+            if parent is None:
+                raise ValueError("run is not attached to a paragraph")
+            ins_elem = _tracked_insertion(run)
             
             # Replace the run's XML with the insertion markup
-            run._element.getparent().replace(run._element, ins_elem)
+            parent.replace(run._element, ins_elem)
             logger.warning(f"      ✅ Track Changes insertion XML created")
             
         except Exception as e:
@@ -2649,38 +3311,6 @@ class DocumentProcessor:
             run.font.underline = True
             run.font.color.rgb = RGBColor(255, 0, 0)
     
-    def _replace_text_chunked(self, doc: DocxDocument, old_text: str, new_text: str):
-        """Replace text in large documents with chunked processing for memory efficiency"""
-        logger.info(f"Attempting to replace '{old_text}' with '{new_text}' in large document")
-        replaced = False
-        chunk_size = 500  # Process 500 paragraphs at a time
-        total_paragraphs = len(doc.paragraphs)
-        
-        for i in range(0, total_paragraphs, chunk_size):
-            chunk_end = min(i + chunk_size, total_paragraphs)
-            
-            for j in range(i, chunk_end):
-                if j < len(doc.paragraphs):
-                    paragraph = doc.paragraphs[j]
-                    if old_text in paragraph.text:
-                        logger.info(f"Found text to replace in paragraph {j}: {paragraph.text[:100]}...")
-                        
-                        # Replace text while preserving formatting
-                        self._replace_text_in_paragraph(paragraph, old_text, new_text)
-                        replaced = True
-                        break
-            
-            if replaced:
-                break
-            
-            # Log progress for very large documents
-            if total_paragraphs > 10000:
-                progress = (chunk_end / total_paragraphs) * 100
-                logger.info(f"Text replacement progress: {progress:.1f}%")
-        
-        if not replaced:
-            logger.warning(f"Text '{old_text}' not found in large document for replacement")
-    
     def _insert_text(self, doc: DocxDocument, text: str, location_hint: str):
         """Insert new text at specified location"""
         # Find appropriate location and insert
@@ -2690,40 +3320,39 @@ class DocumentProcessor:
             run.font.underline = True
             run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
     
-    def _insert_text_chunked(self, doc: DocxDocument, text: str, location_hint: str):
-        """Insert new text at specified location in large documents"""
-        # Find appropriate location and insert
-        new_paragraph = doc.add_paragraph(text)
-        for run in new_paragraph.runs:
-            # Professional redlining for insertions
-            run.font.underline = True
-            run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
-    
-    def _delete_text(self, doc: DocxDocument, text: str):
+    def _delete_text(self, doc: DocxDocument, text: str, paragraphs: Optional[List[Paragraph]] = None,
+                     para_texts: Optional[List[str]] = None, para_lowers: Optional[List[str]] = None):
         """Delete text from the document"""
-        for paragraph in doc.paragraphs:
-            if text in paragraph.text:
-                paragraph.text = paragraph.text.replace(text, '')
-                # Add strikethrough formatting for deleted text
-                for run in paragraph.runs:
-                    run.font.strike = True
-    
-    def _delete_text_chunked(self, doc: DocxDocument, text: str):
-        """Delete text from large documents with chunked processing"""
-        chunk_size = 500
-        total_paragraphs = len(doc.paragraphs)
-        
-        for i in range(0, total_paragraphs, chunk_size):
-            chunk_end = min(i + chunk_size, total_paragraphs)
-            
-            for j in range(i, chunk_end):
-                if j < len(doc.paragraphs):
-                    paragraph = doc.paragraphs[j]
-                    if text in paragraph.text:
-                        paragraph.text = paragraph.text.replace(text, '')
-                        # Add strikethrough formatting for deleted text
-                        for run in paragraph.runs:
-                            run.font.strike = True
+        # Search the paragraph texts read once (or passed in by the caller, who shares them
+        # across modifications) and re-read only the paragraphs a deletion changed
+        if paragraphs is None:
+            paragraphs = doc.paragraphs
+            para_texts = _paragraph_texts(doc)
+        for i, paragraph_text in enumerate(para_texts):
+            if text in paragraph_text:
+                self._delete_text_in_paragraph(paragraphs[i], text)
+                para_texts[i] = paragraphs[i].text
+                if para_lowers is not None:
+                    para_lowers[i] = para_texts[i].lower()
+    
+    def _delete_text_in_paragraph(self, paragraph, text: str):
+        """Remove text from a paragraph and strike through the runs it was removed from"""
+        self._mark_paragraph_dirty(paragraph)
+        # Single pass over the text of the runs Paragraph.text reads (not those inside
+        # w:ins and the like): splice the text out of each w:t and add w:strike to the
+        # owning run's properties in the same visit
+        for t in _PARAGRAPH_RUN_TEXT_XPATH(paragraph._p):
+            if t.text and text in t.text:
+                t.text = t.text.replace(text, '')
+                t.getparent().get_or_add_rPr().get_or_add_strike()
+        
+        paragraph_text = paragraph.text
+        if text in paragraph_text:
+            # Text spans several runs - rebuild the paragraph text for what is left
+            paragraph.text = paragraph_text.replace(text, '')
+            # Add strikethrough formatting for deleted text
+            for run in paragraph.runs:
+                run.font.strike = True
     
     def _add_clause(self, doc: DocxDocument, clause_text: str):
         """Add a new clause to the document"""
@@ -2733,134 +3362,110 @@ class DocumentProcessor:
             run.font.underline = True
             run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
     
-    def _add_clause_chunked(self, doc: DocxDocument, clause_text: str):
-        """Add a new clause to large documents"""
-        new_paragraph = doc.add_paragraph(clause_text)
-        for run in new_paragraph.runs:
-            # Professional redlining for new clauses
-            run.font.underline = True
-            run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
-    
     def _apply_firm_details(self, doc: DocxDocument, firm_details: Dict[str, Any]):
         """Apply firm details to signature blocks and firm information"""
-        # Find and replace placeholder text with firm details
-        for paragraph in doc.paragraphs:
-            if '[FIRM_NAME]' in paragraph.text:
-                paragraph.text = paragraph.text.replace('[FIRM_NAME]', firm_details.get('name', ''))
-                # Add professional redlining to show the change
-                for run in paragraph.runs:
-                    run.font.underline = True
-                    run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
-            if '[FIRM_ADDRESS]' in paragraph.text:
-                paragraph.text = paragraph.text.replace('[FIRM_ADDRESS]', firm_details.get('address', ''))
-                for run in paragraph.runs:
-                    run.font.underline = True
-                    run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
-            if '[SIGNER_NAME]' in paragraph.text:
-                paragraph.text = paragraph.text.replace('[SIGNER_NAME]', firm_details.get('signerName', ''))
-                for run in paragraph.runs:
-                    run.font.underline = True
-                    run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
-            if '[SIGNER_TITLE]' in paragraph.text:
-                paragraph.text = paragraph.text.replace('[SIGNER_TITLE]', firm_details.get('signerTitle', ''))
-                for run in paragraph.runs:
-                    run.font.underline = True
-                    run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
+        # Look the values up once instead of per matching paragraph
+        replacements = self._firm_replacements(firm_details)
+        if not replacements:
+            return
+        
+        # Find and replace placeholder text with firm details, visiting only
+        # the paragraphs the token index says can hold a placeholder
+        for paragraph in self._token_paragraphs(doc, KNOWN_TOKENS):
+            paragraph_text = paragraph.text
+            if any(token in paragraph_text for token in replacements):
+                self._fill_placeholders(paragraph, replacements)
     
-    def _apply_firm_details_chunked(self, doc: DocxDocument, firm_details: Dict[str, Any]):
-        """Apply firm details to large documents with chunked processing"""
-        logger.info("Applying firm details to large document")
-        chunk_size = 500
-        total_paragraphs = len(doc.paragraphs)
+    def _firm_replacements(self, firm_details: Dict[str, Any]) -> Dict[str, str]:
+        """Map each placeholder token to its firm detail value, skipping empty ones"""
+        values = (
+            firm_details.get('name', ''),
+            firm_details.get('address', ''),
+            firm_details.get('signerName', ''),
+            firm_details.get('signerTitle', ''),
+        )
+        return {token: value for token, value in zip(KNOWN_TOKENS, values, strict=True) if value}
+    
+    def _fill_placeholders(self, paragraph, replacements: Dict[str, str]):
+        """Replace the placeholder tokens in a paragraph and redline the runs that changed"""
+        def fill(match):
+            token = match.group(0)
+            return replacements.get(token, token)
         
-        for i in range(0, total_paragraphs, chunk_size):
-            chunk_end = min(i + chunk_size, total_paragraphs)
-            
-            for j in range(i, chunk_end):
-                if j < len(doc.paragraphs):
-                    paragraph = doc.paragraphs[j]
-                    
-                    if '[FIRM_NAME]' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('[FIRM_NAME]', firm_details.get('name', ''))
-                        for run in paragraph.runs:
-                            run.font.underline = True
-                            run.font.color.rgb = RGBColor(255, 0, 0)
-                    if '[FIRM_ADDRESS]' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('[FIRM_ADDRESS]', firm_details.get('address', ''))
-                        for run in paragraph.runs:
-                            run.font.underline = True
-                            run.font.color.rgb = RGBColor(255, 0, 0)
-                    if '[SIGNER_NAME]' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('[SIGNER_NAME]', firm_details.get('signerName', ''))
-                        for run in paragraph.runs:
-                            run.font.underline = True
-                            run.font.color.rgb = RGBColor(255, 0, 0)
-                    if '[SIGNER_TITLE]' in paragraph.text:
-                        paragraph.text = paragraph.text.replace('[SIGNER_TITLE]', firm_details.get('signerTitle', ''))
-                        for run in paragraph.runs:
-                            run.font.underline = True
-                            run.font.color.rgb = RGBColor(255, 0, 0)
-            
-            # Log progress for very large documents
-            if total_paragraphs > 10000:
-                progress = (chunk_end / total_paragraphs) * 100
-                logger.info(f"Firm details progress: {progress:.1f}%")
+        # Splice the values into the runs holding the tokens - every token in one
+        # substitution per run - so the rest of the paragraph keeps its runs and formatting
+        filled = []
+        for run in paragraph.runs:
+            run_text = run.text
+            if '[' not in run_text:
+                continue
+            new_text = _KNOWN_TOKEN_RE.sub(fill, run_text)
+            if new_text != run_text:
+                run.text = new_text
+                filled.append(run)
+        
+        # Tokens split across runs are still in the paragraph text - rebuild it to fill
+        # every copy that is left
+        paragraph_text = paragraph.text
+        if any(token in replacements for token in _KNOWN_TOKEN_RE.findall(paragraph_text)):
+            paragraph.text = _KNOWN_TOKEN_RE.sub(fill, paragraph_text)
+            filled = paragraph.runs
+        
+        # Add professional redlining to show the change
+        for run in filled:
+            run.font.underline = True
+            run.font.color.rgb = RGBColor(255, 0, 0)  # Red for additions
     
     def _apply_signature(self, doc: DocxDocument, signature_path: str):
         """Apply signature image to the document"""
         try:
-            from docx.shared import Inches
-            from docx.enum.text import WD_ALIGN_PARAGRAPH
-            
             logger.info(f"Applying signature from: {signature_path}")
             
             # Find "Signed:" text and add signature right after it
             signature_added = False
             
-            for paragraph in doc.paragraphs:
-                if 'Signed:' in paragraph.text:
-                    logger.info(f"Found 'Signed:' in paragraph: {paragraph.text}")
-                    
-                    # Clear the paragraph and rebuild it with proper signature placement
-                    original_text = paragraph.text
-                    paragraph.clear()
-                    
-                    # Split text around "Signed:"
-                    parts = original_text.split('Signed:', 1)
-                    
-                    # Add text before "Signed:"
-                    if parts[0].strip():
-                        before_run = paragraph.add_run(parts[0])
-                    
-                    # Add "Signed:" text
-                    signed_run = paragraph.add_run("Signed: ")
-                    
-                    # Add signature image immediately after "Signed:"
-                    signature_run = paragraph.add_run()
-                    signature_run.add_picture(signature_path, width=Inches(1.2))
-                    
-                    # Add any remaining text after "Signed:"
-                    if len(parts) > 1 and parts[1].strip():
-                        remaining_run = paragraph.add_run(parts[1])
-                    
-                    signature_added = True
-                    logger.info("Signature added right next to 'Signed:' text")
-                    break
+            paragraph = _find_body_paragraph(doc, 'Signed:')
+            if paragraph is not None:
+                logger.info(f"Found 'Signed:' in paragraph: {paragraph.text}")
+                
+                # Clear the paragraph and rebuild it with proper signature placement
+                original_text = paragraph.text
+                paragraph.clear()
+                
+                # Split text around "Signed:"
+                parts = original_text.split('Signed:', 1)
+                
+                # Add text before "Signed:"
+                if parts[0].strip():
+                    before_run = paragraph.add_run(parts[0])
+                
+                # Add "Signed:" text
+                signed_run = paragraph.add_run("Signed: ")
+                
+                # Add signature image immediately after "Signed:"
+                signature_run = paragraph.add_run()
+                signature_run.add_picture(signature_path, width=Inches(1.2))
+                
+                # Add any remaining text after "Signed:"
+                if len(parts) > 1 and parts[1].strip():
+                    remaining_run = paragraph.add_run(parts[1])
+                
+                signature_added = True
+                logger.info("Signature added right next to 'Signed:' text")
             
             # If no "Signed:" found, look for signature placeholders
             if not signature_added:
-                for paragraph in doc.paragraphs:
-                    if '[SIGNATURE]' in paragraph.text:
-                        # Replace placeholder with signature
-                        paragraph.text = paragraph.text.replace('[SIGNATURE]', '')
-                        
-                        # Add signature image
-                        run = paragraph.runs[0] if paragraph.runs else paragraph.add_run()
-                        run.add_picture(signature_path, width=Inches(1.5))
-                        
-                        signature_added = True
-                        logger.info("Signature added at placeholder location")
-                        break
+                paragraph = _find_body_paragraph(doc, '[SIGNATURE]')
+                if paragraph is not None:
+                    # Replace placeholder with signature
+                    paragraph.text = paragraph.text.replace('[SIGNATURE]', '')
+                    
+                    # Add signature image
+                    run = paragraph.runs[0] if paragraph.runs else paragraph.add_run()
+                    run.add_picture(signature_path, width=Inches(1.5))
+                    
+                    signature_added = True
+                    logger.info("Signature added at placeholder location")
             
             # If still no signature added, add at the end
             if not signature_added:
@@ -2899,10 +3504,6 @@ class DocumentProcessor:
             dict with success status and output path
         """
         try:
-            from docx import Document as DocxDocument
-            from docx.shared import Inches
-            import shutil
-            
             # Load the original document
             doc = DocxDocument(document_path)
             logger.info(f"📄 Applying {len(accepted_changes)} accepted changes")
@@ -2916,6 +3517,14 @@ class DocumentProcessor:
                         for cell in row.cells:
                             all_paragraphs.extend(cell.paragraphs)
                 
+                # Read every paragraph's text once, and find where each change's text first
+                # occurs with one search for all of them rather than rebuilding each
+                # paragraph's text for every change. Changes only rewrite runs, so a
+                # position stays valid while no paragraph before it has been rewritten
+                para_texts = [_paragraph_element_text(paragraph._p) for paragraph in all_paragraphs]
+                original_texts = list(para_texts)
+                first_hits = _first_paragraph_hits(para_texts, (change.get('current_text', '') for change in accepted_changes))
+                
                 # Apply each accepted change
                 for change in accepted_changes:
                     try:
@@ -2926,21 +3535,34 @@ class DocumentProcessor:
                             continue
                         applied = False
                         
-                        # Replace text in paragraphs (with whitespace-aware matching)
-                        for paragraph in all_paragraphs:
-                            target_text = None
-                            
-                            if current_text in paragraph.text:
-                                target_text = current_text
-                            else:
-                                target_text = self._find_text_with_whitespace(paragraph.text, current_text)
-                            
-                            if target_text:
-                                if self._replace_text_in_paragraph(paragraph, target_text, new_text):
+                        # Replace text in paragraphs, starting from the first exact match
+                        first_idx = first_hits.get(current_text, len(all_paragraphs) if '\0' not in current_text else 0)
+                        if para_texts[:first_idx] != original_texts[:first_idx]:
+                            first_idx = 0
+                        for para_idx in range(first_idx, len(all_paragraphs)):
+                            if current_text in para_texts[para_idx]:
+                                paragraph = all_paragraphs[para_idx]
+                                applied = self._replace_text_in_paragraph(paragraph, current_text, new_text)
+                                para_texts[para_idx] = paragraph.text
+                                if applied:
                                     logger.info(f"✅ Applied change: '{current_text[:30]}...' → '{new_text[:30]}...'")
-                                    applied = True
                                     break
                         
+                        # Only then fall back to whitespace-aware matching, skipping paragraphs
+                        # without the change's longest verbatim piece before searching them
+                        if not applied:
+                            longest_piece = max(_WS_OR_PARENS_RE.split(current_text), key=len)
+                            for para_idx, paragraph in enumerate(all_paragraphs):
+                                if longest_piece not in para_texts[para_idx]:
+                                    continue
+                                target_text = self.ai_service._find_text_with_whitespace(para_texts[para_idx], current_text)
+                                if target_text:
+                                    applied = self._replace_text_in_paragraph(paragraph, target_text, new_text)
+                                    para_texts[para_idx] = paragraph.text
+                                    if applied:
+                                        logger.info(f"✅ Applied change: '{current_text[:30]}...' → '{new_text[:30]}...'")
+                                        break
+                        
                         if not applied:
                             logger.warning(f"⚠️ Could not apply change (text not found): '{current_text[:50]}'")
                                 
@@ -2986,54 +3608,55 @@ class DocumentProcessor:
     def _insert_signature(self, doc, signature_path: str):
         """Insert signature image into the document signature block"""
         try:
-            from docx.shared import Inches
-            import re
-            
             # Find the "Signed:" or "By:" field in the document
             signature_inserted = False
             
-            for paragraph in doc.paragraphs:
-                raw_text = paragraph.text
-                text_lower = raw_text.strip().lower()
-                
-                # Look for signature line (typically after "Signed:" or near "By:")
-                if text_lower.startswith('signed:') or (text_lower.startswith('by:') and '_' in raw_text):
-                    # Find ALL underscore sequences so we can insert after the last one
-                    underscore_matches = list(re.finditer(r'(_+)', raw_text))
+            # Nothing changes until the signature goes in, so find the first signature line
+            # with one search over all the paragraph texts (NUL-separated, so a match never
+            # spans two) instead of lower-casing each paragraph in turn
+            para_texts = _paragraph_texts(doc)
+            joined_texts = '\0'.join(para_texts)
+            signature_line = _SIGNATURE_LINE_RE.search(joined_texts)
+            if signature_line:
+                para_idx = joined_texts.count('\0', 0, signature_line.end())
+                paragraph = doc.paragraphs[para_idx]
+                raw_text = para_texts[para_idx]
+                
+                # Find ALL underscore sequences so we can insert after the last one
+                underscore_matches = list(_UNDERSCORES_RE.finditer(raw_text))
+                
+                if underscore_matches:
+                    last_match = underscore_matches[-1]
+                    before_underscores = raw_text[:last_match.start()]
+                    underscores = last_match.group(0)
+                    after_underscores = raw_text[last_match.end():]
                     
-                    if underscore_matches:
-                        last_match = underscore_matches[-1]
-                        before_underscores = raw_text[:last_match.start()]
-                        underscores = last_match.group(0)
-                        after_underscores = raw_text[last_match.end():]
-                        
-                        # Clear paragraph and rebuild with precise ordering
-                        paragraph.clear()
-                        
-                        if before_underscores:
-                            paragraph.add_run(before_underscores)
-                        
-                        strike_run = paragraph.add_run(underscores)
-                        strike_run.font.strike = True
-                        
-                        # Insert signature immediately after the underscores
-                        sig_run = paragraph.add_run()
-                        sig_run.add_picture(signature_path, width=Inches(2.0))
-                        
-                        if after_underscores:
-                            paragraph.add_run(after_underscores)
-                    else:
-                        # No underscores found, just add at end with strikethrough on any existing underscores
-                        for run in paragraph.runs:
-                            if '_' in run.text:
-                                run.font.strike = True
-                        paragraph.add_run(' ')
-                        sig_run = paragraph.add_run()
-                        sig_run.add_picture(signature_path, width=Inches(2.0))
+                    # Clear paragraph and rebuild with precise ordering
+                    paragraph.clear()
                     
-                    signature_inserted = True
-                    logger.info(f"✅ Inserted signature after underscores in: {raw_text[:40]}")
-                    break
+                    if before_underscores:
+                        paragraph.add_run(before_underscores)
+                    
+                    strike_run = paragraph.add_run(underscores)
+                    strike_run.font.strike = True
+                    
+                    # Insert signature immediately after the underscores
+                    sig_run = paragraph.add_run()
+                    sig_run.add_picture(signature_path, width=Inches(2.0))
+                    
+                    if after_underscores:
+                        paragraph.add_run(after_underscores)
+                else:
+                    # No underscores found, just add at end with strikethrough on any existing underscores
+                    for run in paragraph.runs:
+                        if '_' in run.text:
+                            run.font.strike = True
+                    paragraph.add_run(' ')
+                    sig_run = paragraph.add_run()
+                    sig_run.add_picture(signature_path, width=Inches(2.0))
+                
+                signature_inserted = True
+                logger.info(f"✅ Inserted signature after underscores in: {raw_text[:40]}")
             
             if not signature_inserted:
                 logger.warning("⚠️ Could not find signature location in document")
@@ -3043,14 +3666,8 @@ class DocumentProcessor:
     
     def _generate_output_path(self, input_path: str) -> str:
         """Generate output path for the processed document"""
-        # Create outputs directory if it doesn't exist
-        output_dir = 'outputs'
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Get the absolute path to the outputs directory
-        base_dir = os.path.abspath(output_dir)
-        filename = os.path.basename(input_path)
-        name, ext = os.path.splitext(filename)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"{name}_redlined_{timestamp}{ext}"
-        return os.path.abspath(os.path.join(base_dir, output_filename))
+        # A nanosecond stamp keeps names unique across calls and restarts
+        # without any date formatting
+        source = Path(input_path)
+        self._output_dir.mkdir(exist_ok=True)
+        return str(self._output_dir / f"{source.stem}_redlined_{time.time_ns()}{source.suffix}")
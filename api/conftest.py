@@ -0,0 +1,35 @@
+"""
+Shared fixtures for the AI redlining service tests
+"""
+
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from app.services import ai_redlining
+from app.services.ai_redlining import AIRedliningService
+
+
+@pytest.fixture
+def empty_response_cache():
+    """Start and finish a test with an empty OpenAI response cache"""
+    ai_redlining._response_cache.clear()
+    yield
+    ai_redlining._response_cache.clear()
+
+
+@pytest.fixture
+def streaming_service():
+    """Factory for a service whose OpenAI client streams back respond(messages) and counts its calls"""
+    def make(respond, finish_reason='stop'):
+        def create(**kwargs):
+            chunks = [SimpleNamespace(delta=SimpleNamespace(content=respond(kwargs['messages'])), finish_reason=None),
+                      SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason=finish_reason)]
+            return [SimpleNamespace(choices=[choice]) for choice in chunks]
+
+        service = AIRedliningService()
+        service.model = 'gpt-4'
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=mock.Mock(side_effect=create))))
+        return service
+    return make
@@ -0,0 +1,133 @@
+"""
+Tests for analyzing several documents at once with the AI redlining service
+"""
+
+import json
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+from app.services import ai_redlining
+
+pytestmark = pytest.mark.usefixtures('empty_response_cache')
+
+RULES = [{"name": "Confidentiality Term", "instruction": "Change to 5 years"}]
+DOCUMENTS = ["The term is three years.", "The term is two years."]
+
+
+def modification(current_text, new_text):
+    return {"type": "TEXT_REPLACE", "section": "term", "current_text": current_text,
+            "new_text": new_text, "reason": "r", "location_hint": "h"}
+
+
+def term_response(messages):
+    """Model answer replacing the term of whichever document the prompt holds"""
+    term = 'three years' if DOCUMENTS[0] in messages[1]['content'] else 'two years'
+    return json.dumps({"modifications": [modification(term, 'five years')]})
+
+
+def test_concurrent_results_follow_document_order(streaming_service):
+    def create_completion(messages, stream=False, max_tokens=None):
+        # The first document finishes last
+        if DOCUMENTS[0] in messages[1]['content']:
+            time.sleep(0.05)
+        return term_response(messages), 'stop'
+
+    service = streaming_service(term_response)
+    with mock.patch.object(service, '_create_completion', side_effect=create_completion) as completion:
+        results = service.analyze_documents_batch(DOCUMENTS, RULES, max_concurrent=2)
+    assert completion.call_count == 2
+    assert [result['redlining_instructions']['modifications'][0]['current_text'] for result in results] == ['three years', 'two years']
+
+
+def test_concurrent_analysis_retries_transient_errors(streaming_service):
+    failed = set()
+
+    def respond(messages):
+        # Every document's first attempt fails with a dropped connection
+        document = messages[1]['content']
+        if document not in failed:
+            failed.add(document)
+            raise APIConnectionError(request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+        return term_response(messages)
+
+    service = streaming_service(respond)
+    with mock.patch('app.services.ai_redlining.time.sleep') as sleep:
+        results = service.analyze_documents_batch(DOCUMENTS, RULES, max_concurrent=2)
+    assert service.client.chat.completions.create.call_count == 4
+    assert sleep.call_count == 2
+    assert [result['redlining_instructions']['modifications'][0]['current_text'] for result in results] == ['three years', 'two years']
+
+
+def documents_response(entries):
+    return json.dumps({"documents": entries})
+
+
+def multiplex_completion(content, finish_reason='stop'):
+    """_create_completion stand-in answering the combined request with content"""
+    def create_completion(messages, stream=False, max_tokens=None):
+        if stream:
+            # A single-document request
+            return term_response(messages), 'stop'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)])
+    return create_completion
+
+
+def test_multiplex_packs_small_documents_with_the_default_budget(streaming_service):
+    completion = multiplex_completion(documents_response({"0": {"modifications": [modification('three years', 'five years')]},
+                                                          "1": {"modifications": [modification('two years', 'five years')]}}))
+    service = streaming_service(term_response)
+    with mock.patch.object(service, '_create_completion', side_effect=completion) as create:
+        results = service.analyze_documents_multiplex(DOCUMENTS, RULES)
+    assert create.call_count == 1
+    # The combined answer gets room for each document's answer
+    assert create.call_args.kwargs['max_tokens'] == sum(ai_redlining._completion_budget(text, RULES) for text in DOCUMENTS)
+    assert [result['redlining_instructions']['modifications'][0]['current_text'] for result in results] == ['three years', 'two years']
+
+
+def test_multiplex_sends_documents_too_large_to_share_a_request_alone(streaming_service):
+    documents = [text * 400 for text in DOCUMENTS]
+    service = streaming_service(term_response)
+    with mock.patch.object(service, '_create_completion', side_effect=multiplex_completion('')) as create:
+        results = service.analyze_documents_multiplex(documents, RULES)
+    assert create.call_count == 2
+    assert all(call.kwargs.get('stream') for call in create.call_args_list)
+    assert all(result['success'] for result in results)
+
+
+def test_multiplex_maps_reordered_entries_by_document_id(streaming_service):
+    completion = multiplex_completion(documents_response({"1": {"modifications": [modification('two years', 'five years')]},
+                                                          "0": {"modifications": [modification('three years', 'five years')]}}))
+    service = streaming_service(term_response)
+    with mock.patch.object(service, '_create_completion', side_effect=completion) as create:
+        results = service.analyze_documents_multiplex(DOCUMENTS, RULES)
+    assert create.call_count == 1
+    assert [result['redlining_instructions']['modifications'][0]['current_text'] for result in results] == ['three years', 'two years']
+
+
+def test_multiplex_reanalyzes_documents_missing_from_response(streaming_service):
+    completion = multiplex_completion(documents_response({"1": {"modifications": [modification('two years', 'five years')]}}))
+    service = streaming_service(term_response)
+    with mock.patch.object(service, '_create_completion', side_effect=completion) as create:
+        results = service.analyze_documents_multiplex(DOCUMENTS, RULES)
+    # The combined request, then document 0 on its own
+    assert create.call_count == 2
+    assert DOCUMENTS[0] in create.call_args.args[0][1]['content']
+    assert [result['redlining_instructions']['modifications'][0]['current_text'] for result in results] == ['three years', 'two years']
+
+
+def test_multiplex_keeps_complete_entries_of_a_truncated_response(streaming_service):
+    content = documents_response({"1": {"modifications": [modification('two years', 'five years')]},
+                                  "0": {"modifications": [modification('three years', 'five years')]}})
+    truncated = content[:content.index('three years')]
+    service = streaming_service(term_response)
+    with mock.patch.object(service, '_create_completion', side_effect=multiplex_completion(truncated, 'length')) as create:
+        results = service.analyze_documents_multiplex(DOCUMENTS, RULES)
+    # Document 1's entry survived the cut; only document 0 is asked about again
+    assert create.call_count == 2
+    assert DOCUMENTS[0] in create.call_args.args[0][1]['content']
+    assert [result['redlining_instructions']['modifications'][0]['current_text'] for result in results] == ['three years', 'two years']
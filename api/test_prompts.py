@@ -0,0 +1,24 @@
+"""
+Tests for the prompts the AI redlining service sends to OpenAI
+"""
+
+from app.services.ai_redlining import AIRedliningService
+
+RULES = [{"name": "Signature Block", "instruction": "Replace [FIRM_NAME] with firm name, signed by John Bagge"}]
+ACME = {'firm_name': 'Acme LLC', 'signatory_name': 'Jane Roe', 'title': 'Partner'}
+GLOBEX = {'firm_name': 'Globex Inc', 'signatory_name': 'Hank Scorpio', 'title': 'CEO'}
+
+
+def test_system_prompt_is_the_same_for_every_firm():
+    service = AIRedliningService()
+    system_prompt = service._build_system_prompt(RULES)
+    assert '[FIRM_NAME]' in system_prompt
+    assert 'Acme LLC' not in system_prompt
+
+
+def test_user_prompt_maps_rule_values_to_the_firm():
+    service = AIRedliningService()
+    user_prompt = service._build_user_prompt("The term is three years.", RULES, ACME)
+    assert "'[FIRM_NAME]' → 'Acme LLC'" in user_prompt
+    assert "'John Bagge' → 'Jane Roe'" in user_prompt
+    assert 'Globex Inc' in service._build_user_prompt("The term is three years.", RULES, GLOBEX)
@@ -0,0 +1,53 @@
+"""
+Tests for the OpenAI response cache in the AI redlining service
+"""
+
+from unittest import mock
+
+import pytest
+
+from app.services import ai_redlining
+
+pytestmark = pytest.mark.usefixtures('empty_response_cache')
+
+RULES = [{"name": "Confidentiality Term", "instruction": "Change to 5 years"}]
+COMPLETE_RESPONSE = '{"modifications": []}'
+
+
+def test_cache_miss_returns_none():
+    assert ai_redlining._cached_response('missing') is None
+
+
+def test_cache_hit_returns_stored_response():
+    ai_redlining._cache_response('key', COMPLETE_RESPONSE)
+    assert ai_redlining._cached_response('key') == COMPLETE_RESPONSE
+
+
+def test_expired_response_is_dropped():
+    with mock.patch.object(ai_redlining.time, 'monotonic', return_value=1000.0):
+        ai_redlining._cache_response('key', COMPLETE_RESPONSE)
+    expired = 1000.0 + ai_redlining._RESPONSE_CACHE_TTL + 1
+    with mock.patch.object(ai_redlining.time, 'monotonic', return_value=expired):
+        assert ai_redlining._cached_response('key') is None
+    assert 'key' not in ai_redlining._response_cache
+
+
+def test_repeated_analysis_is_served_from_cache(streaming_service):
+    service = streaming_service(lambda messages: COMPLETE_RESPONSE)
+    first = service.analyze_document("The term is three years.", RULES)
+    second = service.analyze_document("The term is three years.", RULES)
+    assert service.client.chat.completions.create.call_count == 1
+    assert first['success'] and second['success']
+
+
+@pytest.mark.parametrize('text, finish_reason', [
+    ('{"modifications": [{"type": "TEXT_REPLACE", "current_text": "three', 'length'),
+    ('{"modifications": [{"type": "TEXT_REPLACE", "current_text": "three', 'stop'),
+    ('no json here', 'stop'),
+])
+def test_incomplete_response_is_not_cached(streaming_service, text, finish_reason):
+    service = streaming_service(lambda messages: text, finish_reason)
+    service.analyze_document("The term is three years.", RULES)
+    service.analyze_document("The term is three years.", RULES)
+    assert service.client.chat.completions.create.call_count == 2
+    assert not ai_redlining._response_cache